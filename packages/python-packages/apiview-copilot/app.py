@@ -29,6 +29,13 @@ from src._database_manager import DatabaseManager
 from src._diff import create_diff_with_line_numbers
 from src._mention import handle_mention_request
 from src._report_issue import handle_report_issue_request
+from src._review_scheduler import (
+    DEFAULT_MAX_QUEUE_SIZE,
+    DEFAULT_MAX_WORKERS,
+    ReviewQueueFullError,
+    ReviewScheduler,
+    review_size_class,
+)
 from src._settings import SettingsManager
 from src._thread_resolution import handle_thread_resolution_request
 from src._prompt_runner import run_prompt
@@ -39,6 +46,11 @@ from src.agent._agent import get_readonly_agent, get_readwrite_agent, invoke_age
 JOB_RETENTION_SECONDS = 1800  # 30 minutes
 db_manager = DatabaseManager.get_instance()
 settings = SettingsManager()
+# Review jobs beyond APIVIEW_REVIEW_WORKERS wait in a queue of up to APIVIEW_REVIEW_QUEUE_SIZE jobs
+review_scheduler = ReviewScheduler(
+    max_workers=int(os.getenv("APIVIEW_REVIEW_WORKERS") or DEFAULT_MAX_WORKERS),
+    max_queue_size=int(os.getenv("APIVIEW_REVIEW_QUEUE_SIZE") or DEFAULT_MAX_QUEUE_SIZE),
+)
 
 # Application Insights telemetry — enabled when connection string is available
 _appinsights_conn_str = os.environ.get("APPLICATIONINSIGHTS_CONNECTION_STRING")
@@ -103,10 +115,13 @@ async def submit_api_review_job(
     job_request: ApiReviewJobRequest,
     _claims=Depends(require_roles(AppRole.WRITER, AppRole.APP_WRITER)),
 ):
-    """Submit a new API review job."""
+    """Submit a new API review job. Responds with 429 and a Retry-After header if the review queue is full."""
     # Validate language
     if job_request.language not in SUPPORTED_LANGUAGES:
         raise HTTPException(status_code=400, detail=f"Unsupported language `{job_request.language}`")
+    # Reject before loading the reviewer's guidelines
+    if review_scheduler.queued >= review_scheduler.max_queue_size:
+        raise _queue_full_exception(review_scheduler.retry_after())
 
     try:
         reviewer = ApiViewReview(
@@ -119,33 +134,79 @@ async def submit_api_review_job(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     job_id = reviewer.job_id
-    db_manager.review_jobs.create(job_id, data={"status": ApiReviewJobStatus.InProgress, "finished": None})
+    queued = time.time()
 
     async def run_review_job():
         try:
-            loop = asyncio.get_running_loop()
-            # Run the blocking review in a thread pool executor
-            result = await loop.run_in_executor(None, reviewer.run)
-            reviewer.close()
+            # Queued jobs report InProgress too, so status polling is unchanged. The database calls are
+            # blocking, so they run on a worker thread rather than stall the other reviews on the event loop.
+            await asyncio.to_thread(
+                db_manager.review_jobs.upsert,
+                job_id,
+                data={"status": ApiReviewJobStatus.InProgress, "queued": queued, "started": time.time()},
+            )
+            # Prompts are awaited on the event loop; APIVIEW_MAX_CONCURRENT_PROMPTS limits them across all jobs
+            try:
+                result = await reviewer.arun()
+            finally:
+                # waits for the reviewer's worker threads, so it must not block the event loop
+                await asyncio.to_thread(reviewer.close)
             # Parse comments from result
             result_json = json.loads(result.model_dump_json())
             comments = result_json.get("comments", [])
 
             now = time.time()
-            db_manager.review_jobs.upsert(
-                job_id, data={"status": ApiReviewJobStatus.Success, "comments": comments, "finished": now}
+            await asyncio.to_thread(
+                db_manager.review_jobs.upsert,
+                job_id,
+                data={"status": ApiReviewJobStatus.Success, "comments": comments, "finished": now},
             )
         except Exception as e:
             now = time.time()
-            db_manager.review_jobs.upsert(
-                job_id, data={"status": ApiReviewJobStatus.Error, "details": str(e), "finished": now}
+            await asyncio.to_thread(
+                db_manager.review_jobs.upsert,
+                job_id,
+                data={"status": ApiReviewJobStatus.Error, "details": str(e), "finished": now},
             )
 
-    # Schedule the job in the background
-    asyncio.create_task(run_review_job())
+    # Create the record before queueing the job, so a job is only run if its ID reaches the client.
+    try:
+        await asyncio.to_thread(
+            db_manager.review_jobs.create,
+            job_id,
+            data={"status": ApiReviewJobStatus.InProgress, "queued": queued, "finished": None},
+        )
+    except Exception:
+        await asyncio.to_thread(reviewer.close)
+        raise
+    try:
+        review_scheduler.submit(
+            job_id,
+            run_review_job,
+            language=job_request.language,
+            size=review_size_class(job_request.target, job_request.base),
+        )
+    except ReviewQueueFullError as e:
+        # The queue filled up while the record was being created
+        await asyncio.to_thread(reviewer.close)
+        await asyncio.to_thread(
+            db_manager.review_jobs.upsert,
+            job_id,
+            data={"status": ApiReviewJobStatus.Error, "details": "The review queue is full.", "finished": time.time()},
+        )
+        raise _queue_full_exception(e.retry_after) from e
     return ApiReviewJobStartResponse(job_id=job_id)
 
 
+def _queue_full_exception(retry_after: int) -> HTTPException:
+    logger.warning("Review queue is full, asking the client to retry after %d seconds", retry_after)
+    return HTTPException(
+        status_code=429,
+        detail="Too many review jobs are queued. Please retry later.",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
 @app.get("/api-review/{job_id}", response_model=ApiReviewJobStatusResponse)
 async def get_api_review_job_status(
     job_id: str,
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Times SectionedDocument on synthetic APIViews, in the line formats used for FULL and DIFF reviews.
+
+Usage:
+    python scripts/benchmark_sectioning.py                       # 200,000 lines, both modes
+    python scripts/benchmark_sectioning.py --lines 50000 --repeat 5 --mode diff
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src._sectioned_document import SectionedDocument  # pylint: disable=wrong-import-position
+
+_CLASS_TEMPLATE = [
+    "@dataclass",
+    "class Model{n}:",
+    "    name: str",
+    "    value: int",
+    "",
+    "    def get_{n}(self, key: str) -> Optional[str]: ...",
+    "    def set_{n}(self, key: str, value: str) -> None: ...",
+    "",
+]
+
+
+def synthetic_apiview(line_count: int) -> List[str]:
+    """Returns `line_count` lines of a Python-like APIView: decorated classes with a few members."""
+    lines = []
+    n = 0
+    while len(lines) < line_count:
+        lines.extend(line.format(n=n) for line in _CLASS_TEMPLATE)
+        n += 1
+    return lines[:line_count]
+
+
+def full_lines(line_count: int) -> List[str]:
+    """Numbers the lines the way FULL reviews do."""
+    return [f"{i + 1}: {line}" for i, line in enumerate(synthetic_apiview(line_count))]
+
+
+def diff_lines(line_count: int) -> List[str]:
+    """
+    Returns `line_count` lines in the numbered unified diff format of DIFF reviews. Every tenth class
+    has one removed and one added member, the rest is context.
+    """
+    lines = []
+    for i, line in enumerate(synthetic_apiview(line_count)):
+        if i % (10 * len(_CLASS_TEMPLATE)) == 6:
+            lines.append(f"{i + 1}: -{line}")
+            lines.append(f"{i + 1}: +{line.replace(') -> None', ', *, force: bool = False) -> None')}")
+        else:
+            lines.append(f"{i + 1}:  {line}")
+    return lines[:line_count]
+
+
+def benchmark(lines: List[str], repeat: int) -> float:
+    """Returns the median time, in seconds, to section `lines`."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        SectionedDocument(lines=lines)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200_000, help="Lines per document. Default: 200000.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the median is reported. Default: 3.")
+    parser.add_argument("--mode", choices=["full", "diff", "all"], default="all", help="Line format. Default: all.")
+    args = parser.parse_args()
+
+    modes = {"full": full_lines, "diff": diff_lines}
+    for mode, make_lines in modes.items():
+        if args.mode not in (mode, "all"):
+            continue
+        lines = make_lines(args.lines)
+        seconds = benchmark(lines, args.repeat)
+        sections = len(SectionedDocument(lines=lines))
+        print(f"{mode:<5} {len(lines):>9,} lines  {sections:>6,} sections  {seconds:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,11 @@
 Module for the APIView Copilot API review functionality.
 """
 
+import asyncio
+import collections
 import concurrent.futures
+import contextlib
+import functools
 import json
 import logging
 import os
@@ -17,7 +21,7 @@ import sys
 import threading
 import uuid
 from time import time
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import yaml
 from opentelemetry import metrics
@@ -26,9 +30,12 @@ from src._credential import get_credential
 from src._diff import create_diff_with_line_numbers
 from pydantic import ValidationError
 from src._models import Comment, ExistingComment, ReviewResult
-from src._prompt_runner import run_prompt
-from src._search_manager import SearchManager
-from src._sectioned_document import SectionedDocument
+from src._prompt_runner import arun_prompt, get_inference_client_stats, run_prompt
+from src._response_cache import get_response_cache
+from src._retry import get_prompt_limiter
+from src._review_pipeline import AsyncReviewPipeline, ReviewPipeline
+from src._search_manager import SearchItemCache, SearchManager
+from src._sectioned_document import Section, SectionedDocument
 from src._settings import SettingsManager
 from src._utils import get_language_pretty_name
 
@@ -98,6 +105,12 @@ SUPPORTED_LANGUAGES = [
     "typescript",
 ]
 
+_GUIDELINE_TAG = "guideline"
+_GENERIC_TAG = "generic"
+_CONTEXT_TAG = "context"
+_SKIP_GENERIC = True  # Generic review is disabled for all languages
+_MAX_CONCURRENT_SEARCHES = 8
+
 
 class ApiViewReviewMode:
     """Enumeration for APIView review modes."""
@@ -137,11 +150,24 @@ class ApiViewReview:
         self.search = SearchManager(language=language)
         self.semantic_search_failed = False
         self.allowed_ids = [x.id for x in self.search.language_guidelines or []]
+        self._search_items = SearchItemCache(self.search)
+        self._search_items.add(self.search.language_guidelines or [])
         self.results = ReviewResult()
         self.summary = None
         self.outline = outline
         self.existing_comments = self._parse_existing_comments(comments)
         self.executor = concurrent.futures.ThreadPoolExecutor()
+        # context searches run in their own pool so they neither wait on nor hold up the prompts
+        self.search_executor = concurrent.futures.ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_SEARCHES)
+        self._stage_lock = threading.Lock()
+        self._stage_counts = collections.Counter()
+        self._filter_debug = {"KEEP": [], "DISCARD": []}
+        self._generic_filter_debug = {"KEEP": [], "DISCARD": []}
+        self._judge_results = []
+        # line number -> the comment kept for the line and its judge result
+        self._line_results: Dict[int, Tuple[Comment, Optional[dict]]] = {}
+        self._generic_metadata = None
+        self._filter_metadata = None
         self.filter_expression = f"language eq '{language}' and not (tags/any(t: t eq 'documentation' or t eq 'vague'))"
         if include_general_guidelines:
             self.filter_expression += " or language eq '' or language eq null"
@@ -189,11 +215,14 @@ class ApiViewReview:
         self.logger = JobLogger(logger, self.job_id)
         self._chunk_count = 0
         self.run_prompt = run_prompt  # Use shared prompt runner
+        self.arun_prompt = arun_prompt
 
     def __del__(self):
         # Ensure the executor is properly shut down
         if hasattr(self, "executor"):
             self.executor.shutdown(wait=False)
+        if hasattr(self, "search_executor"):
+            self.search_executor.shutdown(wait=False)
 
     def _hash(self, obj) -> str:
         return str(hash(json.dumps(obj)))
@@ -283,7 +312,15 @@ class ApiViewReview:
             raise NotImplementedError(f"Review mode {self.mode} is not implemented.")
 
     def _execute_prompt_task(
-        self, *, folder: str, filename: str, inputs: dict, task_name: str, status_idx: int, status_array: List[str]
+        self,
+        *,
+        folder: str,
+        filename: str,
+        inputs: dict,
+        task_name: str,
+        status_idx: int,
+        status_array: List[str],
+        context_future: Optional[concurrent.futures.Future] = None,
     ) -> Optional[dict]:
         """Execute a single prompt task with percent progress tracking.
 
@@ -294,51 +331,92 @@ class ApiViewReview:
             task_name (str): Name of the task (e.g., "summary", "guideline").
             status_idx (int): Index in the status array to update.
             status_array (List[str]): Array tracking the status of all tasks.
+            context_future (Optional[Future]): Pending context search whose result fills the "context" input.
 
         Returns:
             Optional[dict]: The result of the prompt execution, or None if an error occurred.
         """
-        # Numeric percent progress update (status_array is just a placeholder for counting)
-        total = len(status_array)
-        completed = sum(1 for s in status_array if s)
-        percent = int((completed / total) * 100) if total else 100
-        self._print_message(f"Evaluating prompts... {percent}% complete", overwrite=True)
-
+        self._print_prompt_progress(status_array)
         try:
+            if context_future is not None:
+                context = context_future.result()
+                inputs = {**inputs, "context": context.to_markdown() if context else ""}
             # Run the prompt
             response = self._run_prompt(folder, filename, inputs)
-            result = json.loads(response)
-
-            # Mark this task as done (for numeric progress only)
+            return json.loads(response)
+        except Exception as e:
+            self.logger.error(f"Error executing {task_name}: {str(e)}")
+            return None
+        finally:
+            # Mark this task as done, even on error (for numeric progress only)
             status_array[status_idx] = True
-            completed = sum(1 for s in status_array if s)
-            percent = int((completed / total) * 100) if total else 100
-            self._print_message(f"Evaluating prompts... {percent}% complete", overwrite=True)
-            return result
+            self._print_prompt_progress(status_array)
 
+    async def _aexecute_prompt_task(
+        self,
+        *,
+        folder: str,
+        filename: str,
+        inputs: dict,
+        task_name: str,
+        status_idx: int,
+        status_array: List[str],
+        context_future: Optional[concurrent.futures.Future] = None,
+    ) -> Optional[dict]:
+        """The asyncio counterpart of `_execute_prompt_task`, which takes the same arguments."""
+        self._print_prompt_progress(status_array)
+        try:
+            if context_future is not None:
+                context = await asyncio.wrap_future(context_future)
+                inputs = {**inputs, "context": context.to_markdown() if context else ""}
+            response = await self._arun_prompt(folder, filename, inputs)
+            return json.loads(response)
         except Exception as e:
-            status_array[status_idx] = True  # Mark as done even on error
-            completed = sum(1 for s in status_array if s)
-            percent = int((completed / total) * 100) if total else 100
-            self._print_message(f"Evaluating prompts... {percent}% complete", overwrite=True)
             self.logger.error(f"Error executing {task_name}: {str(e)}")
             return None
+        finally:
+            status_array[status_idx] = True
+            self._print_prompt_progress(status_array)
 
-    def _generate_comments(self):
+    def _print_prompt_progress(self, status_array: List[str]):
         """
-        Generate comments for the API view by submitting jobs in parallel.
+        Print the percentage of prompt tasks that are done (status_array is just a placeholder for counting).
         """
-        guideline_tag = "guideline"
-        generic_tag = "generic"
-        context_tag = "context"
-        skip_generic = True  # Generic review is disabled for all languages
+        total = len(status_array)
+        completed = sum(1 for s in status_array if s)
+        percent = int((completed / total) * 100) if total else 100
+        self._print_message(f"Evaluating prompts... {percent}% complete", overwrite=True)
 
-        sectioned_doc = self._create_sectioned_document()
+    @contextlib.contextmanager
+    def _exit_on_interrupt(self):
+        """
+        Terminate the process on Ctrl+C instead of waiting for the outstanding prompts.
+        """
+        is_main_thread = threading.current_thread() == threading.main_thread()
+        if is_main_thread:
+            original_handler = signal.getsignal(signal.SIGINT)
 
-        sections_to_process = [(i, section) for i, section in enumerate(sectioned_doc)]
-        self._chunk_count = len(sections_to_process)
+            def keyboard_interrupt_handler(*_):
+                self._print_message("\n\nCancellation requested! Terminating process...")
+                os._exit(1)
 
-        # Select appropriate prompts based on mode
+            signal.signal(signal.SIGINT, keyboard_interrupt_handler)
+        try:
+            yield
+        except KeyboardInterrupt:
+            self._print_message("\n\nCancellation requested! Terminating process...")
+            os._exit(1)
+        finally:
+            # Restore original signal handler if it was set
+            if is_main_thread:
+                signal.signal(signal.SIGINT, original_handler)
+
+    def _section_prompts(self, section_idx: int, section: Section, guideline_context: str) -> Dict[str, dict]:
+        """
+        Returns the prompts to run on a section, keyed by task name, as keyword arguments
+        for `_execute_prompt_task` without the progress tracking arguments. The section's context
+        search is started in the background rather than waited for.
+        """
         if self.mode == ApiViewReviewMode.FULL:
             guideline_prompt_file = "guidelines_review.prompty"
             context_prompt_file = "context_review.prompty"
@@ -350,517 +428,568 @@ class ApiViewReview:
         else:
             raise NotImplementedError(f"Review mode {self.mode} is not implemented.")
 
-        # Set up progress tracking
-        self._print_message("Processing sections: ", overwrite=True)
-
-        prompts_per_section = 2 if skip_generic else 3
-        total_prompts = len(sections_to_process) * prompts_per_section
-        prompt_status = [False] * total_prompts
-
-        # Set up keyboard interrupt handler for more responsive cancellation (only in main thread)
-        cancel_event = threading.Event()
+        language = get_language_pretty_name(self.language)
+        prompts = {
+            f"{_GUIDELINE_TAG}_{section_idx}": {
+                "filename": guideline_prompt_file,
+                "inputs": {"language": language, "context": guideline_context, "content": section.numbered()},
+            }
+        }
+        if not _SKIP_GENERIC:
+            prompts[f"{_GENERIC_TAG}_{section_idx}"] = {
+                "filename": generic_prompt_file,
+                "inputs": {
+                    "language": language,
+                    "custom_rules": self._generic_metadata["custom_rules"],
+                    "content": section.numbered(),
+                },
+            }
+        prompts[f"{_CONTEXT_TAG}_{section_idx}"] = {
+            "filename": context_prompt_file,
+            "inputs": {"language": language, "content": section.numbered()},
+            "context_future": self.search_executor.submit(self._retrieve_context, str(section)),
+        }
+        for prompt in prompts.values():
+            prompt["folder"] = "api_review"
+        return prompts
 
-        is_main_thread = threading.current_thread() == threading.main_thread()
-        if is_main_thread:
-            original_handler = signal.getsignal(signal.SIGINT)
+    def _collect_section_comments(self, section: Section, results: Dict[str, Optional[dict]]) -> List[Comment]:
+        """
+        Turns the prompt results of a section into comments, keeping only the comments that cite
+        the kind of source their prompt was asked to use.
+        """
+        comments = []
+        for key, result in results.items():
+            if not result or "comments" not in result:
+                continue
+            section_type = key.split("_")[0]
+            # ensure raw comments are of a pure type
+            for comment in result["comments"]:
+                if section_type == _GENERIC_TAG:
+                    comment["is_generic"] = True
+                    comment["guideline_ids"] = []
+                    comment["memory_ids"] = []
+                    comments.append(comment)
+                    continue
+                if section_type == _GUIDELINE_TAG and comment.get("guideline_ids"):
+                    comment["is_generic"] = False
+                    comment["memory_ids"] = []
+                    comments.append(comment)
+                    continue
+                if section_type == _CONTEXT_TAG and comment.get("memory_ids"):
+                    comment["is_generic"] = False
+                    comment["guideline_ids"] = []
+                    comments.append(comment)
+                    continue
+        if not comments:
+            return []
+        return ReviewResult(comments=comments, allowed_ids=self.allowed_ids, section=section).comments
 
-            def keyboard_interrupt_handler():
-                self._print_message("\n\nCancellation requested! Terminating process...")
-                cancel_event.set()
-                os._exit(1)
+    def _review_sections(self):
+        """
+        Generate, deduplicate, filter and score comments as a pipeline instead of one stage at a time.
 
-            signal.signal(signal.SIGINT, keyboard_interrupt_handler)
+        As soon as a section's prompts return, its comments are grouped by line. Once every section
+        containing a line has returned, that line's comments are merged and the result is filtered
+        and scored, while other sections are still being reviewed.
+        """
+        sections_to_process, prompt_status = self._start_review_sections()
+        prompts_per_section = len(prompt_status) // max(len(sections_to_process), 1)
 
-        # Retrieve guidelines as context for the guideline review phase
         guideline_context = self._retrieve_guidelines_as_context()
         guideline_context_string = guideline_context.to_markdown() if guideline_context else ""
 
-        # Submit all jobs to the executor
-        all_futures = {}
+        pipeline = ReviewPipeline(self.executor, sections_to_process, self._process_line, job_logger=self.logger)
+        with self._exit_on_interrupt():
+            for section_idx, section in enumerate(sections_to_process):
+                prompts = self._section_prompts(section_idx, section, guideline_context_string)
+                tasks = {}
+                for offset, (key, prompt) in enumerate(prompts.items()):
+                    tasks[key] = functools.partial(
+                        self._execute_prompt_task,
+                        **prompt,
+                        task_name=key,
+                        status_idx=section_idx * prompts_per_section + offset,
+                        status_array=prompt_status,
+                    )
+                pipeline.submit_section(
+                    section_idx, tasks, functools.partial(self._collect_and_filter_generic, section)
+                )
+            pipeline.close()
+            # wait in short intervals so Ctrl+C is handled promptly
+            while not pipeline.wait(timeout=0.5):
+                pass
+        self._finish_review_sections()
 
-        # Guideline and generic tasks for each section
-        for idx, (section_idx, section) in enumerate(sections_to_process):
-            # First check if cancellation is requested
-            if cancel_event.is_set():
-                break
+    async def _areview_sections(self):
+        """
+        The asyncio counterpart of `_review_sections`. Prompts run on the event loop; searches, database
+        lookups, sectioning the document and writing the debug logs run on the search executor.
+        """
+        sections_to_process, prompt_status = await self._in_search_executor(self._start_review_sections)
+        prompts_per_section = len(prompt_status) // max(len(sections_to_process), 1)
 
-            # Guideline prompt
-            guideline_key = f"{guideline_tag}_{section_idx}"
-            all_futures[guideline_key] = self.executor.submit(
-                self._execute_prompt_task,
-                folder="api_review",
-                filename=guideline_prompt_file,
-                inputs={
-                    "language": get_language_pretty_name(self.language),
-                    "context": guideline_context_string,
-                    "content": section.numbered(),
-                },
-                task_name=guideline_key,
-                status_idx=idx * prompts_per_section,
-                status_array=prompt_status,
-            )
+        guideline_context = await self._in_search_executor(self._retrieve_guidelines_as_context)
+        guideline_context_string = guideline_context.to_markdown() if guideline_context else ""
 
-            if not skip_generic:
-                generic_metadata = self._load_generic_metadata()
-                generic_key = f"{generic_tag}_{section_idx}"
-                all_futures[generic_key] = self.executor.submit(
-                    self._execute_prompt_task,
-                    folder="api_review",
-                    filename=generic_prompt_file,
-                    inputs={
-                        "language": get_language_pretty_name(self.language),
-                        "custom_rules": generic_metadata["custom_rules"],
-                        "content": section.numbered(),
-                    },
-                    task_name=generic_key,
-                    status_idx=(idx * prompts_per_section) + 1,
+        pipeline = AsyncReviewPipeline(sections_to_process, self._aprocess_line, job_logger=self.logger)
+        for section_idx, section in enumerate(sections_to_process):
+            prompts = self._section_prompts(section_idx, section, guideline_context_string)
+            tasks = {}
+            for offset, (key, prompt) in enumerate(prompts.items()):
+                tasks[key] = functools.partial(
+                    self._aexecute_prompt_task,
+                    **prompt,
+                    task_name=key,
+                    status_idx=section_idx * prompts_per_section + offset,
                     status_array=prompt_status,
                 )
+            pipeline.submit_section(section_idx, tasks, functools.partial(self._acollect_and_filter_generic, section))
+        await pipeline.wait()
+        await self._in_search_executor(self._finish_review_sections)
 
-            # Context prompt
-            context_key = f"{context_tag}_{section_idx}"
-            context = self._retrieve_context(str(section))
-            context_string = context.to_markdown() if context else ""
-            context_status_offset = 2 if not skip_generic else 1
-            all_futures[context_key] = self.executor.submit(
-                self._execute_prompt_task,
-                folder="api_review",
-                filename=context_prompt_file,
-                inputs={
-                    "language": get_language_pretty_name(self.language),
-                    "context": context_string,
-                    "content": section.numbered(),
-                },
-                task_name=context_key,
-                status_idx=(idx * prompts_per_section) + context_status_offset,
-                status_array=prompt_status,
-            )
+    def _start_review_sections(self):
+        """
+        Split the document into sections, load the language metadata and reset the pipeline state.
+        Returns the sections and the progress placeholders for their prompts.
+        """
+        sectioned_doc = self._create_sectioned_document()
+        sections_to_process = list(sectioned_doc)
+        self._chunk_count = len(sections_to_process)
+        self._stage_counts = collections.Counter()
+        self._filter_debug = {"KEEP": [], "DISCARD": []}
+        self._generic_filter_debug = {"KEEP": [], "DISCARD": []}
+        self._judge_results = []
+        self._line_results = {}
+        self._generic_metadata = self._load_generic_metadata()
+        self._filter_metadata = self._load_filter_metadata()
+
+        self._print_message("Processing sections: ", overwrite=True)
 
-        # Process results as they complete
+        prompts_per_section = 2 if _SKIP_GENERIC else 3
+        return sections_to_process, [False] * (len(sections_to_process) * prompts_per_section)
+
+    def _finish_review_sections(self):
+        """
+        Put the pipeline's results in line order and write its debug logs.
+        """
+        self._print_message()
+        self.results.comments = sorted(self.results.comments, key=lambda x: x.line_no)
+        self._judge_results.sort(key=lambda x: x["original_comment"]["line_no"])
+        for idx, judge_result in enumerate(self._judge_results):
+            judge_result["index"] = idx
+        self._write_pipeline_debug_logs()
+
+    async def _in_search_executor(self, fn, *args):
+        """
+        Run a blocking search or database call on the search executor without blocking the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.search_executor, functools.partial(fn, *args))
+
+    def _collect_and_filter_generic(self, section: Section, results: Dict[str, Optional[dict]]) -> List[Comment]:
+        """
+        Collect a section's comments and run its generic comments through the generic filter.
+        """
+        comments = self._collect_section_comments(section, results)
+        kept = [c for c in comments if not c.is_generic or self._filter_generic_comment(c)]
+        self._section_collected(comments, kept)
+        return kept
+
+    async def _acollect_and_filter_generic(self, section: Section, results: Dict[str, Optional[dict]]) -> List[Comment]:
+        """
+        The asyncio counterpart of `_collect_and_filter_generic`.
+        """
+        comments = self._collect_section_comments(section, results)
+        generic = [c for c in comments if c.is_generic]
+        verdicts = await asyncio.gather(*(self._afilter_generic_comment(c) for c in generic))
+        discarded = {id(c) for c, keep in zip(generic, verdicts) if not keep}
+        kept = [c for c in comments if id(c) not in discarded]
+        await self._in_search_executor(self._section_collected, comments, kept)
+        return kept
+
+    def _section_collected(self, comments: List[Comment], kept: List[Comment]):
+        """
+        Count a section's comments and look up the context they cite.
+        """
+        with self._stage_lock:
+            self._stage_counts["generated"] += len(comments)
+            self._stage_counts["generic_discarded"] += len(comments) - len(kept)
         try:
-            # Process each section's results
-            section_results = {}
-
-            for key, future in all_futures.items():
-                try:
-                    result = future.result()
-                    if result:
-                        section_type, section_idx = key.split("_")
-                        section_idx = int(section_idx)
-
-                        # Initialize section result if needed
-                        if section_idx not in section_results:
-                            section_results[section_idx] = {"comments": []}
-
-                        if "comments" in result:
-                            filtered_comments = []
-                            # ensure raw comments are of a pure type
-                            for comment in result["comments"]:
-                                if section_type == generic_tag:
-                                    comment["is_generic"] = True
-                                    comment["guideline_ids"] = []
-                                    comment["memory_ids"] = []
-                                    filtered_comments.append(comment)
-                                    continue
-                                if section_type == guideline_tag and comment.get("guideline_ids"):
-                                    comment["is_generic"] = False
-                                    comment["memory_ids"] = []
-                                    filtered_comments.append(comment)
-                                    continue
-                                if section_type == context_tag and comment.get("memory_ids"):
-                                    comment["is_generic"] = False
-                                    comment["guideline_ids"] = []
-                                    filtered_comments.append(comment)
-                                    continue
-                            section_results[section_idx]["comments"].extend(filtered_comments)
-                except Exception as e:
-                    self.logger.error(f"Error processing {key}: {str(e)}")
-
-            # Merge results from all sections
-            for section_idx, section_result in section_results.items():
-                if section_result and section_result["comments"]:
-                    comments = section_result["comments"]
-                    section = sections_to_process[section_idx][1]
-                    section_result = ReviewResult(comments=comments, allowed_ids=self.allowed_ids, section=section)
-                    self.results.comments.extend(section_result.comments)
-        except KeyboardInterrupt:
-            self._print_message("\n\nCancellation requested! Terminating process...")
-            cancel_event.set()
-            os._exit(1)
-        finally:
-            # Restore original signal handler if it was set
-            if is_main_thread:
-                signal.signal(signal.SIGINT, original_handler)
+            # one lookup for the section instead of one each time its comments are merged or scored
+            self._search_items.prefetch(x for c in kept for x in c.guideline_ids + c.memory_ids)
+        except Exception as e:
+            self.logger.error(f"Error looking up context for section comments: {str(e)}")
 
-    def _filter_generic_comments(self):
+    def _process_line(self, line_no: int, comments: List[Comment], *, late: bool = False):
         """
-        Filter generic comments by running the filter prompt on each comment, separating into keep
-        and discard lists, reporting counts, and dumping to debug log if enabled.
+        Merge the comments on a line, then filter and score the merged comment. With `late`, the
+        comments arrived after the line was processed, and are merged with the comment kept for it.
         """
-        self._print_message("\nFiltering generic comments...")
+        previous = self._take_line_result(line_no) if late else []
+        comments = previous + comments
+        comment = comments[0] if len(comments) == 1 else self._merge_comments(line_no, comments)
+        if comment is None:
+            return
+        if not late:
+            # a late pass re-merges a line that was already counted, whether or not a comment was kept
+            self._count_stage("merged")
+        if not self._filter_comment_with_metadata(comment):
+            self._count_stage("hard_filter_discarded")
+            return
+        if not self._filter_preexisting_comment(comment):
+            self._count_stage("preexisting_discarded")
+            return
+        self._add_scored_comment(line_no, comment, self._score_comment(comment))
 
-        # Submit each generic comment to the executor for parallel processing
-        futures = {}
-        for idx, comment in enumerate(self.results.comments):
-            if not comment.is_generic:
-                continue
-            search_result = self.search.search_all(query=comment.comment)
-            context = self.search.build_context(search_result)
-            context_text = context.to_markdown() if search_result else "EMPTY"
-            futures[idx] = self.executor.submit(
-                self._run_prompt,
-                "api_review",
-                "filter_generic_comment.prompty",
-                inputs={
-                    "content": comment.model_dump(),
-                    "language": get_language_pretty_name(self.language),
-                    "context": context_text,
-                },
+    async def _aprocess_line(self, line_no: int, comments: List[Comment], *, late: bool = False):
+        """
+        The asyncio counterpart of `_process_line`.
+        """
+        previous = self._take_line_result(line_no) if late else []
+        comments = previous + comments
+        comment = comments[0] if len(comments) == 1 else await self._amerge_comments(line_no, comments)
+        if comment is None:
+            return
+        if not late:
+            self._count_stage("merged")
+        if not await self._afilter_comment_with_metadata(comment):
+            self._count_stage("hard_filter_discarded")
+            return
+        if not await self._afilter_preexisting_comment(comment):
+            self._count_stage("preexisting_discarded")
+            return
+        self._add_scored_comment(line_no, comment, await self._ascore_comment(comment))
+
+    def _count_stage(self, stage: str):
+        with self._stage_lock:
+            self._stage_counts[stage] += 1
+
+    def _add_scored_comment(self, line_no: int, comment: Comment, judge_result: Optional[dict]):
+        with self._stage_lock:
+            if judge_result:
+                self._judge_results.append(judge_result)
+            self.results.comments.append(comment)
+            self._line_results[line_no] = (comment, judge_result)
+
+    def _take_line_result(self, line_no: int) -> List[Comment]:
+        """
+        Remove the comment kept for a line, and its judge result, so it can be merged with late comments.
+        """
+        with self._stage_lock:
+            kept = self._line_results.pop(line_no, None)
+            if kept is None:
+                return []
+            comment, judge_result = kept
+            self.results.comments = [c for c in self.results.comments if c is not comment]
+            self._judge_results = [j for j in self._judge_results if j is not judge_result]
+        return [comment]
+
+    def _filter_generic_comment(self, comment: Comment) -> bool:
+        """
+        Run the generic filter prompt on a generic comment. Returns False if the comment should be discarded.
+        """
+        try:
+            response = self._run_prompt(
+                "api_review", "filter_generic_comment.prompty", inputs=self._generic_filter_inputs(comment)
             )
+        except Exception as e:
+            self.logger.error(f"Error judging comment for line {comment.line_no}: {str(e)}")
+            return True
+        return self._apply_generic_filter(comment, response)
 
-        # Collect results as they complete, with % complete logging
-        keep_results = {}
-        discard_results = {}
-        total = len(futures)
-        for progress_idx, (idx, future) in enumerate(futures.items()):
-            try:
-                response = future.result()
-                if not response or not response.strip():
-                    self.logger.error(f"Error judging comment at index {idx}: Empty response from prompt.")
-                    continue
-                try:
-                    response_json = json.loads(response)
-                except Exception as je:
-                    self.logger.error(
-                        f"Error judging comment at index {idx}: Invalid JSON response: {repr(response)} | {str(je)}"
-                    )
-                    continue
-                if response_json.get("action") == "DISCARD":
-                    discard_results[idx] = response_json
-                elif response_json.get("action") == "KEEP":
-                    keep_results[idx] = response_json
-                else:
-                    # log an error but keep the comment to be safe
-                    self.logger.error(
-                        f"Error judging comment at index {idx}: Unknown action in response: {repr(response)}"
-                    )
-                    keep_results[idx] = response_json
-            except Exception as e:
-                self.logger.error(f"Error judging comment at index {idx}: {str(e)}")
-            percent = int(((progress_idx + 1) / total) * 100) if total else 100
-            self._print_message(f"Filtering generic comments... {percent}% complete", overwrite=True)
-        self._print_message()  # Ensure the progress bar is visible before the summary
-
-        # Report summary
-        self._print_message(
-            # pylint: disable=line-too-long
-            f"Filtering generic comments completed. Kept {len(keep_results)}. Discarded {len(discard_results)}."
-        )
+    async def _afilter_generic_comment(self, comment: Comment) -> bool:
+        """
+        The asyncio counterpart of `_filter_generic_comment`.
+        """
+        try:
+            inputs = await self._in_search_executor(self._generic_filter_inputs, comment)
+            response = await self._arun_prompt("api_review", "filter_generic_comment.prompty", inputs=inputs)
+        except Exception as e:
+            self.logger.error(f"Error judging comment for line {comment.line_no}: {str(e)}")
+            return True
+        return self._apply_generic_filter(comment, response)
+
+    def _generic_filter_inputs(self, comment: Comment) -> dict:
+        search_result = self.search.search_all(query=comment.comment)
+        context = self.search.build_context(search_result)
+        return {
+            "content": comment.model_dump(),
+            "language": get_language_pretty_name(self.language),
+            "context": context.to_markdown() if search_result else "EMPTY",
+        }
 
-        # Debug log: dump keep_comments and discard_comments to files if enabled
-        if self.write_debug_logs:
-            os.makedirs(self.output_dir, exist_ok=True)
-            for idx, comment in keep_results.items():
-                comment_dict = self.results.comments[idx].model_dump()
-                keep_results[idx] = {**comment_dict, **comment}
-            for idx, comment in discard_results.items():
-                comment_dict = self.results.comments[idx].model_dump()
-                discard_results[idx] = {**comment_dict, **comment}
-            keep_path = os.path.join(self.output_dir, "filter_generic_comments_KEEP.json")
-            discard_path = os.path.join(self.output_dir, "filter_generic_comments_DISCARD.json")
-            with open(keep_path, "w", encoding="utf-8") as f:
-                json.dump(list(keep_results.values()), f, indent=2)
-            with open(discard_path, "w", encoding="utf-8") as f:
-                json.dump(list(discard_results.values()), f, indent=2)
-            self.logger.debug(f"Kept generic comments written to {keep_path}")
-            self.logger.debug(f"Discarded generic comments written to {discard_path}")
-
-        # handle removing the discarded comments, preserving order of remaining comments
-        idx_to_remove = list(set(discard_results.keys()))
-        filtered_comments = []
-        for idx, comment in enumerate(self.results.comments):
-            if idx not in idx_to_remove:
-                filtered_comments.append(comment)
-        self.results.comments = filtered_comments
-
-    def _deduplicate_comments(self):
-        """
-        Deduplicate comments based on line number and rule IDs.
-        """
-        comments = self.results.comments
-        unique_comments = []
-        batches = {}
-
-        # First, collect all duplicate comments into batches to send to the LLM
-        # and add any unique comments to the unique_comments list
-        line_ids = set([x.line_no for x in comments])
-        for line_id in line_ids:
-            matches = [x for x in comments if x.line_no == line_id]
-            if len(matches) == 1:
-                unique_comments.append(matches[0])
-                continue
-            batches[line_id] = matches
-
-        self._print_message("\nDeduplicating comments...")
-
-        # Submit all batches to the executor for parallel processing
-        futures = {}
-        for line_no, batch in batches.items():
-            # Collect all rule IDs for the batch
-            all_guideline_ids = set()
-            all_memory_ids = set()
-            for comment in batch:
-                all_guideline_ids.update(comment.guideline_ids)
-                all_memory_ids.update(comment.memory_ids)
-
-            # Prepare the context for the prompt
-            search_results = self.search.search_all_by_id(list(all_guideline_ids.union(all_memory_ids)))
-            context = self.search.build_context(search_results)
-
-            # Submit the task to the executor
-            futures[line_no] = self.executor.submit(
-                self._run_prompt,
-                "api_review",
-                "merge_comments.prompty",
-                {"comments": batch, "context": context},
+    def _apply_generic_filter(self, comment: Comment, response: str) -> bool:
+        if not response or not response.strip():
+            self.logger.error(f"Error judging comment for line {comment.line_no}: Empty response from prompt.")
+            return True
+        try:
+            response_json = json.loads(response)
+        except Exception as je:
+            self.logger.error(
+                f"Error judging comment for line {comment.line_no}: Invalid JSON response: {repr(response)} | {str(je)}"
             )
+            return True
+        action = response_json.get("action")
+        if action not in ("KEEP", "DISCARD"):
+            # log an error but keep the comment to be safe
+            self.logger.error(
+                f"Error judging comment for line {comment.line_no}: Unknown action in response: {repr(response)}"
+            )
+            action = "KEEP"
+        with self._stage_lock:
+            self._generic_filter_debug[action].append({**comment.model_dump(), **response_json})
+        return action != "DISCARD"
 
-        # Process the results as they complete
-        for line_no, future in futures.items():
-            try:
-                response = future.result()
-                merge_results = json.loads(response)
-                result_comments = merge_results.get("comments", [])
-                if len(result_comments) != 1:
-                    self.logger.error(f"Error merging comments for line {line_no}: {merge_results}")
-                    continue
-                merged_comment = result_comments[0]
-                merged_comment_obj = Comment(**merged_comment)
-                unique_comments.append(merged_comment_obj)
-            except Exception as e:
-                self.logger.error(f"Error processing deduplication for line {line_no}: {str(e)}")
+    def _merge_comments(self, line_no: int, comments: List[Comment]) -> Optional[Comment]:
+        """
+        Merge the comments on a line into one with the LLM. Returns None if they could not be merged.
+        """
+        try:
+            response = self._run_prompt("api_review", "merge_comments.prompty", self._merge_inputs(comments))
+            return self._merged_comment(line_no, response)
+        except Exception as e:
+            self.logger.error(f"Error processing deduplication for line {line_no}: {str(e)}")
+            return None
 
-        # Update the comments list with the unique comments
-        self.results.comments = unique_comments
+    async def _amerge_comments(self, line_no: int, comments: List[Comment]) -> Optional[Comment]:
+        """
+        The asyncio counterpart of `_merge_comments`.
+        """
+        try:
+            inputs = await self._in_search_executor(self._merge_inputs, comments)
+            response = await self._arun_prompt("api_review", "merge_comments.prompty", inputs)
+            return self._merged_comment(line_no, response)
+        except Exception as e:
+            self.logger.error(f"Error processing deduplication for line {line_no}: {str(e)}")
+            return None
+
+    def _merge_inputs(self, comments: List[Comment]) -> dict:
+        # Collect all rule IDs for the batch
+        all_guideline_ids = set()
+        all_memory_ids = set()
+        for comment in comments:
+            all_guideline_ids.update(comment.guideline_ids)
+            all_memory_ids.update(comment.memory_ids)
+        # Prepare the context for the prompt
+        search_results = self._search_items.get(list(all_guideline_ids.union(all_memory_ids)))
+        return {"comments": comments, "context": self.search.build_context(search_results)}
+
+    def _merged_comment(self, line_no: int, response: str) -> Optional[Comment]:
+        merge_results = json.loads(response)
+        result_comments = merge_results.get("comments", [])
+        if len(result_comments) != 1:
+            self.logger.error(f"Error merging comments for line {line_no}: {merge_results}")
+            return None
+        return Comment(**result_comments[0])
 
-    def _filter_comments_with_metadata(self):
+    def _filter_comment_with_metadata(self, comment: Comment) -> bool:
         """
-        Run the filter prompt on the comments, processing each comment in parallel.
+        Run the filter prompt on a comment. Returns False if the comment should be discarded.
         """
-        # Submit each comment to the executor for parallel processing
-        futures = {}
-        for idx, comment in enumerate(self.results.comments):
-            futures[idx] = self.executor.submit(
-                self._run_prompt,
+        try:
+            response = self._run_prompt(
                 folder="api_review",
                 filename="filter_comment_with_metadata.prompty",
-                inputs={
-                    "content": comment.model_dump(),
-                    "language": get_language_pretty_name(self.language),
-                    "outline": self.outline,
-                    "exceptions": self._load_filter_metadata().get("exceptions", "None"),
-                },
+                inputs=self._metadata_filter_inputs(comment),
             )
+        except Exception as e:
+            self.logger.error(f"Error filtering comment for line {comment.line_no}: {str(e)}")
+            return True
+        return self._apply_metadata_filter(comment, response)
 
-        # Collect results as they complete, with % complete logging
-        keep_debug = []
-        discard_debug = []
-        comments_to_remove = []
-        total = len(futures)
-        for progress_idx, (idx, future) in enumerate(futures.items()):
-            orig_comment = self.results.comments[idx]
-            try:
-                response = future.result()
-                response_json = json.loads(response)
-                action = response_json.get("action")
-                if action == "KEEP":
-                    keep_debug.append({**orig_comment.model_dump(), **response_json})
-                elif action == "DISCARD":
-                    discard_debug.append({**orig_comment.model_dump(), **response_json})
-                    comments_to_remove.append(idx)
-                else:
-                    self.logger.warning(f"Unexpected action for line {orig_comment.line_no}: {repr(response)}")
-                    keep_debug.append({**orig_comment.model_dump(), **response_json})
-            except Exception as e:
-                self.logger.error(f"Error filtering comment at index {idx}: {str(e)}")
-            # Log % complete
-            percent = int(((progress_idx + 1) / total) * 100) if total else 100
-            self._print_message(f"Hard filtering comments... {percent}% complete", overwrite=True)
-        self._print_message()  # Ensure the progress bar is visible before the summary
-
-        # Summary message (final counts computed after removals)
-        removed_count = len(set(comments_to_remove))
-        initial_count = len(self.results.comments)
-        final_count = initial_count - removed_count
-        self._print_message(f"Hard filtering completed. Kept {final_count}. Discarded {removed_count}.")
-
-        # Debug log: dump keep_comments and discard_comments to files if enabled
-        if self.write_debug_logs:
-            os.makedirs(self.output_dir, exist_ok=True)
-            keep_path = os.path.join(self.output_dir, "filter_comments_with_metadata_KEEP.json")
-            discard_path = os.path.join(self.output_dir, "filter_comments_with_metadata_DISCARD.json")
-            with open(keep_path, "w", encoding="utf-8") as f:
-                json.dump(keep_debug, f, indent=2)
-            with open(discard_path, "w", encoding="utf-8") as f:
-                json.dump(discard_debug, f, indent=2)
-            self.logger.debug(f"Kept comments written to {keep_path}")
-            self.logger.debug(f"Discarded comments written to {discard_path}")
-
-        # Remove comments that were marked for removal, preserving order of remaining comments
-        if comments_to_remove:
-            to_remove = set(comments_to_remove)
-            self.results.comments = [comment for i, comment in enumerate(self.results.comments) if i not in to_remove]
-
-    def _filter_preexisting_comments(self):
-        """
-        Check if there are any preexisting comments on the same line as new proposed comments. If so,
-        resolve them with the LLM to either discard or update the proposed comment.
-        """
-        comments_to_remove = []
-        # Prepare tasks for comments that have preexisting comments
-        tasks = []
-        indices = []
-        for idx, comment in enumerate(self.results.comments):
-            existing_comments = [e for e in self.existing_comments if e.line_no == comment.line_no]
-            if not existing_comments:
-                continue
-            inputs = {
-                "comment": comment.model_dump(),
-                "existing": [e.model_dump() for e in existing_comments],
-                "language": get_language_pretty_name(self.language),
-            }
-            tasks.append((idx, comment, "api_review", "filter_existing_comment.prompty", inputs))
-            indices.append(idx)
+    async def _afilter_comment_with_metadata(self, comment: Comment) -> bool:
+        """
+        The asyncio counterpart of `_filter_comment_with_metadata`.
+        """
+        try:
+            response = await self._arun_prompt(
+                folder="api_review",
+                filename="filter_comment_with_metadata.prompty",
+                inputs=self._metadata_filter_inputs(comment),
+            )
+        except Exception as e:
+            self.logger.error(f"Error filtering comment for line {comment.line_no}: {str(e)}")
+            return True
+        return self._apply_metadata_filter(comment, response)
+
+    def _metadata_filter_inputs(self, comment: Comment) -> dict:
+        return {
+            "content": comment.model_dump(),
+            "language": get_language_pretty_name(self.language),
+            "outline": self.outline,
+            "exceptions": self._filter_metadata.get("exceptions", "None"),
+        }
 
-        total = len(tasks)
-        futures = {}
-        for i, (idx, comment, folder, filename, inputs) in enumerate(tasks):
-            futures[idx] = self.executor.submit(self._run_prompt, folder, filename, inputs)
+    def _apply_metadata_filter(self, comment: Comment, response: str) -> bool:
+        try:
+            response_json = json.loads(response)
+        except Exception as e:
+            self.logger.error(f"Error filtering comment for line {comment.line_no}: {str(e)}")
+            return True
+        action = response_json.get("action")
+        if action not in ("KEEP", "DISCARD"):
+            self.logger.warning(f"Unexpected action for line {comment.line_no}: {repr(response)}")
+            action = "KEEP"
+        with self._stage_lock:
+            self._filter_debug[action].append({**comment.model_dump(), **response_json})
+        return action != "DISCARD"
+
+    def _filter_preexisting_comment(self, comment: Comment) -> bool:
+        """
+        If there are preexisting comments on the same line as a proposed comment, resolve them with the
+        LLM to either discard or update the proposed comment. Returns False if it should be discarded.
+        """
+        inputs = self._preexisting_filter_inputs(comment)
+        if inputs is None:
+            return True
+        try:
+            response = self._run_prompt("api_review", "filter_existing_comment.prompty", inputs)
+        except Exception as e:
+            self._log_preexisting_filter_error(comment, e)
+            return True
+        return self._apply_preexisting_filter(comment, response)
 
-        for i, (idx, comment, folder, filename, inputs) in enumerate(tasks):
-            try:
-                response = futures[idx].result()
-                response_json = json.loads(response)
-                action = response_json.get("action")
-                refined_comment = response_json.get("comment")
-                if action == "KEEP":
-                    comment.comment = refined_comment
-                elif action == "DISCARD":
-                    comments_to_remove.append(idx)
-                else:
-                    self.logger.warning(f"Unexpected action for line {comment.line_no}: {repr(response)}")
-                    comment.comment = refined_comment
-            except Exception as e:
-                self.logger.error(f"Error filtering preexisting comments for line {comment.line_no}: {str(e)}")
-                self.logger.warning(f"Keeping comment despite filtering error: {comment.comment}")
-            percent = int(((i + 1) / total) * 100) if total else 100
-            self._print_message(f"Filtering preexisting comments... {percent}% complete", overwrite=True)
-        self._print_message()  # Ensure the progress bar is visible before the summary
-
-        # remove comments that were marked for removal
-        if not comments_to_remove:
-            return
-        initial_comment_count = len(self.results.comments)
-        self.results.comments = [
-            comment for idx, comment in enumerate(self.results.comments) if idx not in comments_to_remove
-        ]
-        final_comment_count = len(self.results.comments)
-        self._print_message(
-            # pylint: disable=line-too-long
-            f"\nFiltered preexisting comments. Kept: {final_comment_count}. Discarded: {initial_comment_count - final_comment_count}."
-        )
+    async def _afilter_preexisting_comment(self, comment: Comment) -> bool:
+        """
+        The asyncio counterpart of `_filter_preexisting_comment`.
+        """
+        inputs = self._preexisting_filter_inputs(comment)
+        if inputs is None:
+            return True
+        try:
+            response = await self._arun_prompt("api_review", "filter_existing_comment.prompty", inputs)
+        except Exception as e:
+            self._log_preexisting_filter_error(comment, e)
+            return True
+        return self._apply_preexisting_filter(comment, response)
 
-    def _score_comments_with_judge_prompt(self):
-        """
-        Score all comments using the judge prompt, processing each comment in parallel.
-        """
-        self._print_message("\nScoring comments...")
-
-        # Submit each comment to the executor for parallel processing
-        futures = {}
-        for idx, comment in enumerate(self.results.comments):
-            context_ids = comment.guideline_ids + comment.memory_ids
-            search_results = self.search.search_all_by_id(context_ids)
-            context = self.search.build_context(search_results)
-            futures[idx] = self.executor.submit(
-                self._run_prompt,
-                "api_review",
-                "judge_comment_confidence.prompty",
-                inputs={
-                    "content": comment.model_dump(),
-                    "language": get_language_pretty_name(self.language),
-                    "context": context.to_markdown() if search_results else "NONE",
-                },
-            )
+    def _preexisting_filter_inputs(self, comment: Comment) -> Optional[dict]:
+        existing_comments = [e for e in self.existing_comments if e.line_no == comment.line_no]
+        if not existing_comments:
+            return None
+        return {
+            "comment": comment.model_dump(),
+            "existing": [e.model_dump() for e in existing_comments],
+            "language": get_language_pretty_name(self.language),
+        }
 
-        # Collect results as they complete, with % complete logging
-        total = len(futures)
+    def _apply_preexisting_filter(self, comment: Comment, response: str) -> bool:
+        try:
+            response_json = json.loads(response)
+            action = response_json.get("action")
+            refined_comment = response_json.get("comment")
+            if action == "DISCARD":
+                return False
+            if action != "KEEP":
+                self.logger.warning(f"Unexpected action for line {comment.line_no}: {repr(response)}")
+            comment.comment = refined_comment
+        except Exception as e:
+            self._log_preexisting_filter_error(comment, e)
+        return True
 
-        # Collect raw judge results for optional debug output
-        judge_results = []
+    def _log_preexisting_filter_error(self, comment: Comment, e: Exception):
+        self.logger.error(f"Error filtering preexisting comments for line {comment.line_no}: {str(e)}")
+        self.logger.warning(f"Keeping comment despite filtering error: {comment.comment}")
 
-        for progress_idx, (idx, future) in enumerate(futures.items()):
-            try:
-                # Capture original comment snapshot before we modify severity/confidence
-                orig_comment = self.results.comments[idx].model_dump()
-                response = future.result()
-                response_json = json.loads(response)
-                results = response_json.get("results", {})
-                severity = response_json.get("severity", "UNKNOWN").upper()
-
-                yes_votes = 0
-                no_votes = 0
-                unknown_votes = 0
-
-                for result in results:
-                    answer = result.get("answer", "").upper()
-                    if answer == "YES":
-                        yes_votes += 1
-                    elif answer == "NO":
-                        no_votes += 1
-                    elif answer == "UNKNOWN":
-                        unknown_votes += 1
-                    else:
-                        self.logger.warning(f"Unexpected answer {answer} for comment at index {idx}")
-                total_votes = yes_votes + no_votes + unknown_votes
-                confidence = (yes_votes / total_votes) if total_votes > 0 else 0.0
-                self.results.comments[idx].severity = severity
-                self.results.comments[idx].confidence_score = confidence
-
-                # Record the judge result for debug output
-                judge_results.append(
-                    {
-                        "index": idx,
-                        "original_comment": orig_comment,
-                        "results": results,
-                        "computed_severity": severity,
-                        "computed_confidence": confidence,
-                    }
-                )
-            except Exception as e:
-                self.logger.error(f"Error scoring comment at index {idx}: {str(e)}")
-            percent = int(((progress_idx + 1) / total) * 100) if total else 100
-            self._print_message(f"Scoring comments... {percent}% complete", overwrite=True)
+    def _score_comment(self, comment: Comment) -> Optional[dict]:
+        """
+        Score a comment with the judge prompt, setting its severity and confidence score.
+        Returns the judge result for debug output, or None if the comment could not be scored.
+        """
+        try:
+            inputs = self._judge_inputs(comment)
+            response = self._run_prompt("api_review", "judge_comment_confidence.prompty", inputs=inputs)
+            return self._apply_judge_response(comment, inputs["content"], response)
+        except Exception as e:
+            self.logger.error(f"Error scoring comment on line {comment.line_no}: {str(e)}")
+            return None
 
-        # If debug logging is enabled, write individual and aggregated judge results
-        if self.write_debug_logs and self.output_dir:
-            try:
-                judge_dir = os.path.join(self.output_dir, "judge_comments")
-                os.makedirs(judge_dir, exist_ok=True)
-                # Write aggregated file
-                aggregated_path = os.path.join(judge_dir, "judge_comments_all.json")
-                with open(aggregated_path, "w", encoding="utf-8") as af:
-                    json.dump(judge_results, af, indent=2)
-                self.logger.debug(f"Aggregated judge results written to {aggregated_path}")
-
-                # Write one file per comment for easier inspection
-                for jr in judge_results:
-                    idx = jr.get("index")
-                    per_path = os.path.join(judge_dir, f"judge_comment_{idx}.json")
-                    with open(per_path, "w", encoding="utf-8") as pf:
-                        json.dump(jr, pf, indent=2)
-            except Exception as e:
-                self.logger.error(f"Failed to write judge debug logs: {str(e)}")
+    async def _ascore_comment(self, comment: Comment) -> Optional[dict]:
+        """
+        The asyncio counterpart of `_score_comment`.
+        """
+        try:
+            inputs = await self._in_search_executor(self._judge_inputs, comment)
+            response = await self._arun_prompt("api_review", "judge_comment_confidence.prompty", inputs=inputs)
+            return self._apply_judge_response(comment, inputs["content"], response)
+        except Exception as e:
+            self.logger.error(f"Error scoring comment on line {comment.line_no}: {str(e)}")
+            return None
+
+    def _judge_inputs(self, comment: Comment) -> dict:
+        context_ids = comment.guideline_ids + comment.memory_ids
+        search_results = self._search_items.get(context_ids)
+        context = self.search.build_context(search_results)
+        return {
+            # a snapshot of the original comment, taken before severity/confidence are set
+            "content": comment.model_dump(),
+            "language": get_language_pretty_name(self.language),
+            "context": context.to_markdown() if search_results else "NONE",
+        }
+
+    def _apply_judge_response(self, comment: Comment, orig_comment: dict, response: str) -> dict:
+        response_json = json.loads(response)
+        results = response_json.get("results", {})
+        severity = response_json.get("severity", "UNKNOWN").upper()
+
+        yes_votes = 0
+        no_votes = 0
+        unknown_votes = 0
+
+        for result in results:
+            answer = result.get("answer", "").upper()
+            if answer == "YES":
+                yes_votes += 1
+            elif answer == "NO":
+                no_votes += 1
+            elif answer == "UNKNOWN":
+                unknown_votes += 1
+            else:
+                self.logger.warning(f"Unexpected answer {answer} for comment on line {comment.line_no}")
+        total_votes = yes_votes + no_votes + unknown_votes
+        confidence = (yes_votes / total_votes) if total_votes > 0 else 0.0
+        comment.severity = severity
+        comment.confidence_score = confidence
+        return {
+            "original_comment": orig_comment,
+            "results": results,
+            "computed_severity": severity,
+            "computed_confidence": confidence,
+        }
+
+    def _write_pipeline_debug_logs(self):
+        """
+        Write the filter decisions and judge results of the pipeline to the output directory, if enabled.
+        """
+        if not (self.write_debug_logs and self.output_dir):
+            return
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            debug_files = {"filter_comments_with_metadata": self._filter_debug}
+            if any(self._generic_filter_debug.values()):
+                debug_files["filter_generic_comments"] = self._generic_filter_debug
+            for name, records in debug_files.items():
+                for action, items in records.items():
+                    path = os.path.join(self.output_dir, f"{name}_{action}.json")
+                    with open(path, "w", encoding="utf-8") as f:
+                        json.dump(sorted(items, key=lambda x: x["line_no"]), f, indent=2)
+                    self.logger.debug(f"{action.capitalize()} comments written to {path}")
+
+            judge_dir = os.path.join(self.output_dir, "judge_comments")
+            os.makedirs(judge_dir, exist_ok=True)
+            # Write aggregated file
+            aggregated_path = os.path.join(judge_dir, "judge_comments_all.json")
+            with open(aggregated_path, "w", encoding="utf-8") as af:
+                json.dump(self._judge_results, af, indent=2)
+            self.logger.debug(f"Aggregated judge results written to {aggregated_path}")
+
+            # Write one file per comment for easier inspection
+            for jr in self._judge_results:
+                per_path = os.path.join(judge_dir, f"judge_comment_{jr['index']}.json")
+                with open(per_path, "w", encoding="utf-8") as pf:
+                    json.dump(jr, pf, indent=2)
+        except Exception as e:
+            self.logger.error(f"Failed to write debug logs: {str(e)}")
 
     def _run_prompt(self, folder: str, filename: str, inputs: dict, max_retries: int = 5) -> str:
         """
@@ -875,71 +1004,29 @@ class ApiViewReview:
             logger=self.logger,
         )
 
-    # pylint: disable=too-many-locals
+    async def _arun_prompt(self, folder: str, filename: str, inputs: dict, max_retries: int = 5) -> str:
+        """
+        Run a prompt with retry logic on the event loop.
+        """
+        return await self.arun_prompt(
+            folder=folder,
+            filename=filename,
+            inputs=inputs,
+            settings=self.settings,
+            max_retries=max_retries,
+            logger=self.logger,
+        )
+
     def run(self) -> ReviewResult:
         """Execute the APIView review process."""
         overall_start_time = time()
         review_status = "error"
         try:
-            self._print_message(f"Generating {get_language_pretty_name(self.language)} review {self.job_id}")
-            self.logger.info(f"Generating review {self.job_id} for language={self.language}")
-
-            # Canary check: try authenticating against Search and CosmosDB before LLM calls
-            canary_error = self._canary_check_search_and_cosmos()
-            if canary_error:
-                self._print_message(f"ERROR: {canary_error}")
-                self.logger.error(f"Aborting review due to canary check failure: {canary_error}")
-                raise RuntimeError(f"Aborting review: {canary_error}")
+            self._start_run()
 
             start_time = time()
-            self._generate_comments()
-            end_time = time()
-            self._print_message(
-                f"\nGenerated {len(self.results.comments)} comments in {end_time - start_time:.2f} seconds."
-            )
-            self._print_comment_counts()
-
-            # Run generic comments through a filter (skip if none exist)
-            if any(c.is_generic for c in self.results.comments):
-                start_time = time()
-                self._filter_generic_comments()
-                end_time = time()
-                self._print_message(f"  Generic comments filtered in {end_time - start_time:.2f} seconds.")
-                self._print_comment_counts()
-
-            # Track time for _deduplicate_comments
-            deduplicate_start_time = time()
-            initial_comment_count = len(self.results.comments)
-            self._deduplicate_comments()
-            merged_comment_count = len(self.results.comments)
-            deduplicate_end_time = time()
-            self._print_message(
-                f"  Deduplication completed in {deduplicate_end_time - deduplicate_start_time:.2f} seconds. Collapsed {initial_comment_count - merged_comment_count} comments."
-            )
-            self._print_comment_counts()
-
-            # Track time for _filter_comments
-            filter_start_time = time()
-            self._filter_comments_with_metadata()
-            filter_end_time = time()
-            self._print_message(f"  Hard filtering completed in {filter_end_time - filter_start_time:.2f} seconds.")
-            self._print_comment_counts()
-
-            # Track time for _filter_preexisting_comments
-            preexisting_start_time = time()
-            self._filter_preexisting_comments()
-            preexisting_end_time = time()
-            self._print_message(
-                f"Preexisting comments filtered in {preexisting_end_time - preexisting_start_time:.2f} seconds."
-            )
-            self._print_comment_counts()
-
-            score_comments_start_time = time()
-            self._score_comments_with_judge_prompt()
-            score_comments_end_time = time()
-            self._print_message(
-                f"  Comment scoring completed in {score_comments_end_time - score_comments_start_time:.2f} seconds."
-            )
+            self._review_sections()
+            self._print_stage_counts(time() - start_time)
 
             results = self.results.sorted()
 
@@ -956,38 +1043,128 @@ class ApiViewReview:
                 f"\nCorrelation IDs assigned in {correlation_id_end_time - correlation_id_start_time:.2f} seconds."
             )
 
-            overall_end_time = time()
-            total_duration = overall_end_time - overall_start_time
-            self._print_message(
-                # pylint: disable=line-too-long
-                f"\nReview {self.job_id} generated in {total_duration:.2f} seconds. Found {len(results.comments)} comments"
-            )
+            self._finish_run(results, overall_start_time)
+            review_status = "success"
+            return results
+        finally:
+            self._record_review_metrics(overall_start_time, review_status)
+
+    async def arun(self) -> ReviewResult:
+        """
+        Execute the APIView review process on the running event loop.
+
+        Prompts are awaited rather than run on worker threads, so many reviews can share one event loop.
+        Across all of them, at most APIVIEW_MAX_CONCURRENT_PROMPTS prompts (default: 32) are in flight at once.
+        """
+        overall_start_time = time()
+        review_status = "error"
+        try:
+            await self._in_search_executor(self._start_run)
 
-            if self.semantic_search_failed:
-                self._print_message("WARN: Semantic search failed for some chunks (see error.log).")
+            start_time = time()
+            await self._areview_sections()
+            self._print_stage_counts(time() - start_time)
 
-            # Write output JSON if enabled
-            if self.write_output:
-                os.makedirs(self.output_dir, exist_ok=True)
-                output_path = os.path.join(self.output_dir, "output.json")
-                with open(output_path, "w", encoding="utf-8") as f:
-                    json.dump(results.model_dump(), f, indent=2)
-                self._print_message(f"Review results written to {output_path}")
+            results = self.results.sorted()
 
+            correlation_id_start_time = time()
+            results.comments = await CommentGrouper(
+                comments=results.comments,
+                arun_prompt_func=self.arun_prompt,
+                settings=self.settings,
+                logger=self.logger,
+            ).agroup()
+            correlation_id_end_time = time()
+            self._print_message(
+                f"\nCorrelation IDs assigned in {correlation_id_end_time - correlation_id_start_time:.2f} seconds."
+            )
+
+            self._finish_run(results, overall_start_time)
             review_status = "success"
             return results
         finally:
-            # Record review duration telemetry regardless of success or failure
-            total_duration = time() - overall_start_time
-            normalized_duration = total_duration / self._chunk_count if self._chunk_count > 0 else 0
-            metric_attrs = {
-                "review.language": self.language,
-                "review.mode": self.mode,
-                "review.status": review_status,
-            }
-            _review_duration_histogram.record(total_duration, attributes=metric_attrs)
-            _review_normalized_duration_histogram.record(normalized_duration, attributes=metric_attrs)
-            _review_request_counter.add(1, attributes=metric_attrs)
+            self._record_review_metrics(overall_start_time, review_status)
+
+    def _start_run(self):
+        """
+        Announce the review and check that Search and CosmosDB are reachable before any LLM calls.
+        """
+        self._print_message(f"Generating {get_language_pretty_name(self.language)} review {self.job_id}")
+        self.logger.info(f"Generating review {self.job_id} for language={self.language}")
+
+        # Canary check: try authenticating against Search and CosmosDB before LLM calls
+        canary_error = self._canary_check_search_and_cosmos()
+        if canary_error:
+            self._print_message(f"ERROR: {canary_error}")
+            self.logger.error(f"Aborting review due to canary check failure: {canary_error}")
+            raise RuntimeError(f"Aborting review: {canary_error}")
+
+    def _print_stage_counts(self, duration: float):
+        """
+        Print how many comments each stage of the pipeline generated or discarded.
+        """
+        counts = self._stage_counts
+        self._print_message(
+            # pylint: disable=line-too-long
+            f"\nReviewed {self._chunk_count} sections in {duration:.2f} seconds. Generated {counts['generated']} comments."
+        )
+        if counts["generic_discarded"]:
+            self._print_message(f"  Generic filtering discarded {counts['generic_discarded']} comments.")
+        self._print_message(
+            # pylint: disable=line-too-long
+            f"  Deduplication collapsed {counts['generated'] - counts['generic_discarded'] - counts['merged']} comments."
+        )
+        self._print_message(f"  Hard filtering discarded {counts['hard_filter_discarded']} comments.")
+        self._print_message(f"  Preexisting comment filtering discarded {counts['preexisting_discarded']} comments.")
+        self._print_comment_counts()
+
+    def _finish_run(self, results: ReviewResult, overall_start_time: float):
+        """
+        Print the review summary and write the output JSON if enabled.
+        """
+        overall_end_time = time()
+        total_duration = overall_end_time - overall_start_time
+        self._print_message(
+            # pylint: disable=line-too-long
+            f"\nReview {self.job_id} generated in {total_duration:.2f} seconds. Found {len(results.comments)} comments"
+        )
+
+        if self.semantic_search_failed:
+            self._print_message("WARN: Semantic search failed for some chunks (see error.log).")
+
+        client_stats = get_inference_client_stats()
+        # the counts are for the process, which may have run other reviews too
+        self._print_message(f"Inference clients: {client_stats['created']} created, {client_stats['reused']} reused.")
+        limiter = get_prompt_limiter()
+        self._print_message(f"Prompt limiter: {limiter.limit} concurrent prompts, {limiter.throttled} throttled.")
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            self._print_message(
+                f"Prompt cache: {response_cache.hits} hits, {response_cache.misses} misses ({response_cache.path})."
+            )
+
+        # Write output JSON if enabled
+        if self.write_output:
+            os.makedirs(self.output_dir, exist_ok=True)
+            output_path = os.path.join(self.output_dir, "output.json")
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(results.model_dump(), f, indent=2)
+            self._print_message(f"Review results written to {output_path}")
+
+    def _record_review_metrics(self, overall_start_time: float, review_status: str):
+        """
+        Record review duration telemetry regardless of success or failure.
+        """
+        total_duration = time() - overall_start_time
+        normalized_duration = total_duration / self._chunk_count if self._chunk_count > 0 else 0
+        metric_attrs = {
+            "review.language": self.language,
+            "review.mode": self.mode,
+            "review.status": review_status,
+        }
+        _review_duration_histogram.record(total_duration, attributes=metric_attrs)
+        _review_normalized_duration_histogram.record(normalized_duration, attributes=metric_attrs)
+        _review_request_counter.add(1, attributes=metric_attrs)
 
     def _canary_check_search_and_cosmos(self) -> str | None:
         """
@@ -1082,3 +1259,5 @@ class ApiViewReview:
         """Close resources used by this ApiViewReview instance."""
         if hasattr(self, "executor"):
             self.executor.shutdown(wait=True)
+        if hasattr(self, "search_executor"):
+            self.search_executor.shutdown(wait=True)
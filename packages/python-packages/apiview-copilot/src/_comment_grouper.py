@@ -8,7 +8,7 @@ import json
 from typing import Callable
 from uuid import uuid4
 
-from src._prompt_runner import run_prompt
+from src._prompt_runner import arun_prompt, run_prompt
 
 
 class CommentGrouper:
@@ -18,10 +18,17 @@ class CommentGrouper:
     """
 
     def __init__(
-        self, *, comments: list["Comment"] = None, run_prompt_func: Callable = run_prompt, settings=None, logger=None
+        self,
+        *,
+        comments: list["Comment"] = None,
+        run_prompt_func: Callable = run_prompt,
+        arun_prompt_func: Callable = arun_prompt,
+        settings=None,
+        logger=None,
     ):
         self.comments = comments or []
         self.run_prompt = run_prompt_func
+        self.arun_prompt = arun_prompt_func
         self.settings = settings
         self.logger = logger
 
@@ -29,6 +36,27 @@ class CommentGrouper:
         """
         Algorithm to group comments together.
         """
+        generic_only = self._group_by_signature()
+        if len(generic_only) > 1:
+            response = self.run_prompt(**self._generic_prompt_kwargs(generic_only))
+            self._group_generic(generic_only, response)
+        return self.comments
+
+    async def agroup(self) -> list["Comment"]:
+        """
+        The asyncio counterpart of `group`, which runs its prompt with `arun_prompt_func`.
+        """
+        generic_only = self._group_by_signature()
+        if len(generic_only) > 1:
+            response = await self.arun_prompt(**self._generic_prompt_kwargs(generic_only))
+            self._group_generic(generic_only, response)
+        return self.comments
+
+    def _group_by_signature(self) -> list[int]:
+        """
+        Group the comments which cite the same guidelines and memories. Returns the indices of the
+        generic comments, which cite neither.
+        """
         signature_map = {}
         generic_only = []
         # any comments which relate to the same guidelines and memories are considered similar
@@ -53,24 +81,27 @@ class CommentGrouper:
                 correlation_id = str(uuid4())
                 for idx in indices:
                     self.comments[idx].correlation_id = correlation_id
+        return generic_only
 
-        if len(generic_only) > 1:
-            prompty_file = "generate_correlation_ids.prompty"
-            response = self.run_prompt(
-                folder="api_review",
-                filename=prompty_file,
-                inputs={"content": {i: self.comments[i] for i in generic_only}},
-                settings=self.settings,
-                logger=self.logger,
-            )
-            results = json.loads(response).get("results", [])
-            for result in results:
-                indices = result.get("result", [])
-                if len(indices) > 1:
-                    correlation_id = str(uuid4())
-                    for idx in indices:
-                        if idx not in generic_only:
-                            raise ValueError(f"Index {idx} is not a generic comment index.")
-                        self.comments[idx].correlation_id = correlation_id
+    def _generic_prompt_kwargs(self, generic_only: list[int]) -> dict:
+        return {
+            "folder": "api_review",
+            "filename": "generate_correlation_ids.prompty",
+            "inputs": {"content": {i: self.comments[i] for i in generic_only}},
+            "settings": self.settings,
+            "logger": self.logger,
+        }
 
-        return self.comments
+    def _group_generic(self, generic_only: list[int], response: str):
+        """
+        Apply the groups of similar generic comments chosen by the LLM.
+        """
+        results = json.loads(response).get("results", [])
+        for result in results:
+            indices = result.get("result", [])
+            if len(indices) > 1:
+                correlation_id = str(uuid4())
+                for idx in indices:
+                    if idx not in generic_only:
+                        raise ValueError(f"Index {idx} is not a generic comment index.")
+                    self.comments[idx].correlation_id = correlation_id
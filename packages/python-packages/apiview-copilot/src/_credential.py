@@ -6,6 +6,7 @@
 
 """Module for retrieving Azure credentials."""
 
+import asyncio
 import logging
 import os
 import threading
@@ -64,6 +65,35 @@ def get_credential():
         return _credential_cache["instance"]
 
 
+class _AsyncCredential:
+    """Async wrapper that fetches tokens from a sync credential on a worker thread."""
+
+    def __init__(self, credential):
+        self._credential = credential
+
+    async def get_token(self, *scopes, **kwargs):
+        """Get a token from the wrapped credential without blocking the event loop."""
+        return await asyncio.to_thread(self._credential.get_token, *scopes, **kwargs)
+
+    async def close(self):
+        """The wrapped credential is shared, so it is left open."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+def get_async_credential():
+    """Get an async credential for async clients.
+
+    It wraps the shared credential from ``get_credential()``, so async and sync
+    clients share one token cache and it can be used from any event loop.
+    """
+    return _AsyncCredential(get_credential())
+
+
 def warm_up_credential():
     """Pre-acquire a token so it is cached before parallel workers start.
 
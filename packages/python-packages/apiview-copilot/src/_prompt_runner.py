@@ -9,17 +9,43 @@ Module for parsing and executing .prompty prompt template files using Azure AI F
 
 This module provides direct Azure AI inference calls using .prompty files
 as a human-readable prompt template format, along with retry-based prompt
-execution helpers.
+execution helpers. `run_prompt` blocks the calling thread; `arun_prompt` is
+its asyncio counterpart.
 """
 
+import asyncio
+import hashlib
 import json
 import os
 import re
+import threading
+import weakref
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import yaml
+from opentelemetry import metrics
+
+_meter = metrics.get_meter(__name__)
+_inference_client_counter = _meter.create_counter(
+    name="apiview.prompt.inference_clients",
+    description="Number of inference client requests, by whether a pooled client was reused or a new one created",
+    unit="{client}",
+)
+
+# Max connections kept alive per inference client; a review runs up to ~32 prompts at once
+_CONNECTION_POOL_SIZE = 64
+
+_prompty_cache: Dict[str, Tuple[int, int, "PromptyConfig"]] = {}
+_prompty_cache_lock = threading.Lock()
+_client_pool: Dict[tuple, Any] = {}
+_client_pool_lock = threading.Lock()
+_client_pool_stats = {"created": 0, "reused": 0}
+# async clients belong to the event loop they were created on
+_async_client_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 @dataclass
@@ -37,6 +63,7 @@ class PromptyConfig:
     system_template: str = ""
     user_template: str = ""
     response_format: Optional[dict] = None
+    source_hash: str = ""
 
 
 def _resolve_env_vars(value: str) -> str:
@@ -102,6 +129,7 @@ def _parse_prompty(file_path: str | Path) -> PromptyConfig:
     front_matter = yaml.safe_load(yaml_content) or {}
 
     config = PromptyConfig()
+    config.source_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
     config.name = front_matter.get("name", "")
     config.description = front_matter.get("description", "")
 
@@ -142,33 +170,168 @@ def _parse_prompty(file_path: str | Path) -> PromptyConfig:
     return config
 
 
-def _execute_prompt_template(
-    file_path: str | Path,
-    inputs: dict = None,
-    configuration: dict = None,
-) -> Any:
-    """Execute a .prompty template file using Azure AI Foundry.
+def _load_prompty(file_path: str | Path) -> PromptyConfig:
+    """Parse a .prompty file, reusing the parsed result until the file's modification time or size changes.
 
-    Args:
-        file_path: Path to the .prompty file.
-        inputs: Dictionary of input variables for template rendering.
-        configuration: Optional configuration dict. If it contains an
-            ``api_key`` entry, an ``AzureKeyCredential`` is used; otherwise,
-            the shared credential from ``get_credential()`` is used.
+    The returned config is shared and must not be modified.
+    """
+    file_path = Path(file_path)
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return _parse_prompty(file_path)
+    cache_key = str(file_path.resolve())
+    with _prompty_cache_lock:
+        cached = _prompty_cache.get(cache_key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    config = _parse_prompty(file_path)
+    with _prompty_cache_lock:
+        _prompty_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, config)
+    return config
 
-    Returns:
-        The string response content from the model.
 
-    Raises:
-        ValueError: If FOUNDRY_ENDPOINT is not configured.
+def _client_pool_key(endpoint: str, api_key: Optional[str], credential: Any) -> tuple:
+    if api_key:
+        return (endpoint, "api_key", hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+    return (endpoint, "credential", id(credential))
+
+
+def _get_inference_client(endpoint: str, *, api_key: Optional[str] = None) -> Any:
+    """Return a ChatCompletionsClient for the endpoint and credential, reusing one from the process-wide pool.
+
+    Reusing clients keeps their HTTP connections alive and their tokens cached between prompts.
     """
     from azure.ai.inference import ChatCompletionsClient
-    from azure.ai.inference.models import SystemMessage, UserMessage
     from azure.core.credentials import AzureKeyCredential
+    from azure.core.pipeline.transport import RequestsTransport  # pylint: disable=no-name-in-module
+    from requests import Session
+    from requests.adapters import HTTPAdapter
     from src._credential import get_credential
-    from src._settings import SettingsManager
 
-    config = _parse_prompty(file_path)
+    credential = None if api_key else get_credential()
+    pool_key = _client_pool_key(endpoint, api_key, credential)
+    with _client_pool_lock:
+        client = _client_pool.get(pool_key)
+        created = client is None
+        if not created:
+            _client_pool_stats["reused"] += 1
+        else:
+            session = Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_CONNECTION_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            transport = RequestsTransport(session=session, session_owner=False)
+            # Authenticate — if an explicit API key is provided (e.g., in CI), use AzureKeyCredential;
+            # otherwise, fall back to the shared credential from get_credential().
+            if api_key:
+                client = ChatCompletionsClient(
+                    endpoint=endpoint, credential=AzureKeyCredential(api_key), transport=transport
+                )
+            else:
+                # Specify the cognitive services scope for Azure AI
+                client = ChatCompletionsClient(
+                    endpoint=endpoint,
+                    credential=credential,
+                    credential_scopes=["https://cognitiveservices.azure.com/.default"],
+                    transport=transport,
+                )
+            _client_pool[pool_key] = client
+            _client_pool_stats["created"] += 1
+    _inference_client_counter.add(1, attributes={"client.result": "created" if created else "reused"})
+    return client
+
+
+def _get_async_inference_client(endpoint: str, *, api_key: Optional[str] = None) -> Any:
+    """Return an async ChatCompletionsClient for the endpoint and credential, reusing one from the pool of the
+    running event loop.
+    """
+    from azure.ai.inference.aio import ChatCompletionsClient
+    from azure.core.credentials import AzureKeyCredential
+    from src._credential import get_async_credential, get_credential
+
+    loop = asyncio.get_running_loop()
+    pool_key = _client_pool_key(endpoint, api_key, None if api_key else get_credential())
+    with _client_pool_lock:
+        pool = _async_client_pools.setdefault(loop, {})
+        client = pool.get(pool_key)
+        created = client is None
+        if not created:
+            _client_pool_stats["reused"] += 1
+        else:
+            if api_key:
+                client = ChatCompletionsClient(endpoint=endpoint, credential=AzureKeyCredential(api_key))
+            else:
+                client = ChatCompletionsClient(
+                    endpoint=endpoint,
+                    credential=get_async_credential(),
+                    credential_scopes=["https://cognitiveservices.azure.com/.default"],
+                )
+            pool[pool_key] = client
+            _client_pool_stats["created"] += 1
+    _inference_client_counter.add(1, attributes={"client.result": "created" if created else "reused"})
+    return client
+
+
+def clear_inference_clients():
+    """Close and forget the pooled inference clients and reset their counters.
+
+    Async clients are forgotten without being closed; use `aclose_inference_clients` to close them.
+    """
+    with _client_pool_lock:
+        clients = list(_client_pool.values())
+        _client_pool.clear()
+        _async_client_pools.clear()
+        _client_pool_stats.update(created=0, reused=0)
+    for client in clients:
+        try:
+            client.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+async def aclose_inference_clients():
+    """Close and forget the pooled async inference clients of the running event loop."""
+    with _client_pool_lock:
+        pool = _async_client_pools.pop(asyncio.get_running_loop(), {})
+    for client in pool.values():
+        try:
+            await client.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+def get_inference_client_stats() -> Dict[str, int]:
+    """Return how many inference clients this process has created and how many times one was reused."""
+    with _client_pool_lock:
+        return dict(_client_pool_stats)
+
+
+@dataclass
+class _PreparedCompletion:
+    """A rendered .prompty request.
+
+    ``params`` are the keyword arguments for ``ChatCompletionsClient.complete``. ``cache_key`` is None
+    if the response cache is not enabled.
+    """
+
+    config: PromptyConfig
+    endpoint: str
+    params: dict
+    cache_key: Optional[str]
+
+
+def _prepare_completion(file_path: str | Path, inputs: dict = None) -> _PreparedCompletion:
+    """Render a .prompty template into completion parameters.
+
+    Raises:
+        ValueError: If FOUNDRY_ENDPOINT is not configured.
+    """
+    from azure.ai.inference.models import SystemMessage, UserMessage
+    from src._response_cache import get_response_cache, response_cache_key
+
+    config = _load_prompty(file_path)
+    endpoint = _inference_endpoint()
     inputs = inputs or {}
 
     # Merge sample inputs with provided inputs (provided inputs take precedence)
@@ -178,37 +341,6 @@ def _execute_prompt_template(
     system_content = _render_template(config.system_template, merged_inputs)
     user_content = _render_template(config.user_template, merged_inputs)
 
-    # Get settings
-    settings = SettingsManager()
-
-    # Use Azure AI Foundry endpoint for inference
-    foundry_endpoint = settings.get("FOUNDRY_ENDPOINT")
-
-    if not foundry_endpoint:
-        raise ValueError("FOUNDRY_ENDPOINT must be configured in AppConfiguration to execute prompty files.")
-
-    # Construct the inference endpoint (similar to how agents does it)
-    # Format: {FOUNDRY_ENDPOINT}/models
-    inference_endpoint = f"{foundry_endpoint.rstrip('/')}/models"
-
-    # Authenticate — if an explicit API key is provided (e.g., in CI), use AzureKeyCredential;
-    # otherwise, fall back to the shared credential from get_credential().
-    api_key = (configuration or {}).get("api_key")
-    if api_key:
-        credential = AzureKeyCredential(api_key)
-        client = ChatCompletionsClient(
-            endpoint=inference_endpoint,
-            credential=credential,
-        )
-    else:
-        credential = get_credential()
-        # Specify the cognitive services scope for Azure AI
-        client = ChatCompletionsClient(
-            endpoint=inference_endpoint,
-            credential=credential,
-            credential_scopes=["https://cognitiveservices.azure.com/.default"],
-        )
-
     # Build messages
     messages = []
     if system_content:
@@ -259,15 +391,137 @@ def _execute_prompt_template(
             user_content += schema_instruction or "\n\nYou must respond in JSON format."
             completion_params["messages"][-1] = UserMessage(content=user_content)
 
+    cache_key = None
+    if get_response_cache() is not None:
+        cache_messages = [("system", system_content)] if system_content else []
+        cache_messages.append(("user", user_content))
+        cache_key = response_cache_key(
+            prompty_hash=config.source_hash,
+            messages=cache_messages,
+            endpoint=endpoint,
+            model=config.azure_deployment,
+            parameters={k: v for k, v in completion_params.items() if k not in ("model", "messages")},
+        )
+    return _PreparedCompletion(config=config, endpoint=endpoint, params=completion_params, cache_key=cache_key)
+
+
+def _inference_endpoint() -> str:
+    """Return the Azure AI Foundry inference endpoint.
+
+    Raises:
+        ValueError: If FOUNDRY_ENDPOINT is not configured.
+    """
+    from src._settings import SettingsManager
+
+    # Get settings
+    settings = SettingsManager()
+
+    # Use Azure AI Foundry endpoint for inference
+    foundry_endpoint = settings.get("FOUNDRY_ENDPOINT")
+
+    if not foundry_endpoint:
+        raise ValueError("FOUNDRY_ENDPOINT must be configured in AppConfiguration to execute prompty files.")
+
+    # Construct the inference endpoint (similar to how agents does it)
+    # Format: {FOUNDRY_ENDPOINT}/models
+    return f"{foundry_endpoint.rstrip('/')}/models"
+
+
+def _prepare_and_look_up(file_path: str | Path, inputs: dict = None) -> Tuple[_PreparedCompletion, Optional[str]]:
+    """Render a .prompty template and return it with its cached response, if any."""
+    prepared = _prepare_completion(file_path, inputs)
+    return prepared, _cached_response(prepared.cache_key)
+
+
+def _cached_response(cache_key: Optional[str]) -> Optional[str]:
+    from src._response_cache import get_response_cache
+
+    return get_response_cache().get(cache_key) if cache_key is not None else None
+
+
+def _cache_response(config: PromptyConfig, cache_key: Optional[str], content: Optional[str]):
+    from src._response_cache import get_response_cache
+
+    if cache_key is not None and _is_cacheable(content, json_expected=bool(config.response_format)):
+        get_response_cache().put(cache_key, content)
+
+
+def _execute_prompt_template(
+    file_path: str | Path,
+    inputs: dict = None,
+    configuration: dict = None,
+    prepared: Optional[_PreparedCompletion] = None,
+) -> Any:
+    """Execute a .prompty template file using Azure AI Foundry.
+
+    Args:
+        file_path: Path to the .prompty file.
+        inputs: Dictionary of input variables for template rendering.
+        configuration: Optional configuration dict. If it contains an
+            ``api_key`` entry, an ``AzureKeyCredential`` is used; otherwise,
+            the shared credential from ``get_credential()`` is used.
+        prepared: The request from ``_prepare_completion``, if the caller has already rendered it and
+            looked it up in the response cache.
+
+    Returns:
+        The string response content from the model. If a response cache is enabled (see
+        ``src._response_cache``), an identical earlier request is answered from the cache.
+
+    Raises:
+        ValueError: If FOUNDRY_ENDPOINT is not configured.
+    """
+    if prepared is None:
+        prepared, cached_content = _prepare_and_look_up(file_path, inputs)
+        if cached_content is not None:
+            return cached_content
+
+    client = _get_inference_client(prepared.endpoint, api_key=(configuration or {}).get("api_key"))
+
     # Make the inference call
-    response = client.complete(**completion_params)
+    response = client.complete(**prepared.params)
 
     # Extract content from response
     result_content = response.choices[0].message.content
+    _cache_response(prepared.config, prepared.cache_key, result_content)
+    return result_content
+
+
+async def _aexecute_prompt_template(
+    file_path: str | Path,
+    inputs: dict = None,
+    configuration: dict = None,
+    prepared: Optional[_PreparedCompletion] = None,
+) -> Any:
+    """Execute a .prompty template file using the async Azure AI Foundry client.
+
+    Takes the same arguments and returns the same result as `_execute_prompt_template`. Reading the
+    template and the response cache runs on a worker thread.
+    """
+    if prepared is None:
+        prepared, cached_content = await asyncio.to_thread(_prepare_and_look_up, file_path, inputs)
+        if cached_content is not None:
+            return cached_content
 
+    client = _get_async_inference_client(prepared.endpoint, api_key=(configuration or {}).get("api_key"))
+    response = await client.complete(**prepared.params)
+    result_content = response.choices[0].message.content
+    if prepared.cache_key is not None:
+        await asyncio.to_thread(_cache_response, prepared.config, prepared.cache_key, result_content)
     return result_content
 
 
+def _is_cacheable(content: Optional[str], *, json_expected: bool) -> bool:
+    """Empty responses and malformed JSON are not cached, so that a later request asks the model again."""
+    if not isinstance(content, str) or not content.strip():
+        return False
+    if json_expected:
+        try:
+            json.loads(content)
+        except ValueError:
+            return False
+    return True
+
+
 def _run_prompt_template(*, folder: str, filename: str, inputs: dict = None, **kwargs) -> Any:
     """
     Run a prompt template file with the given inputs.
@@ -280,7 +534,39 @@ def _run_prompt_template(*, folder: str, filename: str, inputs: dict = None, **k
     from src._utils import get_prompt_path
 
     prompt_path = get_prompt_path(folder=folder, filename=filename)
-    return _execute_prompt_template(prompt_path, inputs=inputs, configuration=kwargs.get("configuration"))
+    return _execute_prompt_template(
+        prompt_path, inputs=inputs, configuration=kwargs.get("configuration"), prepared=kwargs.get("prepared")
+    )
+
+
+async def _arun_prompt_template(*, folder: str, filename: str, inputs: dict = None, **kwargs) -> Any:
+    """
+    Run a prompt template file with the given inputs, using the async client.
+
+    :param folder: Folder containing the prompt file.
+    :param filename: Name of the prompt file.
+    :param inputs: Dictionary of inputs for the prompt.
+    :param kwargs: Additional keyword arguments passed to the execute function.
+    """
+    from src._utils import get_prompt_path
+
+    prompt_path = get_prompt_path(folder=folder, filename=filename)
+    return await _aexecute_prompt_template(
+        prompt_path, inputs=inputs, configuration=kwargs.get("configuration"), prepared=kwargs.get("prepared")
+    )
+
+
+def _prepare_cached_prompt(folder: str, filename: str, inputs: dict) -> Tuple[Optional[_PreparedCompletion], Any]:
+    """
+    Render a prompt and look it up in the response cache. Returns the prepared request and the cached
+    response, if any; both are None if the response cache is not enabled.
+    """
+    from src._response_cache import get_response_cache
+    from src._utils import get_prompt_path
+
+    if get_response_cache() is None:
+        return None, None
+    return _prepare_and_look_up(get_prompt_path(folder=folder, filename=filename), inputs)
 
 
 def run_prompt(
@@ -292,7 +578,9 @@ def run_prompt(
     logger: Optional[object] = None,
 ) -> str:
     """
-    Run a prompt with retry logic.
+    Run a prompt with retry logic. Every prompt, sync or async, runs under the process-wide limiter
+    from `src._retry.get_prompt_limiter`, which backs off for all callers when one is throttled. A prompt
+    answered from the response cache returns before taking a limiter slot.
 
     Args:
         folder: Folder containing the prompt file
@@ -309,16 +597,76 @@ def run_prompt(
         Exception: If all retry attempts fail
     """
     from src._credential import in_ci
-    from src._retry import retry_with_backoff
+    from src._retry import get_prompt_limiter, retry_with_backoff
     from src._settings import SettingsManager
 
+    # a cached response is returned without waiting for a limiter slot
+    prepared, cached_content = _prepare_cached_prompt(folder, filename, inputs)
+    if cached_content is not None:
+        return cached_content
+
     def execute_prompt() -> str:
         if in_ci():
             configuration = {"api_key": (settings or SettingsManager()).get("OPENAI_API_KEY")}
         else:
             configuration = {}
-        return _run_prompt_template(folder=folder, filename=filename, inputs=inputs, configuration=configuration)
+        return _run_prompt_template(
+            folder=folder, filename=filename, inputs=inputs, configuration=configuration, prepared=prepared
+        )
+
+    return retry_with_backoff(
+        func=execute_prompt,
+        max_retries=max_retries,
+        retry_exceptions=(json.JSONDecodeError, Exception),
+        logger=logger,
+        description=f"prompt {filename}",
+        limiter=get_prompt_limiter(),
+        **_retry_callbacks(filename, logger),
+    )
+
+
+async def arun_prompt(
+    folder: str,
+    filename: str,
+    inputs: dict,
+    settings=None,
+    max_retries: int = 5,
+    logger: Optional[object] = None,
+) -> str:
+    """
+    Run a prompt with retry logic without blocking the event loop.
+
+    Takes the same arguments as `run_prompt`. Each attempt is cancelled if it times out.
+    """
+    from src._credential import in_ci
+    from src._retry import aretry_with_backoff, get_prompt_limiter
+    from src._settings import SettingsManager
+
+    prepared, cached_content = await asyncio.to_thread(_prepare_cached_prompt, folder, filename, inputs)
+    if cached_content is not None:
+        return cached_content
+
+    async def execute_prompt() -> str:
+        if in_ci():
+            configuration = {"api_key": (settings or SettingsManager()).get("OPENAI_API_KEY")}
+        else:
+            configuration = {}
+        return await _arun_prompt_template(
+            folder=folder, filename=filename, inputs=inputs, configuration=configuration, prepared=prepared
+        )
+
+    return await aretry_with_backoff(
+        execute_prompt,
+        max_retries=max_retries,
+        retry_exceptions=(json.JSONDecodeError, Exception),
+        logger=logger,
+        description=f"prompt {filename}",
+        limiter=get_prompt_limiter(),
+        **_retry_callbacks(filename, logger),
+    )
+
 
+def _retry_callbacks(filename: str, logger: Optional[object]) -> dict:
     def on_retry(exception, attempt, max_attempts):
         if logger:
             logger.warning(f"Error executing prompt {filename}, attempt {attempt+1}/{max_attempts}: {str(exception)}")
@@ -328,12 +676,4 @@ def run_prompt(
             logger.error(f"Failed to execute prompt {filename} after {attempt} attempts: {str(exception)}")
         raise exception
 
-    return retry_with_backoff(
-        func=execute_prompt,
-        max_retries=max_retries,
-        retry_exceptions=(json.JSONDecodeError, Exception),
-        on_retry=on_retry,
-        on_failure=on_failure,
-        logger=logger,
-        description=f"prompt {filename}",
-    )
+    return {"on_retry": on_retry, "on_failure": on_failure}
@@ -0,0 +1,153 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Module for caching LLM responses on disk, keyed by the content of the request.
+
+The cache is opt-in. Set APIVIEW_PROMPT_CACHE to the path of a SQLite file to enable it.
+APIVIEW_PROMPT_CACHE_TTL (seconds, default 7 days) and APIVIEW_PROMPT_CACHE_MAX_ENTRIES
+(default 10000) control eviction.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from opentelemetry import metrics
+
+_meter = metrics.get_meter(__name__)
+_cache_request_counter = _meter.create_counter(
+    name="apiview.prompt_cache.requests",
+    description="Number of prompt response cache lookups, by result",
+    unit="{request}",
+)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10000
+
+_UNSET = object()
+_cache = _UNSET
+_cache_lock = threading.Lock()
+
+
+def response_cache_key(*, prompty_hash: str, messages: list, endpoint: str, model: str, parameters: dict) -> str:
+    """
+    Returns the cache key for a request: a hash of the prompty file, the rendered messages, the
+    inference endpoint, the model deployment and the completion parameters.
+    """
+    payload = json.dumps(
+        {
+            "prompty": prompty_hash,
+            "messages": messages,
+            "endpoint": endpoint,
+            "model": model,
+            "parameters": parameters,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """A SQLite-backed cache of prompt responses with TTL and least-recently-used eviction."""
+
+    def __init__(self, path: str, *, ttl: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # the connection is shared by the review's worker threads, guarded by _lock
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for `key`, or None if there is none or it has expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+            else:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+        _cache_request_counter.add(1, attributes={"cache.result": "miss" if row is None else "hit"})
+        return row[0] if row is not None else None
+
+    def put(self, key: str, value: str):
+        """Stores a response, evicting expired entries and then the least recently used ones."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self):
+        """Removes all cached responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, or None if caching is not enabled. The cache is
+    created from the APIVIEW_PROMPT_CACHE environment variables on first use.
+    """
+    global _cache  # pylint: disable=global-statement
+    if _cache is _UNSET:
+        with _cache_lock:
+            if _cache is _UNSET:
+                path = os.getenv("APIVIEW_PROMPT_CACHE")
+                _cache = (
+                    ResponseCache(
+                        path,
+                        ttl=float(os.getenv("APIVIEW_PROMPT_CACHE_TTL") or DEFAULT_TTL_SECONDS),
+                        max_entries=int(os.getenv("APIVIEW_PROMPT_CACHE_MAX_ENTRIES") or DEFAULT_MAX_ENTRIES),
+                    )
+                    if path
+                    else None
+                )
+    return _cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]):
+    """Sets the process-wide response cache. Pass None to disable caching."""
+    global _cache  # pylint: disable=global-statement
+    with _cache_lock:
+        _cache = cache
@@ -5,12 +5,17 @@
 # --------------------------------------------------------------------------
 
 """
-Module containing retry logic with smart defaults, support for 'Retry-After' headers, and per-call timeout.
+Module containing retry logic with smart defaults, support for 'Retry-After' headers, and per-call timeout,
+for both blocking functions and coroutines, and the process-wide adaptive limit on concurrent prompts.
 """
 
+import asyncio
 import json
+import os
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Optional
 
 from opentelemetry import metrics
 
@@ -20,6 +25,27 @@ _retry_counter = _meter.create_counter(
     description="Number of prompt retries due to throttling, timeouts, or other transient errors",
     unit="{retry}",
 )
+_in_flight_counter = _meter.create_up_down_counter(
+    name="apiview.prompt.in_flight",
+    description="Number of prompts currently running under the prompt limiter",
+    unit="{prompt}",
+)
+_throttle_counter = _meter.create_counter(
+    name="apiview.prompt.throttled",
+    description="Number of prompts that were throttled by the endpoint",
+    unit="{prompt}",
+)
+_limiter_wait_histogram = _meter.create_histogram(
+    name="apiview.prompt.limiter_wait",
+    description="Time a prompt waited for the prompt limiter before running",
+    unit="s",
+)
+
+# Max prompts in flight at once in a process (APIVIEW_MAX_CONCURRENT_PROMPTS), before any throttling
+DEFAULT_MAX_CONCURRENT_PROMPTS = 32
+
+_prompt_limiter = None
+_prompt_limiter_lock = threading.Lock()
 
 
 class TimeoutException(Exception):
@@ -29,6 +55,227 @@ class TimeoutException(Exception):
     pass
 
 
+class AdaptiveLimiter:
+    """
+    Limits how many calls run at once, adapting the limit to throttling (additive increase,
+    multiplicative decrease). It is shared by threads and event loops.
+
+    The limit starts at `max_limit`. Each successful call raises it by 1/limit, so it grows by about one
+    per round of calls until it is back at `max_limit`. A throttled call halves it, down to `min_limit`,
+    and pauses every caller until the call's Retry-After has passed. The limit is halved at most once per
+    `cooldown` seconds, so a burst of throttled calls that were already in flight counts once.
+    """
+
+    def __init__(self, max_limit: int, *, min_limit: int = 1, cooldown: float = 5.0, default_pause: float = 1.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.cooldown = cooldown
+        self.default_pause = default_pause
+        self.throttled = 0
+        self._limit = float(max_limit)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._decrease_after = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = []
+
+    @property
+    def limit(self) -> int:
+        """The current number of calls allowed at once."""
+        return max(int(self._limit), self.min_limit)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of calls currently running."""
+        return self._in_flight
+
+    def acquire(self) -> float:
+        """Block until a call may run. Returns how many seconds were spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                delay = self._try_acquire()
+                if delay == 0:
+                    break
+                self._cond.wait(delay)
+        return self._acquired(start)
+
+    async def aacquire(self) -> float:
+        """Wait, without blocking the event loop, until a call may run. Returns how many seconds were spent waiting."""
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                delay = self._try_acquire()
+                if delay == 0:
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                # returns when the waiter is woken or the delay has passed, without raising on timeout
+                await asyncio.wait({waiter}, timeout=delay)
+            finally:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+        return self._acquired(start)
+
+    def release(self, *, succeeded: bool = False, throttled: bool = False, retry_after: Optional[float] = None):
+        """
+        Record the outcome of a call and let waiting calls run. Calls that neither succeeded nor were
+        throttled, such as timeouts, leave the limit as it is.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttled += 1
+                if now >= self._decrease_after:
+                    self._limit = max(float(self.min_limit), self._limit / 2)
+                    self._decrease_after = now + self.cooldown
+                pause = retry_after if retry_after is not None else self.default_pause
+                self._paused_until = max(self._paused_until, now + pause)
+            elif succeeded:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # the waiter's event loop is closed
+        _in_flight_counter.add(-1)
+        if throttled:
+            _throttle_counter.add(1)
+
+    def _try_acquire(self) -> Optional[float]:
+        """
+        Take a slot and return 0, or return how many seconds to wait before trying again (None to wait
+        until a call is released). The caller holds the lock.
+        """
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight < self.limit:
+            self._in_flight += 1
+            return 0
+        return None
+
+    def _acquired(self, start: float) -> float:
+        waited = time.monotonic() - start
+        _in_flight_counter.add(1)
+        _limiter_wait_histogram.record(waited)
+        return waited
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def get_prompt_limiter() -> AdaptiveLimiter:
+    """
+    Returns the process-wide limiter that every prompt goes through. Its maximum is read from
+    APIVIEW_MAX_CONCURRENT_PROMPTS on first use.
+    """
+    global _prompt_limiter  # pylint: disable=global-statement
+    if _prompt_limiter is None:
+        with _prompt_limiter_lock:
+            if _prompt_limiter is None:
+                _prompt_limiter = AdaptiveLimiter(
+                    int(os.getenv("APIVIEW_MAX_CONCURRENT_PROMPTS") or DEFAULT_MAX_CONCURRENT_PROMPTS)
+                )
+    return _prompt_limiter
+
+
+def set_prompt_limiter(limiter: Optional[AdaptiveLimiter]):
+    """Sets the process-wide prompt limiter. Pass None to create it again from the environment on next use."""
+    global _prompt_limiter  # pylint: disable=global-statement
+    with _prompt_limiter_lock:
+        _prompt_limiter = limiter
+
+
+def _observe_prompt_limit(_options):
+    limiter = _prompt_limiter
+    if limiter is not None:
+        yield metrics.Observation(limiter.limit)
+
+
+_meter.create_observable_gauge(
+    name="apiview.prompt.concurrency_limit",
+    callbacks=[_observe_prompt_limit],
+    description="Number of prompts the prompt limiter currently allows at once",
+    unit="{prompt}",
+)
+
+
+def _retry_after_header(e) -> Optional[int]:
+    """Returns the 'Retry-After' header of the error's response in seconds, if it has a valid one."""
+    if e is not None and hasattr(e, "response") and e.response is not None:  # pylint: disable=no-member
+        retry_after = e.response.headers.get("Retry-After")  # pylint: disable=no-member
+        if retry_after:
+            try:
+                return int(retry_after)
+            except ValueError:
+                return None  # Ignore invalid Retry-After values
+    return None
+
+
+def _is_throttled(e) -> bool:
+    return getattr(e, "status_code", None) == 429 or _retry_after_header(e) is not None
+
+
+def _limited_call(limiter: Optional[AdaptiveLimiter], call):
+    """Run `call` under the limiter, if any, and record its outcome."""
+    if limiter is None:
+        return call()
+    limiter.acquire()
+    try:
+        result = call()
+    except BaseException as e:
+        limiter.release(throttled=_is_throttled(e), retry_after=_retry_after_header(e))
+        raise
+    limiter.release(succeeded=True)
+    return result
+
+
+async def _alimited_call(limiter: Optional[AdaptiveLimiter], call):
+    """Await `call()` under the limiter, if any, and record its outcome."""
+    if limiter is None:
+        return await call()
+    await limiter.aacquire()
+    try:
+        result = await call()
+    except BaseException as e:
+        limiter.release(throttled=_is_throttled(e), retry_after=_retry_after_header(e))
+        raise
+    limiter.release(succeeded=True)
+    return result
+
+
+def _retry_delay(e, attempt, logger=None):
+    """
+    Returns how many seconds to wait before retrying after `e`, and the reason for the retry: the
+    'Retry-After' header of the error's response if there is one, otherwise exponential backoff.
+    """
+    # Determine retry reason for telemetry
+    retry_reason = "timeout" if isinstance(e, TimeoutException) else "other"
+    if _is_throttled(e):
+        retry_reason = "throttled"
+
+    # Check for 'Retry-After' header if the exception has it
+    retry_after = _retry_after_header(e)
+    if retry_after is not None and logger:
+        logger.info(f"Retry-After header found: {retry_after} seconds")
+
+    # Use Retry-After if available, otherwise use exponential backoff
+    if retry_after is None:
+        retry_after = 2**attempt  # Exponential backoff
+        if logger:
+            logger.info(f"Using exponential backoff: {retry_after} seconds")
+    return retry_after, retry_reason
+
+
 def retry_with_backoff(
     func,
     *,
@@ -40,6 +287,7 @@ def retry_with_backoff(
     on_retry=None,
     logger=None,
     description="operation",
+    limiter=None,
 ):
     """
     Generic retry function with smart defaults, support for honoring 'Retry-After' headers, and per-call timeout.
@@ -56,18 +304,23 @@ def retry_with_backoff(
         on_retry: Function to call on each retry (params: exception, attempt, max_retries)
         logger: Logger object to use
         description: Description of the operation for logging
+        limiter: Optional AdaptiveLimiter that each attempt runs under. Time spent waiting for it does not
+                 count toward the timeout.
 
     Returns:
         The result of the function call, or the result of on_failure if all retries fail
     """
+
+    def call_with_timeout():
+        # Use ThreadPoolExecutor to enforce a timeout
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(func)
+            return future.result(timeout=timeout)  # Wait for the result with a timeout
+
     e = None  # Ensure 'e' is always defined
     for attempt in range(max_retries):
         try:
-            # Use ThreadPoolExecutor to enforce a timeout
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(func)
-                result = future.result(timeout=timeout)  # Wait for the result with a timeout
-            return result
+            return _limited_call(limiter, call_with_timeout)
         except TimeoutError:
             if logger:
                 logger.error(f"Timeout in {description}: Function execution exceeded {timeout} seconds")
@@ -95,27 +348,7 @@ def retry_with_backoff(
             if logger:
                 logger.error(error_msg)
 
-        # Determine retry reason for telemetry
-        retry_reason = "timeout" if isinstance(e, TimeoutException) else "other"
-
-        # Check for 'Retry-After' header if the exception has it
-        retry_after = None
-        if e is not None and hasattr(e, "response") and e.response is not None:  # pylint: disable=no-member
-            retry_after = e.response.headers.get("Retry-After")  # pylint: disable=no-member
-            if retry_after:
-                try:
-                    retry_after = int(retry_after)
-                    retry_reason = "throttled"
-                    if logger:
-                        logger.info(f"Retry-After header found: {retry_after} seconds")
-                except ValueError:
-                    retry_after = None  # Ignore invalid Retry-After values
-
-        # Use Retry-After if available, otherwise use exponential backoff
-        if retry_after is None:
-            retry_after = 2**attempt  # Exponential backoff
-            if logger:
-                logger.info(f"Using exponential backoff: {retry_after} seconds")
+        retry_after, retry_reason = _retry_delay(e, attempt, logger)
 
         # Call the on_retry callback if provided
         if on_retry:
@@ -135,3 +368,74 @@ def retry_with_backoff(
 
     # This shouldn't be reached, but just in case
     raise RuntimeError(f"Failed after {max_retries} attempts")
+
+
+async def aretry_with_backoff(
+    func,
+    *,
+    max_retries=5,
+    timeout=240,  # Timeout for each call in seconds (default: 4 minutes)
+    retry_exceptions=(json.JSONDecodeError, TimeoutError, ConnectionError, TimeoutException),
+    non_retryable_exceptions=(AttributeError, TypeError, NameError, SyntaxError, PermissionError),
+    on_failure=None,
+    on_retry=None,
+    logger=None,
+    description="operation",
+    limiter=None,
+):
+    """
+    Asyncio version of `retry_with_backoff` for coroutine functions. An attempt that exceeds the
+    timeout is cancelled, rather than left running on a worker thread.
+
+    Args:
+        func: The coroutine function to retry
+        limiter: Optional AdaptiveLimiter that each attempt runs under. Time spent waiting for it does not
+                 count toward the timeout.
+        The other arguments are the same as for `retry_with_backoff`.
+
+    Returns:
+        The result of the coroutine, or the result of on_failure if all retries fail
+    """
+
+    async def call_with_timeout():
+        return await asyncio.wait_for(func(), timeout)
+
+    e = None  # Ensure 'e' is always defined
+    for attempt in range(max_retries):
+        try:
+            return await _alimited_call(limiter, call_with_timeout)
+        except asyncio.TimeoutError:  # distinct from the builtin TimeoutError before Python 3.11
+            if logger:
+                logger.error(f"Timeout in {description}: Function execution exceeded {timeout} seconds")
+            e = TimeoutException(f"Function execution exceeded {timeout} seconds")
+        except Exception as exc:
+            e = exc
+            if isinstance(e, non_retryable_exceptions):
+                if logger:
+                    logger.error(f"Non-retryable error in {description}: {str(e)}")
+                if on_failure:
+                    return on_failure(e, attempt)
+                raise
+
+            if not isinstance(e, retry_exceptions):
+                if logger:
+                    logger.error(f"Unhandled error in {description}: {str(e)}")
+                if on_failure:
+                    return on_failure(e, attempt)
+                raise
+
+            if logger:
+                logger.error(f"Error in {description}, attempt {attempt+1}/{max_retries}: {str(e)}")
+
+        retry_after, retry_reason = _retry_delay(e, attempt, logger)
+        if on_retry:
+            on_retry(e, attempt, max_retries)
+        _retry_counter.add(1, attributes={"retry.reason": retry_reason, "retry.description": description})
+
+        if attempt == max_retries - 1:
+            if on_failure:
+                return on_failure(e, attempt)
+            raise e
+        await asyncio.sleep(retry_after)
+
+    raise RuntimeError(f"Failed after {max_retries} attempts")
@@ -0,0 +1,283 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Module for streaming review comments from sections to per-line processing, on a thread pool
+(ReviewPipeline) or an asyncio event loop (AsyncReviewPipeline).
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, Future
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src._models import Comment
+from src._sectioned_document import Section
+
+logger = logging.getLogger(__name__)
+
+
+class _LineTracker:
+    """
+    Tracks which sections have reported, and which lines are ready to be processed as a result.
+    It is not thread-safe.
+    """
+
+    def __init__(self, sections: List[Section]):
+        self._sections_left = len(sections)
+        self._section_lines = []
+        self._open_sections: Dict[int, int] = {}
+        for section in sections:
+            line_nos = {x.line_no for x in section.lines if x.line_no is not None}
+            self._section_lines.append(line_nos)
+            for line_no in line_nos:
+                self._open_sections[line_no] = self._open_sections.get(line_no, 0) + 1
+        self._lines: Dict[int, list] = {}
+        self._late_lines: Dict[int, list] = {}
+        self._dispatched = set()
+
+    def section_done(self, section_idx: int, comments: List[Comment]) -> List[Tuple[int, List[Comment], bool]]:
+        """
+        Record a section's comments and return the lines that are now ready, with their comments.
+
+        A section can comment on a line outside it, after the line was handed off. Such late comments
+        are held until every section has reported, and are then returned once more for the line with
+        the third element set, so they can be merged into the line's existing result.
+        """
+        ready = []
+        for order, comment in enumerate(comments):
+            entry = (section_idx, order, comment)
+            if comment.line_no in self._dispatched:
+                self._late_lines.setdefault(comment.line_no, []).append(entry)
+            else:
+                self._lines.setdefault(comment.line_no, []).append(entry)
+        for line_no in self._section_lines[section_idx]:
+            self._open_sections[line_no] -= 1
+        self._sections_left -= 1
+        for line_no in list(self._lines):
+            if self._sections_left == 0 or self._open_sections.get(line_no) == 0:
+                ready.append((line_no, self._lines.pop(line_no), False))
+                self._dispatched.add(line_no)
+        if self._sections_left == 0:
+            ready.extend((line_no, entries, True) for line_no, entries in self._late_lines.items())
+            self._late_lines = {}
+        for _, entries, _ in ready:
+            # keep the order in which a serial review would have seen the comments
+            entries.sort(key=lambda x: x[:2])
+        return [(line_no, [x[2] for x in entries], late) for line_no, entries, late in ready]
+
+
+class ReviewPipeline:
+    """
+    Streams the comments of reviewed sections into per-line processing.
+
+    Each section's prompts run concurrently. As soon as all of a section's prompts have returned,
+    its comments are grouped by line, and a line is handed to `process_line` once every section
+    containing that line has reported. Comments on lines that no section contains (for example,
+    line numbers the LLM made up) are handed off once all sections have reported.
+
+    Comments that arrive for a line after it was handed off are passed to
+    `process_line(line_no, comments, late=True)` once all sections have reported and the line's
+    first call has returned, so they can be merged into the line's existing result.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        sections: List[Section],
+        process_line: Callable[[int, List[Comment]], None],
+        *,
+        job_logger=None,
+    ):
+        self._executor = executor
+        self._process_line = process_line
+        self._logger = job_logger or logger
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        # one reference is held by the caller until close() so the pipeline can't finish while tasks are submitted
+        self._pending = 1
+        self._tracker = _LineTracker(sections)
+        # line number -> completes when the line's first call to process_line has returned
+        self._line_done: Dict[int, Future] = {}
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Submit a task that the pipeline waits for."""
+        with self._lock:
+            self._pending += 1
+        try:
+            return self._executor.submit(self._run, fn, args, kwargs)
+        except Exception:
+            self._release()
+            raise
+
+    def submit_section(
+        self,
+        section_idx: int,
+        tasks: Dict[str, Callable[[], Optional[dict]]],
+        collect: Callable[[Dict[str, Optional[dict]]], List[Comment]],
+    ):
+        """
+        Run the prompt `tasks` of a section concurrently. Once all have returned, `collect` is called
+        with their results, in the order of `tasks`, and returns the section's comments.
+        """
+        if not tasks:
+            self._collect_section(section_idx, {}, collect)
+            return
+        results = {}
+        remaining = [len(tasks)]
+
+        def run_task(key, task):
+            try:
+                result = task()
+            except Exception as e:
+                self._logger.error(f"Error executing {key}: {str(e)}")
+                result = None
+            with self._lock:
+                results[key] = result
+                remaining[0] -= 1
+                is_last = remaining[0] == 0
+            if is_last:
+                self._collect_section(section_idx, {key: results[key] for key in tasks}, collect)
+
+        for key, task in tasks.items():
+            self.submit(run_task, key, task)
+
+    def close(self):
+        """Signal that no more sections will be submitted."""
+        self._release()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every submitted task, including per-line processing, to finish."""
+        return self._done.wait(timeout)
+
+    def _collect_section(self, section_idx: int, results: Dict[str, Optional[dict]], collect):
+        comments = []
+        try:
+            comments = collect(results)
+        except Exception as e:
+            self._logger.error(f"Error collecting comments for section {section_idx}: {str(e)}")
+        self._section_done(section_idx, comments)
+
+    def _section_done(self, section_idx: int, comments: List[Comment]):
+        with self._lock:
+            ready = self._tracker.section_done(section_idx, comments)
+            for line_no, _, late in ready:
+                if not late:
+                    self._line_done[line_no] = Future()
+        for line_no, line_comments, late in ready:
+            if late:
+                self._submit_late_line(line_no, line_comments)
+            else:
+                self.submit(self._run_line, line_no, line_comments)
+
+    def _run_line(self, line_no: int, comments: List[Comment]):
+        try:
+            self._process_line(line_no, comments)
+        finally:
+            self._line_done[line_no].set_result(None)
+
+    def _submit_late_line(self, line_no: int, comments: List[Comment]):
+        # held until the late comments are submitted, so the pipeline can't finish in between
+        with self._lock:
+            self._pending += 1
+
+        def submit_late(_):
+            try:
+                self.submit(self._process_line, line_no, comments, late=True)
+            finally:
+                self._release()
+
+        self._line_done[line_no].add_done_callback(submit_late)
+
+    def _run(self, fn, args, kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            self._logger.error(f"Error in review pipeline task: {str(e)}")
+            return None
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._done.set()
+
+
+class AsyncReviewPipeline:
+    """
+    The asyncio counterpart of ReviewPipeline: section prompts, section collection and per-line
+    processing are coroutines running as tasks on the event loop.
+    """
+
+    def __init__(
+        self,
+        sections: List[Section],
+        process_line: Callable[[int, List[Comment]], Awaitable[None]],
+        *,
+        job_logger=None,
+    ):
+        self._process_line = process_line
+        self._logger = job_logger or logger
+        self._tracker = _LineTracker(sections)
+        self._tasks = set()
+        self._line_tasks: Dict[int, asyncio.Task] = {}
+
+    def submit_section(
+        self,
+        section_idx: int,
+        tasks: Dict[str, Callable[[], Awaitable[Optional[dict]]]],
+        collect: Callable[[Dict[str, Optional[dict]]], Awaitable[List[Comment]]],
+    ):
+        """
+        Run the prompt `tasks` of a section concurrently. Once all have returned, `collect` is awaited
+        with their results, in the order of `tasks`, and returns the section's comments.
+        """
+        self._spawn(self._run_section(section_idx, tasks, collect))
+
+    async def wait(self):
+        """Wait for every submitted task, including per-line processing, to finish."""
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run_section(self, section_idx: int, tasks, collect):
+        keys = list(tasks)
+        results = await asyncio.gather(*(self._run_task(key, tasks[key]) for key in keys))
+        comments = []
+        try:
+            comments = await collect(dict(zip(keys, results)))
+        except Exception as e:
+            self._logger.error(f"Error collecting comments for section {section_idx}: {str(e)}")
+        for line_no, line_comments, late in self._tracker.section_done(section_idx, comments):
+            if late:
+                self._spawn(self._run_late_line(line_no, line_comments))
+            else:
+                self._line_tasks[line_no] = self._spawn(self._run_line(line_no, line_comments))
+
+    async def _run_task(self, key: str, task) -> Optional[dict]:
+        try:
+            return await task()
+        except Exception as e:
+            self._logger.error(f"Error executing {key}: {str(e)}")
+            return None
+
+    async def _run_line(self, line_no: int, comments: List[Comment], **kwargs):
+        try:
+            await self._process_line(line_no, comments, **kwargs)
+        except Exception as e:
+            self._logger.error(f"Error in review pipeline task: {str(e)}")
+
+    async def _run_late_line(self, line_no: int, comments: List[Comment]):
+        await asyncio.wait([self._line_tasks[line_no]])
+        await self._run_line(line_no, comments, late=True)
@@ -0,0 +1,189 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Module for scheduling review jobs on a bounded number of workers, smallest reviews first.
+"""
+
+import asyncio
+import collections
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+_meter = metrics.get_meter(__name__)
+_queue_depth_counter = _meter.create_up_down_counter(
+    name="apiview.review.queue_depth",
+    description="Number of review jobs waiting for a worker",
+    unit="{job}",
+)
+_running_counter = _meter.create_up_down_counter(
+    name="apiview.review.running",
+    description="Number of review jobs running",
+    unit="{job}",
+)
+_queue_wait_histogram = _meter.create_histogram(
+    name="apiview.review.queue_wait",
+    description="Time a review job waited for a worker",
+    unit="s",
+)
+_rejected_counter = _meter.create_counter(
+    name="apiview.review.rejected",
+    description="Number of review jobs rejected because the queue was full",
+    unit="{job}",
+)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_QUEUE_SIZE = 100
+DEFAULT_AGING_SECONDS = 300
+DEFAULT_JOB_SECONDS = 120
+
+# Upper bounds, in lines of API text, of the review size classes. Anything larger is "large".
+_SIZE_CLASSES = (("small", 1000), ("medium", 5000))
+_SIZE_RANKS = {"small": 0, "medium": 1, "large": 2}
+
+
+def review_size_class(target: str, base: Optional[str] = None) -> str:
+    """
+    Returns the size class of a review: "small", "medium" or "large", by the lines of API text to review.
+    """
+    line_count = max(target.count("\n"), (base or "").count("\n")) + 1
+    for size, max_lines in _SIZE_CLASSES:
+        if line_count <= max_lines:
+            return size
+    return "large"
+
+
+class ReviewQueueFullError(Exception):
+    """Raised when a review job is submitted while the queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"The review queue is full. Retry after {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _QueuedJob:
+    job_id: str
+    run: Callable[[], Awaitable[None]]
+    language: str
+    size: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def attributes(self) -> dict:
+        return {"review.language": self.language, "review.size": self.size}
+
+
+class ReviewScheduler:
+    """
+    Runs review jobs on at most `max_workers` workers, queueing the rest.
+
+    Jobs are queued per size class and language. When a worker is free, it takes the smallest job,
+    preferring the language with the fewest running jobs, then the job that has waited longest. A job
+    that has waited `aging_seconds` is treated as small, so large reviews are delayed but not starved.
+    Once `max_queue_size` jobs are waiting, `submit` raises ReviewQueueFullError with an estimate of when
+    to retry.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        aging_seconds: float = DEFAULT_AGING_SECONDS,
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.aging_seconds = aging_seconds
+        self._queues: Dict[Tuple[str, str], Deque[_QueuedJob]] = {}
+        self._queued = 0
+        self._running: Dict[str, int] = collections.Counter()
+        self._tasks = set()
+        self._average_job_seconds = float(DEFAULT_JOB_SECONDS)
+
+    @property
+    def queued(self) -> int:
+        """The number of jobs waiting for a worker."""
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        """The number of jobs running."""
+        return sum(self._running.values())
+
+    def submit(self, job_id: str, run: Callable[[], Awaitable[None]], *, language: str, size: str):
+        """
+        Queue a job. `run` is awaited once a worker is free; it must handle its own errors.
+        Must be called on the event loop that runs the jobs.
+
+        Raises:
+            ReviewQueueFullError: If `max_queue_size` jobs are already waiting.
+        """
+        job = _QueuedJob(job_id=job_id, run=run, language=language, size=size)
+        if self._queued >= self.max_queue_size:
+            _rejected_counter.add(1, attributes=job.attributes)
+            raise ReviewQueueFullError(self.retry_after())
+        self._queues.setdefault((size, language), collections.deque()).append(job)
+        self._queued += 1
+        _queue_depth_counter.add(1, attributes=job.attributes)
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds it takes for a place in the queue to open up."""
+        seconds = self._average_job_seconds * (self._queued + 1) / self.max_workers
+        return min(max(math.ceil(seconds), 1), 3600)
+
+    async def wait(self):
+        """Wait until no jobs are queued or running."""
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    def _dispatch(self):
+        while self.running < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                return
+            self._queued -= 1
+            self._running[job.language] += 1
+            _queue_depth_counter.add(-1, attributes=job.attributes)
+            _running_counter.add(1, attributes=job.attributes)
+            _queue_wait_histogram.record(time.monotonic() - job.enqueued_at, attributes=job.attributes)
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _next_job(self) -> Optional[_QueuedJob]:
+        now = time.monotonic()
+        best_key, best_queue = None, None
+        for queue in self._queues.values():
+            if not queue:
+                continue
+            job = queue[0]
+            rank = 0 if now - job.enqueued_at >= self.aging_seconds else _SIZE_RANKS.get(job.size, 0)
+            key = (rank, self._running[job.language], job.enqueued_at)
+            if best_key is None or key < best_key:
+                best_key, best_queue = key, queue
+        return best_queue.popleft() if best_queue is not None else None
+
+    async def _run(self, job: _QueuedJob):
+        start = time.monotonic()
+        try:
+            await job.run()
+        except Exception as e:
+            logger.error("Error running review job %s: %s", job.job_id, e, exc_info=True)
+        finally:
+            # exponentially weighted, so the estimate follows the current mix of jobs
+            self._average_job_seconds = 0.8 * self._average_job_seconds + 0.2 * (time.monotonic() - start)
+            self._running[job.language] -= 1
+            _running_counter.add(-1, attributes=job.attributes)
+            self._dispatch()
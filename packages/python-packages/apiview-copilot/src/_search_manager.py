@@ -9,8 +9,9 @@ Module for managing search operations in APIView Copilot.
 """
 
 import copy
+import threading
 from collections import deque
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from azure.search.documents import SearchClient, SearchItemPaged
 
@@ -283,6 +284,46 @@ class ContextItem:
         return markdown
 
 
+class SearchItemCache:
+    """
+    Caches search items by ID, so that looking up the context of many comments takes one query
+    instead of one per comment.
+    """
+
+    def __init__(self, search: "SearchManager"):
+        self._search = search
+        self._items: Dict[str, Optional[SearchItem]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, items: Iterable[SearchItem]):
+        """Adds items that were already fetched, such as the language guidelines."""
+        with self._lock:
+            for item in items:
+                self._items[guideline_id_to_db(item.id)] = item
+
+    def prefetch(self, ids: Iterable[str]):
+        """Looks up all the given IDs that are not cached yet with a single query."""
+        with self._lock:
+            missing = list(dict.fromkeys(x for x in ids if guideline_id_to_db(x) not in self._items))
+        if not missing:
+            return
+        found = {guideline_id_to_db(item.id): item for item in self._search.search_all_by_id(missing)}
+        with self._lock:
+            for item_id in missing:
+                # remember IDs that were not found too, so they are not looked up again
+                self._items[guideline_id_to_db(item_id)] = found.get(guideline_id_to_db(item_id))
+
+    def get(self, ids: List[str]) -> List[SearchItem]:
+        """
+        Returns the items with the given IDs, looking up any that are not cached yet. The items are
+        copies, because `SearchManager.build_context` rewrites their IDs.
+        """
+        self.prefetch(ids)
+        with self._lock:
+            items = [self._items.get(guideline_id_to_db(x)) for x in dict.fromkeys(ids)]
+        return [copy.copy(x) for x in items if x is not None]
+
+
 class SearchManager:
     """Manages search operations using Azure Search."""
 
@@ -11,6 +11,9 @@ Module for sectioning large documents with line numbers.
 import re
 from typing import List, Optional
 
+# "<line_no>: <git_status><line>", as produced for FULL and DIFF reviews
+_LINE_PATTERN = re.compile(r"^(\d+): ( |\+|\-)?(.*)$")
+
 
 def _is_decorator_line(line: str) -> bool:
     """Check if a line is a decorator (starts with @ after stripping whitespace)."""
@@ -79,8 +82,7 @@ class SectionedDocument:
             line_data = []
             for line in lines:
                 # Parse the line to get it's line number and diff status
-                pattern = r"^(\d+): ( |\+|\-)?(.*)$"
-                match = re.match(pattern, line)
+                match = _LINE_PATTERN.match(line)
                 if match:
                     line_no = int(match.group(1))
                     git_status = match.group(2)
@@ -91,9 +93,10 @@ class SectionedDocument:
                 indent = len(line) - len(line.lstrip())
                 line_data.append(LineData(line_no=line_no, indent=indent, line=line, git_status=git_status))
 
-        top_level_lines = [
-            x
-            for x in line_data
+        # Indices, rather than the lines themselves, so that each section's bounds are found without a search
+        top_level_idxs = [
+            idx
+            for idx, x in enumerate(line_data)
             if x.indent == base_indent
             and x.line[base_indent:] != ""
             and x.line[base_indent:] != "}"
@@ -101,16 +104,14 @@ class SectionedDocument:
         ]
 
         # Handle case with no top-level lines
-        if not top_level_lines:
+        if not top_level_idxs:
             self.sections.append(Section(line_data))
             return
 
         # Create initial sections based on top-level lines
         # Each section includes any preceding decorator lines at the same indent level
         initial_sections = []
-        for i, line1 in enumerate(top_level_lines):
-            line1_idx = line_data.index(line1)
-
+        for i, line1_idx in enumerate(top_level_idxs):
             # Look backward to find any preceding decorator lines that belong to this section
             section_start_idx = line1_idx
             while section_start_idx > 0:
@@ -121,9 +122,8 @@ class SectionedDocument:
                 else:
                     break
 
-            try:
-                line2 = top_level_lines[i + 1]
-                line2_idx = line_data.index(line2)
+            if i + 1 < len(top_level_idxs):
+                line2_idx = top_level_idxs[i + 1]
                 # Look backward from line2 to find where its decorators start
                 # (so we don't include them in this section)
                 section_end_idx = line2_idx
@@ -134,7 +134,7 @@ class SectionedDocument:
                     else:
                         break
                 lines_between = line_data[section_start_idx:section_end_idx]
-            except IndexError:
+            else:
                 # Last section, take all remaining lines
                 lines_between = line_data[section_start_idx:]
             initial_sections.append(Section(lines_between))
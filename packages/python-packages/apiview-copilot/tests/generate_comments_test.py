@@ -7,7 +7,7 @@
 # pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name,unused-argument,protected-access
 
 """
-Tests for _generate_comments prompt scheduling in ApiViewReview.
+Tests for _review_sections prompt scheduling in ApiViewReview.
 """
 
 import json
@@ -51,11 +51,11 @@ def review(monkeypatch):
 
 
 class TestGenerateCommentsPromptScheduling:
-    """Verify that _generate_comments submits the correct prompt tasks."""
+    """Verify that _review_sections submits the correct prompt tasks."""
 
     def test_full_mode_submits_guideline_and_context_only(self, review):
         """With generic review disabled, only guideline and context prompts should run."""
-        review._generate_comments()
+        review._review_sections()
 
         # Collect all prompt filenames that were submitted
         submitted_filenames = [call.kwargs["filename"] for call in review.run_prompt.call_args_list]
@@ -66,7 +66,7 @@ class TestGenerateCommentsPromptScheduling:
 
     def test_full_mode_submits_two_prompts_per_section(self, review):
         """Each section should produce exactly 2 prompt calls (guideline + context)."""
-        review._generate_comments()
+        review._review_sections()
 
         # The small API fits in one section, so we expect exactly 2 calls
         assert review.run_prompt.call_count == 2
@@ -90,7 +90,7 @@ class TestGenerateCommentsPromptScheduling:
             )
         r.run_prompt = MagicMock(return_value=EMPTY_RESPONSE)
 
-        r._generate_comments()
+        r._review_sections()
 
         submitted_filenames = [call.kwargs["filename"] for call in r.run_prompt.call_args_list]
 
@@ -122,7 +122,7 @@ class TestGenerateCommentsPromptScheduling:
             r = ApiViewReview(target=large_api, base=None, language="python")
         r.run_prompt = MagicMock(return_value=EMPTY_RESPONSE)
 
-        r._generate_comments()
+        r._review_sections()
 
         # Should have submitted 2 prompts for each section
         assert r._chunk_count > 1
@@ -0,0 +1,105 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+# pylint: disable=missing-class-docstring,missing-function-docstring
+
+"""
+Tests for the adaptive prompt limiter in _retry.py.
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src._retry import AdaptiveLimiter, aretry_with_backoff, retry_with_backoff
+
+
+class ThrottledError(Exception):
+    def __init__(self, retry_after="0"):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = MagicMock(headers={"Retry-After": retry_after})
+
+
+class TestAdaptiveLimiter:
+    def test_throttling_halves_the_limit_once_per_cooldown(self):
+        limiter = AdaptiveLimiter(8, default_pause=0)
+        for _ in range(3):
+            limiter.acquire()
+        for _ in range(3):
+            limiter.release(throttled=True, retry_after=0)
+        assert limiter.limit == 4
+        assert limiter.throttled == 3
+        assert limiter.in_flight == 0
+
+    def test_successes_ramp_the_limit_back_up(self):
+        limiter = AdaptiveLimiter(4, cooldown=0)
+        limiter.acquire()
+        limiter.release(throttled=True, retry_after=0)
+        assert limiter.limit == 2
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release(succeeded=True)
+        assert limiter.limit == 4
+
+    def test_throttling_pauses_every_caller(self):
+        limiter = AdaptiveLimiter(4)
+        limiter.acquire()
+        limiter.release(throttled=True, retry_after=0.2)
+        start = time.monotonic()
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.15
+
+    def test_throttling_pauses_async_callers(self):
+        limiter = AdaptiveLimiter(4)
+
+        async def acquire_after_throttle():
+            await limiter.aacquire()
+            limiter.release(throttled=True, retry_after=0.2)
+            return await limiter.aacquire()
+
+        assert asyncio.run(acquire_after_throttle()) >= 0.15
+
+    def test_async_waiters_run_when_a_call_is_released(self):
+        limiter = AdaptiveLimiter(1)
+        order = []
+
+        async def call(name):
+            await limiter.aacquire()
+            order.append(name)
+            await asyncio.sleep(0.01)
+            limiter.release(succeeded=True)
+
+        async def run_all():
+            await asyncio.gather(call("a"), call("b"), call("c"))
+
+        asyncio.run(run_all())
+        assert sorted(order) == ["a", "b", "c"]
+        assert limiter.in_flight == 0
+
+
+class TestRetryWithLimiter:
+    def test_throttled_attempt_is_recorded_and_retried(self):
+        limiter = AdaptiveLimiter(4, default_pause=0)
+        func = MagicMock(side_effect=[ThrottledError(), "ok"])
+        with patch("src._retry.time.sleep"):
+            assert retry_with_backoff(func, limiter=limiter, retry_exceptions=(Exception,)) == "ok"
+        assert limiter.throttled == 1
+        assert limiter.limit == 2
+        assert limiter.in_flight == 0
+
+    def test_async_attempts_release_the_limiter_on_failure(self):
+        limiter = AdaptiveLimiter(4)
+
+        async def fail():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            asyncio.run(aretry_with_backoff(fail, limiter=limiter, retry_exceptions=(), max_retries=1))
+        assert limiter.in_flight == 0
+        assert limiter.throttled == 0
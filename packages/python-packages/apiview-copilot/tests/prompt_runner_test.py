@@ -10,11 +10,27 @@
 Tests for _render_template and _parse_prompty in _prompt_runner.py.
 """
 
+import asyncio
 import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src._prompt_runner import _render_template, _parse_prompty, _resolve_env_vars, _load_file_reference
+from src._prompt_runner import (
+    _get_async_inference_client,
+    _get_inference_client,
+    _load_file_reference,
+    _load_prompty,
+    _parse_prompty,
+    _render_template,
+    _resolve_env_vars,
+    arun_prompt,
+    clear_inference_clients,
+    get_inference_client_stats,
+)
+from src._retry import AdaptiveLimiter, aretry_with_backoff, set_prompt_limiter
 
 
 class TestRenderTemplate:
@@ -233,3 +249,99 @@ class TestParsePrompty:
         assert "response_format" not in config.parameters
         assert config.parameters == {"frequency_penalty": 0, "max_completion_tokens": 8000}
         assert config.response_format == {"type": "json_object"}
+
+
+class TestLoadPrompty:
+    def test_reparses_only_when_file_changes(self, tmp_path):
+        prompty_path = tmp_path / "test.prompty"
+        prompty_path.write_text("---\nname: first\n---\nuser:\nHi\n", encoding="utf-8")
+        first = _load_prompty(prompty_path)
+        assert _load_prompty(str(prompty_path)) is first
+
+        prompty_path.write_text("---\nname: second\n---\nuser:\nHi\n", encoding="utf-8")
+        stat = prompty_path.stat()
+        os.utime(prompty_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert _load_prompty(prompty_path).name == "second"
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            _load_prompty(tmp_path / "missing.prompty")
+
+
+class TestInferenceClientPool:
+    def test_clients_are_reused_per_endpoint_and_credential(self):
+        inference = MagicMock()
+        inference.ChatCompletionsClient.side_effect = lambda **kwargs: MagicMock()
+        clear_inference_clients()
+        try:
+            with patch.dict(sys.modules, {"azure.ai.inference": inference}), patch("src._credential.get_credential"):
+                client = _get_inference_client("https://a.example.com/models")
+                assert _get_inference_client("https://a.example.com/models") is client
+                assert _get_inference_client("https://b.example.com/models") is not client
+                assert _get_inference_client("https://a.example.com/models", api_key="key") is not client
+            assert get_inference_client_stats() == {"created": 3, "reused": 1}
+        finally:
+            clear_inference_clients()
+        assert get_inference_client_stats() == {"created": 0, "reused": 0}
+
+
+class TestAsyncPromptExecution:
+    def test_timed_out_attempt_is_cancelled_and_retried(self):
+        attempts = []
+
+        async def slow_then_fast():
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                await asyncio.sleep(10)
+            return "done"
+
+        with patch("src._retry._retry_delay", return_value=(0, "timeout")):
+            result = asyncio.run(aretry_with_backoff(slow_then_fast, timeout=0.05, max_retries=2))
+        assert result == "done"
+        assert attempts == [0, 1]
+
+    def test_prompts_in_flight_are_limited(self):
+        in_flight = []
+        peak = [0]
+
+        async def fake_template(**kwargs):
+            in_flight.append(kwargs["filename"])
+            peak[0] = max(peak[0], len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return "ok"
+
+        async def run_all():
+            return await asyncio.gather(
+                *(arun_prompt(folder="f", filename=f"{i}.prompty", inputs={}) for i in range(6))
+            )
+
+        set_prompt_limiter(AdaptiveLimiter(2))
+        try:
+            with patch("src._prompt_runner._arun_prompt_template", side_effect=fake_template), patch(
+                "src._credential.in_ci", return_value=False
+            ):
+                assert asyncio.run(run_all()) == ["ok"] * 6
+        finally:
+            set_prompt_limiter(None)
+        assert peak[0] == 2
+
+    def test_async_clients_are_pooled_per_event_loop(self):
+        aio = MagicMock()
+        aio.ChatCompletionsClient.side_effect = lambda **kwargs: MagicMock()
+
+        async def get_two():
+            return _get_async_inference_client("https://a.example.com/models", api_key="key"), (
+                _get_async_inference_client("https://a.example.com/models", api_key="key")
+            )
+
+        clear_inference_clients()
+        try:
+            with patch.dict(sys.modules, {"azure.ai.inference.aio": aio}):
+                first, second = asyncio.run(get_two())
+                assert first is second
+                third, _ = asyncio.run(get_two())
+                assert third is not first
+            assert get_inference_client_stats() == {"created": 2, "reused": 2}
+        finally:
+            clear_inference_clients()
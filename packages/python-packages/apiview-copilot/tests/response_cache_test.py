@@ -0,0 +1,151 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name
+
+"""
+Tests for the prompt response cache in _response_cache.py and its use by _prompt_runner.py.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src._prompt_runner import (
+    _execute_prompt_template,
+    _prepare_completion,
+    arun_prompt,
+    clear_inference_clients,
+    run_prompt,
+)
+from src._response_cache import ResponseCache, response_cache_key, set_response_cache
+
+PROMPTY = """---
+name: Test
+model:
+  api: chat
+  configuration:
+    azure_deployment: gpt-test
+  parameters:
+    max_completion_tokens: 100
+    response_format: json_object
+---
+system:
+You review code.
+
+user:
+{{ content }}
+"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache" / "responses.sqlite"))
+    yield cache
+    cache.close()
+
+
+class TestResponseCache:
+    def test_get_and_put_count_hits_and_misses(self, cache):
+        assert cache.get("key") is None
+        cache.put("key", "value")
+        assert cache.get("key") == "value"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expired_entries_are_misses(self, cache, monkeypatch):
+        cache.put("key", "value")
+        now = time.time()
+        monkeypatch.setattr("src._response_cache.time.time", lambda: now + cache.ttl + 1)
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path, monkeypatch):
+        clock = iter(range(100))
+        monkeypatch.setattr("src._response_cache.time.time", lambda: float(next(clock)))
+        cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        cache.close()
+
+    def test_key_depends_on_every_part_of_the_request(self):
+        base = {
+            "prompty_hash": "h",
+            "messages": [("user", "hi")],
+            "endpoint": "https://a.example.com/models",
+            "model": "m",
+            "parameters": {"seed": 1},
+        }
+        key = response_cache_key(**base)
+        assert response_cache_key(**base) == key
+        changes = (
+            ("prompty_hash", "h2"),
+            ("messages", [("user", "ho")]),
+            ("endpoint", "https://b.example.com/models"),
+            ("model", "m2"),
+        )
+        for name, value in changes:
+            assert response_cache_key(**{**base, name: value}) != key
+        assert response_cache_key(**{**base, "parameters": {"seed": 2}}) != key
+
+
+class TestPromptRunnerCache:
+    def test_identical_request_is_answered_from_cache(self, cache, tmp_path):
+        prompty_path = tmp_path / "test.prompty"
+        prompty_path.write_text(PROMPTY, encoding="utf-8")
+        client = MagicMock()
+        client.complete.return_value.choices = [MagicMock(message=MagicMock(content=json.dumps({"ok": True})))]
+        inference = MagicMock(ChatCompletionsClient=MagicMock(return_value=client))
+        settings = MagicMock()
+        settings.get.return_value = "https://foundry.example.com"
+
+        set_response_cache(cache)
+        try:
+            with patch.dict(sys.modules, {"azure.ai.inference": inference, "azure.ai.inference.models": MagicMock()}):
+                with patch("src._settings.SettingsManager", return_value=settings), patch(
+                    "src._credential.get_credential"
+                ):
+                    first = _execute_prompt_template(prompty_path, inputs={"content": "class Foo"})
+                    second = _execute_prompt_template(prompty_path, inputs={"content": "class Foo"})
+                    _execute_prompt_template(prompty_path, inputs={"content": "class Bar"})
+        finally:
+            set_response_cache(None)
+            clear_inference_clients()
+
+        assert first == second == json.dumps({"ok": True})
+        assert client.complete.call_count == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_cached_prompt_does_not_wait_for_a_limiter_slot(self, cache, tmp_path):
+        prompty_path = tmp_path / "test.prompty"
+        prompty_path.write_text(PROMPTY, encoding="utf-8")
+        limiter = MagicMock()
+        settings = MagicMock()
+        settings.get.return_value = "https://foundry.example.com"
+        set_response_cache(cache)
+        try:
+            with patch("src._settings.SettingsManager", return_value=settings), patch(
+                "src._utils.get_prompt_path", return_value=str(prompty_path)
+            ), patch("src._retry.get_prompt_limiter", return_value=limiter), patch(
+                "src._prompt_runner._run_prompt_template"
+            ) as run_template:
+                cache.put(_prepare_completion(prompty_path, {"content": "x"}).cache_key, json.dumps({"ok": True}))
+                first = run_prompt(folder="test", filename="test", inputs={"content": "x"})
+                second = asyncio.run(arun_prompt(folder="test", filename="test", inputs={"content": "x"}))
+        finally:
+            set_response_cache(None)
+
+        assert first == second == json.dumps({"ok": True})
+        run_template.assert_not_called()
+        assert not limiter.method_calls
@@ -0,0 +1,86 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name
+
+"""
+Tests for the /api-review/start endpoint.
+"""
+
+import importlib
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src._review_scheduler import ReviewScheduler
+
+REQUEST = {"language": "python", "target": "class Foo:\n    pass\n"}
+
+
+@pytest.fixture
+def app_module():
+    """Import app.py without connecting to App Configuration, Cosmos DB or Azure Monitor."""
+    # Modules imported for the first time here are dropped afterwards, since they hold the mocks
+    with patch.dict(sys.modules, {"azure.monitor.opentelemetry": MagicMock()}), patch(
+        "src._database_manager.DatabaseManager.get_instance", return_value=MagicMock()
+    ), patch("src._settings.SettingsManager"):
+        sys.modules.pop("app", None)
+        module = importlib.import_module("app")
+        auth = importlib.import_module("src._auth")
+        module.app.dependency_overrides[auth._require_auth] = lambda: {"roles": ["Write"]}
+        with patch.object(module, "ApiViewReview") as reviewer_cls:
+            reviewer_cls.return_value.job_id = "job-1"
+            yield module
+
+
+class TestStartReviewJob:
+    def test_creates_the_record_before_queueing(self, app_module):
+        scheduler = MagicMock(spec=ReviewScheduler, queued=0, max_queue_size=10)
+        app_module.db_manager.review_jobs.create.side_effect = (
+            lambda *args, **kwargs: scheduler.submit.assert_not_called()
+        )
+        with patch.object(app_module, "review_scheduler", scheduler):
+            response = TestClient(app_module.app).post("/api-review/start", json=REQUEST)
+        assert response.status_code == 202
+        assert response.json() == {"jobId": "job-1"}
+        app_module.db_manager.review_jobs.create.assert_called_once()
+        scheduler.submit.assert_called_once()
+
+    def test_failed_create_does_not_queue_the_job(self, app_module):
+        scheduler = MagicMock(spec=ReviewScheduler, queued=0, max_queue_size=10)
+        app_module.db_manager.review_jobs.create.side_effect = RuntimeError("Cosmos is unavailable")
+        with patch.object(app_module, "review_scheduler", scheduler):
+            response = TestClient(app_module.app, raise_server_exceptions=False).post("/api-review/start", json=REQUEST)
+        assert response.status_code == 500
+        scheduler.submit.assert_not_called()
+        app_module.ApiViewReview.return_value.close.assert_called_once()
+
+    def test_full_queue_responds_429_with_retry_after(self, app_module):
+        scheduler = ReviewScheduler(max_workers=1, max_queue_size=0)
+        with patch.object(app_module, "review_scheduler", scheduler):
+            response = TestClient(app_module.app).post("/api-review/start", json=REQUEST)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == str(scheduler.retry_after())
+        app_module.ApiViewReview.assert_not_called()
+        app_module.db_manager.review_jobs.create.assert_not_called()
+
+    def test_queue_filled_during_create_marks_the_job_failed(self, app_module):
+        scheduler = ReviewScheduler(max_workers=1, max_queue_size=1)
+
+        def fill_queue(*args, **kwargs):
+            scheduler.max_queue_size = 0
+
+        app_module.db_manager.review_jobs.create.side_effect = fill_queue
+        with patch.object(app_module, "review_scheduler", scheduler):
+            response = TestClient(app_module.app).post("/api-review/start", json=REQUEST)
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        upsert = app_module.db_manager.review_jobs.upsert
+        upsert.assert_called_once()
+        assert upsert.call_args.kwargs["data"]["status"] == "Error"
+        assert scheduler.queued == 0
@@ -0,0 +1,305 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name,protected-access
+
+"""
+Tests for streaming review comments through the ReviewPipeline.
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Mock azure dependencies before importing
+sys.modules["azure.cosmos"] = MagicMock()
+sys.modules["azure.cosmos.exceptions"] = MagicMock()
+sys.modules["azure.ai.inference"] = MagicMock()
+sys.modules["azure.ai.inference.models"] = MagicMock()
+
+from src._apiview_reviewer import ApiViewReview
+from src._models import Comment
+from src._review_pipeline import AsyncReviewPipeline, ReviewPipeline
+from src._sectioned_document import LineData, Section
+
+
+def _section(*line_nos):
+    return Section([LineData(line_no=n, indent=0, line=f"line {n}") for n in line_nos])
+
+
+def _comment(line_no, text="comment"):
+    return Comment(line_no=line_no, bad_code="code", suggestion=None, comment=text, guideline_ids=["python_design.a"])
+
+
+class TestReviewPipeline:
+    def test_line_waits_for_every_section_containing_it(self):
+        # line 1 is a header repeated in both sections, line 2 is only in the first one
+        sections = [_section(1, 2), _section(1, 3)]
+        processed = {}
+        slow_section = threading.Event()
+        line_2_processed = threading.Event()
+
+        def process_line(line_no, comments):
+            processed[line_no] = [c.comment for c in comments]
+            if line_no == 2:
+                line_2_processed.set()
+
+        def wait_for_slow_section():
+            assert slow_section.wait(5)
+            return {"comments": [_comment(1, "second")]}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pipeline = ReviewPipeline(executor, sections, process_line)
+            pipeline.submit_section(1, {"slow": wait_for_slow_section}, lambda results: results["slow"]["comments"])
+            pipeline.submit_section(
+                0, {"fast": lambda: {"comments": [_comment(1, "first"), _comment(2)]}}, lambda r: r["fast"]["comments"]
+            )
+            pipeline.close()
+            # line 2 is processed while the second section is still running, line 1 is not
+            assert line_2_processed.wait(5)
+            assert 1 not in processed
+            slow_section.set()
+            assert pipeline.wait(5)
+
+        # comments keep the order of their sections, whichever section finished first
+        assert processed == {1: ["first", "second"], 2: ["comment"]}
+
+    def test_unknown_lines_wait_for_all_sections(self):
+        processed = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pipeline = ReviewPipeline(executor, [_section(1), _section(2)], lambda n, c: processed.append((n, len(c))))
+            pipeline.submit_section(0, {"a": lambda: None}, lambda r: [_comment(0)])
+            pipeline.submit_section(1, {"b": lambda: None}, lambda r: [_comment(0), _comment(2)])
+            pipeline.close()
+            assert pipeline.wait(5)
+        assert sorted(processed) == [(0, 2), (2, 1)]
+
+    def test_late_comments_follow_the_line_once_it_is_processed(self):
+        calls = []
+        slow_section = threading.Event()
+        first_call_started = threading.Event()
+        finish_first_call = threading.Event()
+
+        def process_line(line_no, comments, late=False):
+            if not late:
+                first_call_started.set()
+                assert finish_first_call.wait(5)
+            calls.append((line_no, [c.comment for c in comments], late))
+
+        def wait_for_slow_section():
+            assert slow_section.wait(5)
+            # a line the second section does not contain, which was already handed off
+            return [_comment(1, "late")]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pipeline = ReviewPipeline(executor, [_section(1), _section(2)], process_line)
+            pipeline.submit_section(1, {"slow": wait_for_slow_section}, lambda r: r["slow"])
+            pipeline.submit_section(0, {"fast": lambda: [_comment(1, "first")]}, lambda r: r["fast"])
+            pipeline.close()
+            assert first_call_started.wait(5)
+            slow_section.set()
+            # the late comments wait for the line's first call
+            assert not pipeline.wait(0.2)
+            finish_first_call.set()
+            assert pipeline.wait(5)
+        assert calls == [(1, ["first"], False), (1, ["late"], True)]
+
+
+class TestAsyncReviewPipeline:
+    def test_line_waits_for_every_section_containing_it(self):
+        processed = {}
+
+        async def process_line(line_no, comments):
+            processed[line_no] = [c.comment for c in comments]
+
+        async def run():
+            slow_section = asyncio.Event()
+
+            async def fast():
+                return [_comment(1, "first"), _comment(2)]
+
+            async def slow():
+                await slow_section.wait()
+                return [_comment(1, "second")]
+
+            async def collect(results):
+                return next(iter(results.values()))
+
+            pipeline = AsyncReviewPipeline([_section(1, 2), _section(1, 3)], process_line)
+            pipeline.submit_section(1, {"slow": slow}, collect)
+            pipeline.submit_section(0, {"fast": fast}, collect)
+            for _ in range(10):
+                await asyncio.sleep(0)
+            assert processed == {2: ["comment"]}
+            slow_section.set()
+            await pipeline.wait()
+
+        asyncio.run(run())
+        assert processed == {1: ["first", "second"], 2: ["comment"]}
+
+    def test_late_comments_follow_the_line_once_it_is_processed(self):
+        calls = []
+
+        async def process_line(line_no, comments, late=False):
+            if not late:
+                await asyncio.sleep(0.05)
+            calls.append((line_no, [c.comment for c in comments], late))
+
+        async def run():
+            async def fast():
+                return [_comment(1, "first")]
+
+            async def slow():
+                await asyncio.sleep(0.01)
+                return [_comment(1, "late")]
+
+            async def collect(results):
+                return next(iter(results.values()))
+
+            pipeline = AsyncReviewPipeline([_section(1), _section(2)], process_line)
+            pipeline.submit_section(0, {"fast": fast}, collect)
+            pipeline.submit_section(1, {"slow": slow}, collect)
+            await pipeline.wait()
+
+        asyncio.run(run())
+        assert calls == [(1, ["first"], False), (1, ["late"], True)]
+
+
+@pytest.fixture
+def review():
+    mock_search = MagicMock()
+    mock_search.language_guidelines = MagicMock(results=[])
+    mock_search.search_all.return_value = MagicMock(results=[])
+    mock_search.search_all_by_id.return_value = []
+    mock_search.build_context.return_value = MagicMock(to_markdown=lambda: "")
+
+    with patch("src._apiview_reviewer.SearchManager", return_value=mock_search), patch(
+        "src._apiview_reviewer.SettingsManager", return_value=MagicMock()
+    ):
+        r = ApiViewReview(
+            target="class Foo:\\n    def bar(self): ...\\n    def baz(self): ...", base=None, language="python"
+        )
+    return r
+
+
+def _fake_prompts(*, folder, filename, inputs, **kwargs):
+    if filename == "guidelines_review.prompty":
+        return json.dumps(
+            {
+                "comments": [
+                    {
+                        "line_no": "2",
+                        "bad_code": "def bar",
+                        "suggestion": None,
+                        "comment": "g2",
+                        "guideline_ids": ["a"],
+                    },
+                    {
+                        "line_no": "3",
+                        "bad_code": "def baz",
+                        "suggestion": None,
+                        "comment": "g3",
+                        "guideline_ids": ["a"],
+                    },
+                ]
+            }
+        )
+    if filename == "context_review.prompty":
+        return json.dumps(
+            {
+                "comments": [
+                    {"line_no": "2", "bad_code": "def bar", "suggestion": None, "comment": "c2", "memory_ids": ["m"]}
+                ]
+            }
+        )
+    if filename == "merge_comments.prompty":
+        merged = inputs["comments"][0].model_dump()
+        merged["comment"] = "+".join(c.comment for c in inputs["comments"])
+        return json.dumps({"comments": [merged]})
+    if filename == "filter_comment_with_metadata.prompty":
+        return json.dumps({"action": "DISCARD" if inputs["content"]["comment"] == "g3" else "KEEP"})
+    if filename == "judge_comment_confidence.prompty":
+        return json.dumps({"severity": "should", "results": [{"answer": "YES"}, {"answer": "NO"}]})
+    raise AssertionError(f"Unexpected prompt {filename}")
+
+
+class TestReviewSections:
+    def test_comments_are_merged_filtered_and_scored(self, review):
+        review.run_prompt = MagicMock(side_effect=_fake_prompts)
+        review._review_sections()
+
+        filenames = [call.kwargs["filename"] for call in review.run_prompt.call_args_list]
+        assert filenames.count("merge_comments.prompty") == 1
+        assert filenames.count("filter_comment_with_metadata.prompty") == 2
+        assert filenames.count("judge_comment_confidence.prompty") == 1
+        assert [(c.line_no, c.comment) for c in review.results.comments] == [(2, "g2+c2")]
+        assert review.results.comments[0].severity == "SHOULD"
+        assert review.results.comments[0].confidence_score == 0.5
+        assert review._stage_counts["generated"] == 3
+        assert review._stage_counts["hard_filter_discarded"] == 1
+        # the IDs cited by the section are looked up once, not again when merging and scoring
+        review.search.search_all_by_id.assert_called_once()
+        assert review.search.search_all_by_id.call_args.args[0] == ["m"]
+
+    def test_late_comments_are_merged_into_the_line_result(self, review):
+        review.run_prompt = MagicMock(side_effect=_fake_prompts)
+        review._start_review_sections()
+        review._process_line(2, [_comment(2, "first")])
+        review._process_line(2, [_comment(2, "late")], late=True)
+
+        # one comment for the line, merged from the kept comment and the late one, and scored once
+        assert [(c.line_no, c.comment) for c in review.results.comments] == [(2, "first+late")]
+        assert len(review._judge_results) == 1
+        assert review._stage_counts["merged"] == 1
+
+    def test_late_comments_on_a_discarded_line_are_not_counted_again(self, review):
+        review.run_prompt = MagicMock(side_effect=_fake_prompts)
+        review._start_review_sections()
+        review._process_line(3, [_comment(3, "g3")])
+        review._process_line(3, [_comment(3, "late")], late=True)
+
+        assert [(c.line_no, c.comment) for c in review.results.comments] == [(3, "late")]
+        assert review._stage_counts["merged"] == 1
+        assert review._stage_counts["hard_filter_discarded"] == 1
+
+    def test_async_review_matches_threaded_review(self, review):
+        async def fake_prompts(**kwargs):
+            return _fake_prompts(**kwargs)
+
+        review.arun_prompt = MagicMock(side_effect=fake_prompts)
+        asyncio.run(review._areview_sections())
+
+        filenames = [call.kwargs["filename"] for call in review.arun_prompt.call_args_list]
+        assert filenames.count("merge_comments.prompty") == 1
+        assert filenames.count("filter_comment_with_metadata.prompty") == 2
+        assert filenames.count("judge_comment_confidence.prompty") == 1
+        assert [(c.line_no, c.comment) for c in review.results.comments] == [(2, "g2+c2")]
+        assert review.results.comments[0].confidence_score == 0.5
+        assert review._stage_counts["hard_filter_discarded"] == 1
+        review.search.search_all_by_id.assert_called_once()
+
+    def test_async_review_loads_metadata_once_off_the_event_loop(self, review):
+        async def fake_prompts(**kwargs):
+            return _fake_prompts(**kwargs)
+
+        load_threads = []
+
+        def load_filter_metadata():
+            load_threads.append(threading.current_thread())
+            return {"exceptions": "None"}
+
+        review.arun_prompt = MagicMock(side_effect=fake_prompts)
+        review._load_filter_metadata = MagicMock(side_effect=load_filter_metadata)
+        asyncio.run(review._areview_sections())
+
+        # two comments go through the metadata filter, but the file is read once, on a worker thread
+        assert len(load_threads) == 1
+        assert load_threads[0] is not threading.main_thread()
@@ -0,0 +1,118 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+# pylint: disable=missing-class-docstring,missing-function-docstring
+
+"""
+Tests for scheduling review jobs with the ReviewScheduler.
+"""
+
+import asyncio
+
+import pytest
+
+from src._review_scheduler import ReviewQueueFullError, ReviewScheduler, review_size_class
+
+
+def _job(started, name, release=None):
+    async def run():
+        started.append(name)
+        if release is not None:
+            await release.wait()
+
+    return run
+
+
+class TestReviewScheduler:
+    def test_size_classes(self):
+        assert review_size_class("a\nb") == "small"
+        assert review_size_class("a\n" * 2000) == "medium"
+        assert review_size_class("a", base="a\n" * 6000) == "large"
+
+    def test_workers_are_bounded_and_small_jobs_go_first(self):
+        started = []
+
+        async def run():
+            scheduler = ReviewScheduler(max_workers=1)
+            release = asyncio.Event()
+            scheduler.submit("1", _job(started, "java-large-1", release), language="java", size="large")
+            scheduler.submit("2", _job(started, "java-large-2"), language="java", size="large")
+            scheduler.submit("3", _job(started, "python-medium"), language="python", size="medium")
+            scheduler.submit("4", _job(started, "java-small"), language="java", size="small")
+            await asyncio.sleep(0)
+            assert (scheduler.running, scheduler.queued) == (1, 3)
+            release.set()
+            await scheduler.wait()
+            assert (scheduler.running, scheduler.queued) == (0, 0)
+
+        asyncio.run(run())
+        assert started == ["java-large-1", "java-small", "python-medium", "java-large-2"]
+
+    def test_languages_with_fewer_running_jobs_go_first(self):
+        started = []
+
+        async def run():
+            scheduler = ReviewScheduler(max_workers=2)
+            release_java, release_python = asyncio.Event(), asyncio.Event()
+            scheduler.submit("1", _job(started, "java-1", release_java), language="java", size="small")
+            scheduler.submit("2", _job(started, "python-1", release_python), language="python", size="small")
+            scheduler.submit("3", _job(started, "java-2"), language="java", size="small")
+            scheduler.submit("4", _job(started, "python-2", release_python), language="python", size="small")
+            await asyncio.sleep(0)
+            # python-1 frees its worker while java-1 is still running, so python-2 goes ahead of java-2
+            release_python.set()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            assert started[:3] == ["java-1", "python-1", "python-2"]
+            release_java.set()
+            await scheduler.wait()
+
+        asyncio.run(run())
+        assert started == ["java-1", "python-1", "python-2", "java-2"]
+
+    def test_jobs_that_waited_long_enough_are_not_starved(self):
+        started = []
+
+        async def run():
+            scheduler = ReviewScheduler(max_workers=1, aging_seconds=0)
+            release = asyncio.Event()
+            scheduler.submit("1", _job(started, "first", release), language="java", size="small")
+            scheduler.submit("2", _job(started, "large"), language="java", size="large")
+            scheduler.submit("3", _job(started, "small"), language="java", size="small")
+            release.set()
+            await scheduler.wait()
+
+        asyncio.run(run())
+        assert started == ["first", "large", "small"]
+
+    def test_full_queue_rejects_jobs_with_retry_after(self):
+        async def run():
+            scheduler = ReviewScheduler(max_workers=1, max_queue_size=1)
+            release = asyncio.Event()
+            scheduler.submit("1", _job([], "running", release), language="java", size="small")
+            scheduler.submit("2", _job([], "queued"), language="java", size="small")
+            with pytest.raises(ReviewQueueFullError) as exc_info:
+                scheduler.submit("3", _job([], "rejected"), language="java", size="small")
+            assert exc_info.value.retry_after >= 1
+            release.set()
+            await scheduler.wait()
+
+        asyncio.run(run())
+
+    def test_failed_job_frees_its_worker(self):
+        started = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def run():
+            scheduler = ReviewScheduler(max_workers=1)
+            scheduler.submit("1", fail, language="java", size="small")
+            scheduler.submit("2", _job(started, "next"), language="java", size="small")
+            await scheduler.wait()
+
+        asyncio.run(run())
+        assert started == ["next"]
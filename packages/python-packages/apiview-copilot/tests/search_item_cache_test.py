@@ -0,0 +1,42 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+# pylint: disable=missing-class-docstring,missing-function-docstring
+
+"""
+Tests for batching search-by-ID lookups with SearchItemCache.
+"""
+
+from unittest.mock import MagicMock
+
+from src._search_manager import SearchItem, SearchItemCache
+
+
+def _item(item_id, kind="guidelines"):
+    return SearchItem({"id": item_id, "kind": kind, "chunk": f"content of {item_id}"})
+
+
+class TestSearchItemCache:
+    def test_prefetch_looks_up_missing_ids_once(self):
+        search = MagicMock()
+        search.search_all_by_id.return_value = [_item("python_design=html=naming"), _item("mem-1", "memories")]
+        cache = SearchItemCache(search)
+        cache.add([_item("python_design=html=known")])
+
+        cache.prefetch(["python_design.html#naming", "mem-1", "missing", "python_design.html#known", "mem-1"])
+        search.search_all_by_id.assert_called_once_with(["python_design.html#naming", "mem-1", "missing"])
+
+        items = cache.get(["mem-1", "missing", "python_design.html#known", "python_design.html#naming"])
+        assert [x.id for x in items] == ["mem-1", "python_design=html=known", "python_design=html=naming"]
+        # IDs that were not found are remembered too
+        search.search_all_by_id.assert_called_once()
+
+    def test_get_returns_copies(self):
+        search = MagicMock()
+        search.search_all_by_id.return_value = [_item("python_design=html=naming")]
+        cache = SearchItemCache(search)
+        cache.get(["python_design.html#naming"])[0].id = "changed"
+        assert cache.get(["python_design.html#naming"])[0].id == "python_design=html=naming"
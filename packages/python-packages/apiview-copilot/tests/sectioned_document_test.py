@@ -308,3 +308,24 @@ def test_multiple_classes_with_decorators():
 
         if "public class Bar" in section_text:
             assert "@Builder" in section_text, f"Bar class section should include @Builder.\nSection:\n{section_text}"
+
+
+def test_large_diff_document_keeps_every_line_once_and_in_order():
+    raw = []
+    for n in range(2000):
+        raw.extend(
+            [
+                f"{4 * n + 1}:  @Fluent",
+                f"{4 * n + 2}:  class C{n} {{",
+                f"{4 * n + 3}: +  void m();",
+                f"{4 * n + 4}:  }}",
+            ]
+        )
+
+    doc = SectionedDocument(lines=raw, max_chunk_size=50)
+
+    lines = [ld for section in doc for ld in section.lines]
+    assert [ld.line_no for ld in lines] == list(range(1, 8001))
+    assert [ld.git_status for ld in lines[:4]] == [" ", " ", "+", " "]
+    # each section starts with a class's decorator, and holds whole classes
+    assert all(section.lines[0].line == "@Fluent" and len(section.lines) % 4 == 0 for section in doc)
@@ -1,4 +1,4 @@
-import os
+import sys
 
 from ._version import VERSION
 from ._stub_generator import StubGenerator
@@ -28,13 +28,12 @@ def console_entry_point():
     print("Running apiview-stub-generator version {}".format(__version__))
     stub_generator = StubGenerator()
     apiview = stub_generator.generate_tokens()
-    json_tokens = stub_generator.serialize(apiview)
     # Write to JSON file
-    out_file_path = stub_generator.out_path
-    # Generate JSON file name if outpath doesn't have json file name
-    if not out_file_path.endswith(".json"):
-        out_file_path = os.path.join(
-            stub_generator.out_path, "{0}_python.json".format(apiview.package_name)
-        )
-    with open(out_file_path, "w") as json_file:
-        json_file.write(json_tokens)
+    stub_generator.write(apiview, stub_generator.get_out_file_path(apiview))
+
+
+def batch_entry_point():
+    from ._batch import main
+
+    print("Running apiview-stub-generator version {} in batch mode".format(__version__))
+    sys.exit(main())
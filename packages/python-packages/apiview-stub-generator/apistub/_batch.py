@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Generate token files for many packages in one process.
+
+Packages are processed one after the other by separate StubGenerator runs that share
+the warm interpreter, a single --jobs worker pool and the per-file symbol table and
+astroid caches. Cache entries are kept only for files that have not changed on disk,
+so common dependencies such as azure-core are parsed once per batch while anything
+reinstalled between packages is parsed again. pylint still runs in its own subprocess
+for each package so that every analysis starts from a clean astroid state.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import traceback
+from typing import List, NamedTuple, Optional
+
+from apistub._stub_generator import StubGenerator
+
+PACKAGE_EXTENSIONS = (".whl", ".zip", ".tar.gz")
+
+
+class BatchResult(NamedTuple):
+    """Outcome of generating the token file for one package of a batch."""
+
+    pkg_path: str
+    out_file_path: Optional[str]
+    error: Optional[str]
+    seconds: float
+
+
+def _is_package_root(path: str) -> bool:
+    return any(os.path.exists(os.path.join(path, name)) for name in ("setup.py", "pyproject.toml"))
+
+
+def find_packages(paths: List[str]) -> List[str]:
+    """Expand *paths* into the packages to generate.
+
+    A directory that is not itself a package root is replaced by the wheels and
+    sdists it contains, in sorted order.
+    """
+    packages = []
+    for path in paths:
+        if os.path.isdir(path) and not _is_package_root(path):
+            packages.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(PACKAGE_EXTENSIONS)
+            )
+        else:
+            packages.append(path)
+    return packages
+
+
+def unload_namespace(namespace: str) -> None:
+    """Remove a generated package's modules from sys.modules.
+
+    A later package in the batch may be another build of the same package, which
+    must not be served from the modules imported for the previous one.
+    """
+    if not namespace:
+        return
+    prefix = namespace + "."
+    for name in [m for m in sys.modules if m == namespace or m.startswith(prefix)]:
+        del sys.modules[name]
+
+
+def generate_batch(pkg_paths: List[str], *, out_path: str, jobs: int = 1, **kwargs) -> List[BatchResult]:
+    """Generate a token file for each package in *pkg_paths* and write it to the *out_path* directory.
+
+    A package that fails is logged and reported in its BatchResult; the remaining packages
+    are still generated.
+
+    :param list[str] pkg_paths: Package source roots, WHL, ZIP or TAR files.
+    :param str out_path: Directory in which to write the token files.
+    :param int jobs: Number of worker processes, shared by all packages.
+    :keyword kwargs: Other StubGenerator options, applied to every package.
+    """
+    from apistub._parallel import WorkerPool
+
+    results: List[BatchResult] = []
+    pool = WorkerPool(jobs) if jobs > 1 or kwargs.get("isolate_imports") else None
+    try:
+        for index, pkg_path in enumerate(pkg_paths):
+            print("apistubgen: [{0}/{1}] {2}".format(index + 1, len(pkg_paths), pkg_path))
+            start = time.monotonic()
+            saved_path = list(sys.path)
+            stub_generator = None
+            try:
+                if not os.path.exists(pkg_path):
+                    raise FileNotFoundError("Package path [{}] is invalid".format(pkg_path))
+                stub_generator = StubGenerator(
+                    pkg_path=pkg_path,
+                    out_path=out_path,
+                    jobs=jobs,
+                    worker_pool=pool,
+                    # The first package starts from a clean slate, as in a single run.
+                    keep_caches=index > 0,
+                    **kwargs,
+                )
+                apiview = stub_generator.generate_tokens()
+                out_file_path = stub_generator.get_out_file_path(apiview)
+                stub_generator.write(apiview, out_file_path)
+                results.append(BatchResult(pkg_path, out_file_path, None, time.monotonic() - start))
+            except Exception as err:  # pylint: disable=broad-except
+                logging.error("Failed to generate APIView for {0}: {1}".format(pkg_path, err))
+                traceback.print_exc(file=sys.stderr)
+                results.append(BatchResult(pkg_path, None, str(err) or type(err).__name__, time.monotonic() - start))
+            finally:
+                # Drop a --venv-dir environment activated for this package.
+                sys.path[:] = saved_path
+                if stub_generator:
+                    unload_namespace(stub_generator.namespace)
+    finally:
+        if pool:
+            pool.shutdown()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Parses many Python packages in one process and generates a JSON token file for each."
+    )
+    parser.add_argument(
+        "--pkg-path",
+        nargs="+",
+        required=True,
+        help=(
+            "Paths to package source roots, WHL, ZIP or TAR files. A directory that is not a package root "
+            "stands for the WHL, ZIP and TAR files it contains."
+        ),
+    )
+    parser.add_argument(
+        "--out-path",
+        default=os.getcwd(),
+        help=("Directory in which to write the generated JSON files. Defaults to CWD."),
+    )
+    parser.add_argument(
+        "--temp-path",
+        default=tempfile.gettempdir(),
+        help=("Extract packages to the specified temporary path. Defaults to a random temp dir."),
+    )
+    parser.add_argument(
+        "--gzip",
+        help=("Compress the generated JSON files with gzip."),
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--verbose",
+        help=("Enable verbose logging."),
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--skip-pylint",
+        help=("Skips running pylint on the packages to obtain diagnostics."),
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--scoped-pylint",
+        help=("Run only the azure-pylint-guidelines-checker checkers, on the files of importable packages."),
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help=("Number of worker processes, shared by all packages. Defaults to 1 (serial)."),
+    )
+    parser.add_argument(
+        "--isolate-imports",
+        help=("Import and inspect modules in worker processes even with --jobs 1."),
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help=("Directory in which to cache per-file parse results and per-package pylint diagnostics across runs."),
+    )
+    parser.add_argument(
+        "--venv-dir",
+        default=None,
+        help=("Directory in which to create and reuse virtual environments keyed by each package's dependencies."),
+    )
+    parser.add_argument(
+        "--profile",
+        help=("Write a JSON report of per-phase timings next to each token file."),
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-pstats",
+        help=("Also run cProfile and write its stats next to each token file. Implies --profile."),
+        default=False,
+        action="store_true",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.out_path):
+        os.makedirs(args.out_path)
+    pkg_paths = find_packages(args.pkg_path)
+    results = generate_batch(
+        pkg_paths,
+        out_path=args.out_path,
+        jobs=max(args.jobs, 1),
+        isolate_imports=args.isolate_imports,
+        temp_path=args.temp_path,
+        gzip=args.gzip,
+        verbose=args.verbose,
+        skip_pylint=args.skip_pylint,
+        scoped_pylint=args.scoped_pylint,
+        cache_dir=args.cache_dir,
+        venv_dir=args.venv_dir,
+        profile=args.profile,
+        profile_pstats=args.profile_pstats,
+    )
+    failed = [r for r in results if r.error]
+    for result in results:
+        status = "FAILED ({})".format(result.error) if result.error else result.out_file_path
+        print("apistubgen: {0} [{1:.1f}s]: {2}".format(result.pkg_path, result.seconds, status))
+    print("apistubgen: generated {0} of {1} packages.".format(len(results) - len(failed), len(results)))
+    return 1 if failed else 0
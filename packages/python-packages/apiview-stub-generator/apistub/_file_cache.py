@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+from apistub._version import VERSION
+
+
+class FileCache:
+    """Persistent cache of per-file parse artifacts, keyed by the file's content hash.
+
+    Entries live under ``<cache_dir>/apistub-<version>/<kind>/<digest>.json`` so that a
+    new apistub release never reads artifacts produced by an older one.
+
+    :param str cache_dir: Directory in which to store cache entries.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.root = os.path.join(cache_dir, "apistub-{}".format(VERSION))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_content(content) -> str:
+        if isinstance(content, str):
+            content = content.encode("utf-8", errors="surrogatepass")
+        return hashlib.sha256(content).hexdigest()
+
+    @classmethod
+    def hash_file(cls, file_path: str) -> Optional[str]:
+        try:
+            with open(file_path, "rb") as f:
+                return cls.hash_content(f.read())
+        except OSError:
+            return None
+
+    def _entry_path(self, kind: str, digest: str) -> str:
+        return os.path.join(self.root, kind, "{}.json".format(digest))
+
+    def get(self, kind: str, digest: Optional[str]) -> Optional[Any]:
+        """Return the cached value for *digest*, or None on a miss."""
+        if not digest:
+            return None
+        try:
+            with open(self._entry_path(kind, digest), "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, kind: str, digest: Optional[str], value: Any) -> None:
+        if not digest:
+            return
+        entry_path = self._entry_path(kind, digest)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            # Write to a temp file and rename so concurrent runs never read a partial entry.
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, entry_path)
+        except OSError as err:
+            logging.debug("Unable to write cache entry {0}: {1}".format(entry_path, err))
+
+
+# Cache used by the current StubGenerator run; None when caching is disabled.
+_FILE_CACHE: Optional[FileCache] = None
+
+
+def get_file_cache() -> Optional[FileCache]:
+    return _FILE_CACHE
+
+
+def set_file_cache(cache: Optional[FileCache]) -> None:
+    global _FILE_CACHE
+    _FILE_CACHE = cache
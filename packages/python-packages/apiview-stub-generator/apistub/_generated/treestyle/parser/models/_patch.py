@@ -10,7 +10,7 @@ import os
 import re
 import logging
 import platform
-from typing import List, Optional, Union
+from typing import Any, Iterator, List, Optional, Tuple, Union
 from apistub._version import VERSION
 from apistub._node_index import NodeIndex
 from apistub._metadata_map import MetadataMap
@@ -20,8 +20,6 @@ from apistub._metadata_map import MetadataMap
 ### installing azure-core as a dependency and also parsing the azure-core package.
 from ._models import (
     CodeFile,
-    ReviewToken as TokenImpl,
-    ReviewLine as ReviewLineImpl,
     CodeDiagnostic as Diagnostic,
     CrossLanguageMetadata,
 )
@@ -114,6 +112,11 @@ class ApiView(CodeFile):
         self.indent = 0
         self.namespace = namespace
         self.node_index = NodeIndex()
+        # (target_id, text) of every diagnostic in self.diagnostics, used to drop duplicates
+        self._diagnostic_keys = set()
+        # When set to a list, receives every diagnostic passed to add_code_diagnostic, duplicates
+        # included, so a module's manifest entry does not depend on the modules before it.
+        self.diagnostic_log = None
 
     def add_diagnostic(self, *, err, target_id):
         text = f"{err.message} [{err.symbol}]"
@@ -123,8 +126,15 @@ class ApiView(CodeFile):
             help_link_uri=err.help_link,
             target_id=target_id,
         )
+        self.add_code_diagnostic(diagnostic)
+
+    def add_code_diagnostic(self, diagnostic):
+        if self.diagnostic_log is not None:
+            self.diagnostic_log.append(diagnostic)
         # Avoid duplicate diagnostics with the same text and target
-        if not any(d.text == diagnostic.text and d.target_id == diagnostic.target_id for d in self.diagnostics):
+        key = (diagnostic.target_id, diagnostic.text)
+        if key not in self._diagnostic_keys:
+            self._diagnostic_keys.add(key)
             self.diagnostics.append(diagnostic)
 
     def add_navigation(self, navigation):
@@ -144,10 +154,173 @@ class ApiView(CodeFile):
         self.review_lines.set_blank_lines(2)
 
 
-class ReviewToken(TokenImpl):
+class _CompactField:
+    """A field of a _CompactModel, stored in a slot and serialized under its REST name."""
+
+    __slots__ = ("index", "rest_name", "slot")
+
+    def __init__(self, index: int, rest_name: str, slot):
+        self.index = index
+        self.rest_name = rest_name
+        self.slot = slot
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return self.slot.__get__(obj, objtype)
+
+    def __set__(self, obj, value) -> None:
+        current = self.slot.__get__(obj)
+        if value is None:
+            # Like the generated models, setting a field to None removes it.
+            if current is not None:
+                obj._remove_from_order(self.index)
+                self.slot.__set__(obj, None)
+            return
+        if current is None:
+            obj._order = (obj._order << _ORDER_BITS) | (self.index + 1)
+        self.slot.__set__(obj, list(value) if isinstance(value, list) else value)
+
+
+_ORDER_BITS = 4
+_ORDER_MASK = (1 << _ORDER_BITS) - 1
+
+
+class _CompactModel:
+    """Slotted replacement for a generated model that is created in large numbers.
 
-    def __init__(self, *args, **kwargs) -> None:  # pylint: disable=useless-super-delegation
-        super().__init__(*args, **kwargs)
+    The generated models keep their fields in a dict and deserialize on every attribute
+    access. A compact model stores each field in a slot instead, and records the order
+    in which fields were first set as one int, so that ``items()`` (used by
+    ``SdkJSONEncoder``) yields the same keys in the same order as the generated model.
+
+    Subclasses list their fields in ``_FIELDS`` as ``(attribute name, REST name)`` pairs.
+    """
+
+    __slots__ = ("_order",)
+    _is_model = True
+    _FIELDS: Tuple[Tuple[str, str], ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "_FIELDS" not in cls.__dict__:
+            return
+        fields = []
+        for index, (attr, rest_name) in enumerate(cls._FIELDS):
+            field = _CompactField(index, rest_name, cls.__dict__["_" + attr])
+            setattr(cls, attr, field)
+            fields.append(field)
+        cls._fields = tuple(fields)
+        cls._by_rest_name = {field.rest_name: field for field in fields}
+
+    def __init__(self, **kwargs) -> None:
+        self._order = 0
+        for field in self._fields:
+            field.slot.__set__(self, None)
+        for attr, value in kwargs.items():
+            if not isinstance(getattr(type(self), attr, None), _CompactField):
+                raise TypeError(f"{type(self).__name__}.__init__() got an unexpected keyword argument '{attr}'")
+            setattr(self, attr, value)
+
+    def _remove_from_order(self, index: int) -> None:
+        order = 0
+        for field in self._ordered_fields():
+            if field.index != index:
+                order = (order << _ORDER_BITS) | (field.index + 1)
+        self._order = order
+
+    def _ordered_fields(self) -> List[_CompactField]:
+        fields = []
+        order = self._order
+        while order:
+            fields.append(self._fields[(order & _ORDER_MASK) - 1])
+            order >>= _ORDER_BITS
+        fields.reverse()
+        return fields
+
+    def __getstate__(self):
+        return [(field.rest_name, field.slot.__get__(self)) for field in self._ordered_fields()]
+
+    def __setstate__(self, state):
+        self._order = 0
+        for field in self._fields:
+            field.slot.__set__(self, None)
+        for rest_name, value in state:
+            self._by_rest_name[rest_name].__set__(self, value)
+
+    # Read-only mapping interface over the REST names, as exposed by the generated models.
+    def __getitem__(self, key: str) -> Any:
+        field = self._by_rest_name.get(key)
+        value = None if field is None else field.slot.__get__(self)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        field = self._by_rest_name.get(key)
+        return field is not None and field.slot.__get__(self) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self._ordered_fields())
+
+    def __eq__(self, other) -> bool:
+        if not hasattr(other, "items"):
+            return False
+        return dict(self.items()) == dict(other.items())
+
+    __hash__ = None  # type: ignore
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return [field.rest_name for field in self._ordered_fields()]
+
+    def values(self) -> List[Any]:
+        return [field.slot.__get__(self) for field in self._ordered_fields()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(field.rest_name, field.slot.__get__(self)) for field in self._ordered_fields()]
+
+    def __repr__(self) -> str:
+        return str(dict(self.items()))
+
+
+class ReviewToken(_CompactModel):
+    """A token in a review line. Serializes like the generated ReviewToken model.
+
+    :keyword kind: Required. Known values are: 0, 1, 2, 3, 4, 5, 6, 7, 8 and 9.
+    :paramtype kind: int or ~treestyle.parser.models.TokenKind
+    :keyword str value: Required.
+    :keyword str navigation_display_name:
+    :keyword str navigate_to_id:
+    :keyword bool skip_diff:
+    :keyword bool is_deprecated:
+    :keyword bool has_suffix_space:
+    :keyword bool has_prefix_space:
+    :keyword bool is_documentation:
+    :keyword list[str] render_classes:
+    """
+
+    _FIELDS = (
+        ("kind", "Kind"),
+        ("value", "Value"),
+        ("navigation_display_name", "NavigationDisplayName"),
+        ("navigate_to_id", "NavigateToId"),
+        ("skip_diff", "SkipDiff"),
+        ("is_deprecated", "IsDeprecated"),
+        ("has_suffix_space", "HasSuffixSpace"),
+        ("has_prefix_space", "HasPrefixSpace"),
+        ("is_documentation", "IsDocumentation"),
+        ("render_classes", "RenderClasses"),
+    )
+    __slots__ = tuple("_" + attr for attr, _ in _FIELDS)
 
     def render(self):
         return f"{self.has_prefix_space * ' '}{self.value}{self.has_suffix_space * ' '}"
@@ -230,7 +403,19 @@ class ReviewLines(list):
         return lines
 
 
-class ReviewLine(ReviewLineImpl):
+class ReviewLine(_CompactModel):
+    """A line of the review. Serializes like the generated ReviewLine model."""
+
+    _FIELDS = (
+        ("line_id", "LineId"),
+        ("cross_language_id", "CrossLanguageId"),
+        ("tokens", "Tokens"),
+        ("children", "Children"),
+        ("is_hidden", "IsHidden"),
+        ("is_context_end_line", "IsContextEndLine"),
+        ("related_to_line", "RelatedToLine"),
+    )
+    __slots__ = tuple("_" + attr for attr, _ in _FIELDS) + ("is_handwritten",)
 
     def __init__(
         self,
@@ -253,6 +438,13 @@ class ReviewLine(ReviewLineImpl):
             related_to_line=related_to_line,
         )
 
+    def __getstate__(self):
+        return (super().__getstate__(), self.is_handwritten)
+
+    def __setstate__(self, state):
+        fields, self.is_handwritten = state
+        super().__setstate__(fields)
+
     def add_children(self, children):
         self.children = children
 
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Support for regenerating a token file by re-inspecting only the modules that changed.
+
+A manifest written next to each token file records, per module:
+
+  files        - package source files the module's nodes (and their base classes) come from,
+                 with their content hashes
+  exports      - names the module added to the NodeIndex and the IDs they resolve to
+  lookups      - every type name the module resolved through the NodeIndex and the result
+  diagnostics  - the diagnostics emitted while generating the module's tokens
+
+A module is rebuilt when one of its files changed or when one of its lookups would now
+resolve differently (e.g. a linked class was removed from another module). All other
+modules have their review lines and diagnostics spliced in from the previous token file.
+"""
+
+import gzip
+import inspect
+import json
+import logging
+import os
+import platform
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set
+
+from apistub._file_cache import FileCache
+from apistub._version import VERSION
+from apistub._generated.treestyle.parser.models import CodeDiagnostic
+from apistub._generated.treestyle.parser._model_base import SdkJSONEncoder
+
+MANIFEST_VERSION = 1
+
+
+def _import_root(module_name: str, module_file: str) -> str:
+    """Return the directory that *module_name* is imported relative to."""
+    depth = module_name.count(".") + 1
+    if os.path.basename(module_file) == "__init__.py":
+        depth += 1
+    root = module_file
+    for _ in range(depth):
+        root = os.path.dirname(root)
+    return root
+
+
+def _source_file(obj) -> Optional[str]:
+    try:
+        return inspect.getsourcefile(inspect.unwrap(obj))
+    except (TypeError, OSError, ValueError):
+        return None
+
+
+def _collect_objects(node, objects: list) -> None:
+    obj = getattr(node, "obj", None)
+    if obj is not None:
+        objects.append(obj)
+        # Inherited members come from the base classes' sources.
+        if inspect.isclass(obj):
+            objects.extend(getattr(obj, "__mro__", ())[1:])
+    for child in getattr(node, "child_nodes", None) or []:
+        _collect_objects(child, objects)
+
+
+class ModuleManifest:
+    """Per-module record of what a token file was generated from.
+
+    :param dict context: Settings that affect every module's output. A manifest recorded
+     with a different context is never reused.
+    """
+
+    def __init__(self, context: dict, modules: Optional[Dict[str, dict]] = None):
+        self.context = context
+        self.modules: Dict[str, dict] = modules or {}
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> Optional["ModuleManifest"]:
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as err:
+            logging.warning("Ignoring unreadable manifest {0}: {1}".format(path, err))
+            return None
+        if data.get("ManifestVersion") != MANIFEST_VERSION:
+            return None
+        return cls(data.get("Context", {}), data.get("Modules", {}))
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"ManifestVersion": MANIFEST_VERSION, "Context": self.context, "Modules": self.modules},
+                f,
+                indent=1,
+            )
+
+    @staticmethod
+    def build_context(*, namespace, mapping, pylint_signature) -> dict:
+        mapping_content = json.dumps(
+            [mapping.cross_language_map, mapping.cross_language_package_id, mapping.cross_language_version],
+            sort_keys=True,
+        )
+        return {
+            "ApistubVersion": VERSION,
+            "PythonVersion": platform.python_version(),
+            "Namespace": namespace,
+            "MappingHash": FileCache.hash_content(mapping_content),
+            "Pylint": pylint_signature,
+        }
+
+    @staticmethod
+    def hash_files(pkg_root_path: str, rel_paths) -> Dict[str, Optional[str]]:
+        return {rel: FileCache.hash_file(os.path.join(pkg_root_path, rel)) for rel in rel_paths}
+
+    def record_module(self, module_node, *, pkg_root_path, exports, lookups, diagnostics) -> None:
+        """Record the manifest entry for a freshly generated module."""
+        module_name = module_node.namespace
+        module_file = getattr(module_node.obj, "__file__", None)
+        files: Set[str] = set()
+        if module_file:
+            root = _import_root(module_name, module_file)
+            package_prefix = os.path.relpath(module_file, root).split(os.sep)[0]
+            objects: list = [module_node.obj]
+            _collect_objects(module_node, objects)
+            for obj in objects:
+                source_file = module_file if obj is module_node.obj else _source_file(obj)
+                if not source_file:
+                    continue
+                rel = os.path.relpath(source_file, root)
+                # Only track the package's own files; dependencies such as azure-core are
+                # rendered by name and filtered out of inherited members.
+                if rel.split(os.sep)[0] == package_prefix:
+                    files.add(rel.replace(os.sep, "/"))
+        self.modules[module_name] = {
+            # A file that cannot be found under the package root hashes to None and
+            # forces the module to be rebuilt next time.
+            "files": self.hash_files(pkg_root_path, sorted(files)) if files else {"": None},
+            "exports": exports,
+            "lookups": lookups,
+            "diagnostics": [json.loads(SdkJSONEncoder().encode(d)) for d in diagnostics],
+        }
+
+
+class IncrementalBuild:
+    """Decides which modules to rebuild against a previous token file and manifest."""
+
+    def __init__(self, previous: ModuleManifest, previous_lines: Dict[str, list], pkg_root_path: str):
+        self.previous = previous
+        self.previous_lines = previous_lines
+        self.pkg_root_path = pkg_root_path
+
+    @classmethod
+    def load(cls, previous_path, manifest: Optional[ModuleManifest], context: dict, pkg_root_path):
+        """Return an IncrementalBuild, or None if a full build is required."""
+        if not previous_path or not manifest:
+            return None
+        if manifest.context != context:
+            logging.info("Manifest was recorded with different settings. Regenerating all modules.")
+            return None
+        try:
+            opener = gzip.open if previous_path.endswith(".gz") else open
+            with opener(previous_path, "rt", encoding="utf-8") as f:
+                previous_apiview = json.load(f)
+        except (OSError, ValueError) as err:
+            logging.warning("Unable to read previous token file {0}: {1}".format(previous_path, err))
+            return None
+        previous_lines: Dict[str, list] = {}
+        for line in previous_apiview.get("ReviewLines", []):
+            line_id = line.get("LineId")
+            if line_id in manifest.modules:
+                previous_lines.setdefault(line_id, []).append(line)
+        return cls(manifest, previous_lines, pkg_root_path)
+
+    def changed_modules(self, modules: List[str]) -> List[str]:
+        """Modules that are new or whose recorded source files changed."""
+        changed = []
+        for m in modules:
+            entry = self.previous.modules.get(m)
+            if not entry:
+                changed.append(m)
+                continue
+            files = entry["files"]
+            current = self.hash_files(files)
+            if None in current.values() or current != files:
+                changed.append(m)
+        return changed
+
+    def hash_files(self, files) -> Dict[str, Optional[str]]:
+        return ModuleManifest.hash_files(self.pkg_root_path, [rel for rel in files if rel])
+
+    def relinked_modules(self, modules: List[str], node_ids: Dict[str, str]) -> List[str]:
+        """Unchanged modules with a type name that now resolves to a different ID (or none)."""
+        return [
+            m
+            for m in modules
+            if any(node_ids.get(name) != node_id for name, node_id in self.previous.modules[m]["lookups"].items())
+        ]
+
+    def exports(self, module_name: str) -> Dict[str, str]:
+        return self.previous.modules[module_name]["exports"]
+
+    def splice(self, module_name: str, apiview, manifest: ModuleManifest) -> None:
+        """Copy an unchanged module's review lines, diagnostics and manifest entry."""
+        apiview.review_lines.extend(self.previous_lines.get(module_name, []))
+        entry = self.previous.modules[module_name]
+        for diagnostic in entry["diagnostics"]:
+            apiview.add_code_diagnostic(CodeDiagnostic(diagnostic))
+        manifest.modules[module_name] = entry
+
+
+def seed_index(node_index, node_ids: Dict[str, str]) -> None:
+    """Add ID-only entries for names exported by modules that were not rebuilt."""
+    for name, node_id in node_ids.items():
+        node_index.add(name, SimpleNamespace(namespace_id=node_id))
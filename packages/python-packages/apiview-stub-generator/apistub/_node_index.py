@@ -25,3 +25,40 @@ class NodeIndex:
         if node and hasattr(node, "namespace_id"):
             return node.namespace_id
         return None
+
+
+class DeferredNodeIndex(NodeIndex):
+    """NodeIndex for a worker process that only sees some of the package's modules.
+
+    Names that are not indexed locally resolve to a placeholder ID, which is
+    replaced (or dropped) once the indexes of all workers have been merged.
+    """
+
+    PLACEHOLDER_PREFIX = "\x00deferred:"
+
+    def get_id(self, name):
+        node_id = super().get_id(name)
+        if node_id is None:
+            return self.PLACEHOLDER_PREFIX + name
+        return node_id
+
+    def export_ids(self):
+        """Return a picklable name to navigation ID mapping for this index."""
+        return {name: node.namespace_id for name, node in self.index.items() if hasattr(node, "namespace_id")}
+
+
+class RecordingNodeIndex(NodeIndex):
+    """NodeIndex that records every name resolved through get_id.
+
+    Used when writing a manifest, so an incremental run can tell whether a
+    module's navigation links would resolve differently.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lookups = {}
+
+    def get_id(self, name):
+        node_id = super().get_id(name)
+        self.lookups[name] = node_id
+        return node_id
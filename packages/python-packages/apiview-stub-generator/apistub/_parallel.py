@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Inspect a package's modules across a pool of worker processes.
+
+The modules are split into shards of consecutive modules. For each module of its
+shard, a worker imports the module, builds its ModuleNode and renders its
+ReviewLines against a DeferredNodeIndex. Type names that belong to modules
+handled by other workers are emitted with placeholder navigation IDs that the
+parent resolves once every module has been inspected, so the merged result is
+identical to the serial path in StubGenerator._generate_tokens.
+
+A module that fails to import is reported in its ModuleResult instead of failing
+its shard, and only the failed modules are retried (e.g. after installing the
+package's extras). Shards lost with a worker process that died are re-run once
+in a new pool.
+"""
+
+import gc
+import importlib
+import logging
+import math
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from apistub._file_cache import get_file_cache, set_file_cache
+from apistub._node_index import DeferredNodeIndex
+from apistub._generated.treestyle.parser.models import ApiView, ReviewLines
+
+
+class ModuleResult(NamedTuple):
+    """Output of inspecting one module in a worker process."""
+
+    module_name: str
+    review_lines: ReviewLines
+    diagnostics: list
+    node_ids: Dict[str, str]
+    # index into PylintParser.items -> owner assigned while inspecting the module
+    pylint_owners: Dict[int, str]
+    # Set, with the other fields empty, when the module could not be imported.
+    import_error: Optional[str] = None
+
+
+class _RunState(NamedTuple):
+    """Per-run worker state sent with every task of a shared WorkerPool."""
+
+    run_id: int
+    log_level: int
+    apiview_kwargs: dict
+    # file holding the run's pylint items and file cache, loaded by each worker on its first task of the run
+    payload_path: str
+    sys_path: List[str]
+
+
+class WorkerPool:
+    """A pool of worker processes shared by the inspect_modules calls of several runs.
+
+    Used by batch runs (see apistub._batch). The workers are started by the first run
+    that needs them; each worker switches to a new run when it receives that run's
+    first task, keeping its warm imports and unchanged cache entries. The run's pylint
+    results are written to a file once and loaded by each worker as it switches,
+    instead of being sent with every task.
+
+    :param int jobs: Number of worker processes.
+    :param initializer: Called with *initargs* in each new worker process.
+    """
+
+    def __init__(self, jobs: int, *, initializer: Optional[Callable] = None, initargs: tuple = ()):
+        self.jobs = jobs
+        self._initializer = initializer
+        self._initargs = initargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._run_id = 0
+        self._payload_dir: Optional[str] = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.jobs, initializer=self._initializer, initargs=self._initargs
+            )
+        return self._executor
+
+    def restart(self) -> None:
+        """Replace the worker processes, e.g. after one of them died and broke the pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def next_run_id(self) -> int:
+        self._run_id += 1
+        return self._run_id
+
+    def write_payload(self, run_id: int, payload) -> str:
+        """Pickle a run's worker payload once, rather than with every one of its tasks. Returns its path."""
+        if self._payload_dir is None:
+            self._payload_dir = tempfile.mkdtemp(prefix="apistub-pool-")
+        path = os.path.join(self._payload_dir, "run-{}.pickle".format(run_id))
+        with open(path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._payload_dir is not None:
+            shutil.rmtree(self._payload_dir, ignore_errors=True)
+            self._payload_dir = None
+
+
+# Shards per worker process, so that a slow shard does not leave the other workers idle.
+SHARDS_PER_WORKER = 4
+
+
+# Per-worker state populated by _init_worker.
+_WORKER_STATE: dict = {}
+
+
+def _init_worker(log_level, apiview_kwargs, pylint_items, file_cache, *, keep_caches=False):
+    from apistub.nodes import PylintParser
+    from apistub.nodes._class_node import clear_caches
+    from apistub.nodes._function_node import clear_func_caches
+    from apistub.nodes._base_node import clear_qualified_name_cache
+
+    logging.getLogger().setLevel(log_level)
+    set_file_cache(file_cache)
+    clear_caches(keep_unchanged=keep_caches)
+    clear_func_caches()
+    clear_qualified_name_cache(keep_entries=keep_caches)
+    PylintParser.load_items(pylint_items)
+    _WORKER_STATE["apiview_kwargs"] = apiview_kwargs
+
+
+def _inspect_shard_in_run(shard: List[str], retry: bool, state: _RunState) -> List[ModuleResult]:
+    from apistub._batch import unload_namespace
+
+    if _WORKER_STATE.get("run_id") != state.run_id:
+        previous = _WORKER_STATE.get("apiview_kwargs")
+        if previous:
+            unload_namespace(previous["namespace"])
+        # Pick up the run's package install, e.g. a --venv-dir environment.
+        sys.path[:] = state.sys_path
+        importlib.invalidate_caches()
+        with open(state.payload_path, "rb") as f:
+            pylint_items, file_cache = pickle.load(f)
+        _init_worker(state.log_level, state.apiview_kwargs, pylint_items, file_cache, keep_caches=True)
+        _WORKER_STATE["run_id"] = state.run_id
+    return _inspect_shard(shard, retry)
+
+
+def _inspect_shard(shard: List[str], retry: bool) -> List[ModuleResult]:
+    if retry:
+        # Find packages installed since the first attempt, e.g. the package's extras.
+        importlib.invalidate_caches()
+    results = []
+    for module_name in shard:
+        try:
+            results.append(_inspect_module(module_name))
+        except ImportError as err:
+            logging.debug("Failed to import module {0}: {1}".format(module_name, err))
+            results.append(ModuleResult(module_name, ReviewLines(), [], {}, {}, str(err) or type(err).__name__))
+    # The shard's node trees only live on in the serialized results; free them now
+    # rather than letting them accumulate across the worker's shards.
+    gc.collect()
+    return results
+
+
+def _inspect_module(module_name: str) -> ModuleResult:
+    from apistub.nodes import PylintParser
+    from apistub.nodes._module_node import ModuleNode
+
+    apiview = ApiView(**_WORKER_STATE["apiview_kwargs"])
+    apiview.node_index = DeferredNodeIndex()
+    PylintParser.reset_owners()
+
+    logging.debug("Importing module {}".format(module_name))
+    module_obj = importlib.import_module(module_name)
+    module_node = ModuleNode(module_name, module_obj, apiview.namespace, apiview=apiview)
+    module_node.generate_diagnostics()
+    logging.debug("Generating tokens for module {}".format(module_name))
+    module_node.generate_tokens(apiview.review_lines)
+
+    return ModuleResult(
+        module_name=module_name,
+        review_lines=apiview.review_lines,
+        diagnostics=list(apiview.diagnostics),
+        node_ids=apiview.node_index.export_ids(),
+        pylint_owners={i: item.owner for i, item in enumerate(PylintParser.items) if item.owner},
+    )
+
+
+def _inspect_with_retries(
+    pool: WorkerPool, task: Callable, modules: List[str], jobs: int, install_extras: Optional[Callable[[], None]]
+) -> List[ModuleResult]:
+    results = _run_shards(pool, task, _shards(modules, jobs), retry=False)
+    failed = [r.module_name for r in results if r.import_error]
+    if failed and install_extras:
+        logging.info("{0} modules failed to import. Installing extra dependencies.".format(len(failed)))
+        install_extras()
+        retried = {r.module_name: r for r in _run_shards(pool, task, _shards(failed, jobs), retry=True)}
+        results = [retried.get(r.module_name, r) for r in results]
+    for result in results:
+        if result.import_error:
+            raise ImportError("Failed to import {0}: {1}".format(result.module_name, result.import_error))
+    return results
+
+
+def _merge_node_ids(results: List[ModuleResult]) -> Dict[str, str]:
+    """Merge the workers' indexes, rejecting a name indexed twice like NodeIndex.add does."""
+    node_ids: Dict[str, str] = {}
+    for result in results:
+        duplicates = node_ids.keys() & result.node_ids.keys()
+        if duplicates:
+            raise ValueError("Index already has {} node".format(min(duplicates)))
+        node_ids.update(result.node_ids)
+    return node_ids
+
+
+def _resolve_navigation(review_lines, node_ids: Dict[str, str]) -> None:
+    """Replace placeholder navigation IDs with the IDs from the merged index."""
+    prefix = DeferredNodeIndex.PLACEHOLDER_PREFIX
+    for line in review_lines:
+        for token in line.tokens:
+            navigate_to_id = token.navigate_to_id
+            if navigate_to_id and navigate_to_id.startswith(prefix):
+                # Setting None removes the key, matching a token that was never linked.
+                token.navigate_to_id = node_ids.get(navigate_to_id[len(prefix) :])
+        if line.children:
+            _resolve_navigation(line.children, node_ids)
+
+
+def _shards(modules: List[str], jobs: int) -> List[List[str]]:
+    size = max(math.ceil(len(modules) / (jobs * SHARDS_PER_WORKER)), 1)
+    return [modules[i : i + size] for i in range(0, len(modules), size)]
+
+
+def _run_shards(pool: WorkerPool, task: Callable, shards: List[List[str]], *, retry: bool) -> List[ModuleResult]:
+    """Run *task* on each shard and return the results in the order of *shards*.
+
+    If a worker process dies, every shard that had not finished is re-run once in
+    a new pool; if that pool breaks too, BrokenProcessPool is raised.
+    """
+    futures = [pool.executor().submit(task, shard, retry) for shard in shards]
+    results: List[Optional[List[ModuleResult]]] = []
+    lost = []
+    for index, future in enumerate(futures):
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            results.append(None)
+            lost.append(index)
+    if lost:
+        logging.warning(
+            "A worker process exited unexpectedly. Re-running {0} of {1} shards.".format(len(lost), len(shards))
+        )
+        pool.restart()
+        futures = {index: pool.executor().submit(task, shards[index], retry) for index in lost}
+        for index, future in futures.items():
+            results[index] = future.result()
+    return [result for shard_results in results for result in shard_results]
+
+
+def inspect_modules(
+    modules: List[str],
+    apiview: ApiView,
+    *,
+    jobs: int,
+    metadata_map=None,
+    pool: Optional[WorkerPool] = None,
+    install_extras: Optional[Callable[[], None]] = None,
+) -> List[ModuleResult]:
+    """Inspect *modules* with *jobs* worker processes and merge the results into *apiview*.
+
+    Results are merged in the order of *modules*, so the review lines and
+    diagnostics are deterministic regardless of which worker finishes first.
+
+    :param WorkerPool pool: A pool shared with other runs. If omitted, a pool of
+     *jobs* workers is created for this call.
+    :param install_extras: Called once if any module fails to import, before only
+     the failed modules are inspected again.
+    :raises ImportError: If a module still fails to import.
+    """
+    from apistub.nodes import PylintParser
+
+    # Workers need the complete pylint results up front.
+    PylintParser.wait()
+    apiview_kwargs = dict(
+        pkg_name=apiview.package_name,
+        namespace=apiview.namespace,
+        metadata_map=metadata_map,
+        pkg_version=apiview.package_version,
+    )
+    if pool is not None:
+        run_id = pool.next_run_id()
+        state = _RunState(
+            run_id=run_id,
+            log_level=logging.getLogger().level,
+            apiview_kwargs=apiview_kwargs,
+            payload_path=pool.write_payload(run_id, (PylintParser.items, get_file_cache())),
+            sys_path=list(sys.path),
+        )
+        task = partial(_inspect_shard_in_run, state=state)
+        try:
+            results = _inspect_with_retries(pool, task, modules, jobs, install_extras)
+        finally:
+            os.remove(state.payload_path)
+    else:
+        run_pool = WorkerPool(
+            jobs,
+            initializer=_init_worker,
+            initargs=(logging.getLogger().level, apiview_kwargs, PylintParser.items, get_file_cache()),
+        )
+        try:
+            results = _inspect_with_retries(run_pool, _inspect_shard, modules, jobs, install_extras)
+        finally:
+            run_pool.shutdown()
+
+    node_ids = _merge_node_ids(results)
+    for result in results:
+        PylintParser.assign_owners(result.pylint_owners)
+
+    for result in results:
+        _resolve_navigation(result.review_lines, node_ids)
+        apiview.review_lines.extend(result.review_lines)
+        for diagnostic in result.diagnostics:
+            apiview.add_code_diagnostic(diagnostic)
+    return results
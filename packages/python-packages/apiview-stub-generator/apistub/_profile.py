@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Per-phase timing report for a StubGenerator run (--profile).
+
+Phases are the coarse steps of a run (install, import, inspect, diagnostics, tokens,
+write, ...). Phases may nest; a nested phase is also counted in its parent. For each
+phase the report holds the wall time, the CPU time of this process (pip and pylint run
+in subprocesses and only show up as wall time) and how far the phase raised the
+process's peak resident set size. A phase that stays below an earlier phase's peak
+adds nothing, so each byte of the run's peak, which the report also holds, is counted
+in the phase that first reached it. Module import, inspection and token generation are also timed per
+module, and the slowest classes are listed by the time spent building their ClassNode,
+nested classes included, with their peak growth.
+"""
+
+import cProfile
+import heapq
+import itertools
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Number of slowest classes listed in the report.
+TOP_CLASSES = 25
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident set size of this process so far, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def profile_paths(out_file_path: str) -> Tuple[str, str]:
+    """Return the report and pstats paths written next to the token file *out_file_path*."""
+    base = out_file_path
+    for suffix in (".gz", ".json"):
+        if base.endswith(suffix):
+            base = base[: -len(suffix)]
+    return base + ".profile.json", base + ".pstats"
+
+
+class RunProfiler:
+    """Collects the timings of one StubGenerator run.
+
+    :param bool pstats: Also run cProfile between start() and stop() and save its stats.
+    :param int top_classes: Number of slowest classes to keep.
+    """
+
+    def __init__(self, *, pstats: bool = False, top_classes: int = TOP_CLASSES):
+        self.phases: Dict[str, dict] = {}
+        self.modules: Dict[str, Dict[str, float]] = {}
+        self.top_classes = top_classes
+        # Min-heap of (seconds, class name, sequence, peak growth), so the fastest of the kept classes is
+        # dropped first. The sequence number keeps the growth, which may be None, out of comparisons.
+        self._classes: List[Tuple[float, str, int, Optional[int]]] = []
+        self._sequence = itertools.count()
+        self._cprofile = cProfile.Profile() if pstats else None
+        self._started = time.perf_counter()
+
+    def start(self) -> None:
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        if self._cprofile:
+            self._cprofile.disable()
+
+    def _phase_entry(self, name: str) -> dict:
+        entry = self.phases.get(name)
+        if entry is None:
+            entry = self.phases[name] = {
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "peak_rss_growth_bytes": None if resource is None else 0,
+            }
+        return entry
+
+    @contextmanager
+    def phase(self, name: str):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        rss = peak_rss_bytes()
+        try:
+            yield
+        finally:
+            entry = self._phase_entry(name)
+            entry["calls"] += 1
+            entry["wall_seconds"] += time.perf_counter() - wall
+            entry["cpu_seconds"] += time.process_time() - cpu
+            if rss is not None:
+                entry["peak_rss_growth_bytes"] += peak_rss_bytes() - rss
+
+    def record(self, name: str, wall_seconds: float) -> None:
+        """Record a phase that was timed elsewhere, e.g. a subprocess's lifetime.
+
+        Its memory is not this process's, so its peak growth is left at 0.
+        """
+        entry = self._phase_entry(name)
+        entry["calls"] += 1
+        entry["wall_seconds"] += wall_seconds
+
+    @contextmanager
+    def module_step(self, module_name: str, step: str):
+        """Time one step ("import", "inspect" or "tokens") of one module, and the phase of the same name."""
+        start = time.perf_counter()
+        try:
+            with self.phase(step):
+                yield
+        finally:
+            steps = self.modules.setdefault(module_name, {})
+            steps[step] = steps.get(step, 0.0) + time.perf_counter() - start
+
+    def record_class(self, name: str, seconds: float, peak_rss_growth_bytes: Optional[int] = None) -> None:
+        item = (seconds, name, next(self._sequence), peak_rss_growth_bytes)
+        if len(self._classes) < self.top_classes:
+            heapq.heappush(self._classes, item)
+        elif item > self._classes[0]:
+            heapq.heapreplace(self._classes, item)
+
+    def report(self) -> dict:
+        modules = sorted(self.modules.items(), key=lambda m: -sum(m[1].values()))
+        return {
+            "wall_seconds": time.perf_counter() - self._started,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "phases": self.phases,
+            "modules": [dict(steps, name=name, total_seconds=sum(steps.values())) for name, steps in modules],
+            "slowest_classes": [
+                {"name": name, "seconds": seconds, "peak_rss_growth_bytes": growth}
+                for seconds, name, _, growth in sorted(self._classes, reverse=True)
+            ],
+        }
+
+    def save(self, out_file_path: str) -> List[str]:
+        """Write the report, and the cProfile stats if collected, next to the token file.
+
+        :return: The paths written.
+        """
+        report_path, pstats_path = profile_paths(out_file_path)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        paths = [report_path]
+        if self._cprofile:
+            self._cprofile.dump_stats(pstats_path)
+            paths.append(pstats_path)
+        for path in paths:
+            logging.info("Profile written to {}".format(path))
+        return paths
+
+
+# Profiler of the current StubGenerator run; None unless --profile is set.
+_PROFILER: Optional[RunProfiler] = None
+
+
+def get_profiler() -> Optional[RunProfiler]:
+    return _PROFILER
+
+
+def set_profiler(profiler: Optional[RunProfiler]) -> None:
+    global _PROFILER
+    _PROFILER = profiler
+
+
+@contextmanager
+def profile_phase(name: str):
+    """Time the enclosed block as phase *name* when a profiler is active."""
+    profiler = _PROFILER
+    if profiler is None:
+        yield
+        return
+    with profiler.phase(name):
+        yield
@@ -9,6 +9,8 @@ import importlib.metadata
 import sys
 import os
 import argparse
+import gzip
+from contextlib import nullcontext
 from pkginfo import get_metadata
 from typing import Dict
 
@@ -27,6 +29,9 @@ except ModuleNotFoundError:
     import tomli as tomllib
 
 from apistub._metadata_map import MetadataMap
+from apistub._file_cache import FileCache, get_file_cache, set_file_cache
+from apistub._venv_cache import VirtualEnvCache, read_requirements
+from apistub._profile import RunProfiler, profile_phase, set_profiler
 
 from apistub._generated.treestyle.parser.models import ApiView
 from apistub._generated.treestyle.parser._model_base import (
@@ -47,8 +52,6 @@ logging.getLogger().setLevel(logging.ERROR)
 
 class StubGenerator:
     def __init__(self, **kwargs):
-        from .nodes import PylintParser
-
         self._kwargs = kwargs
         if not kwargs:
             parser = argparse.ArgumentParser(
@@ -73,6 +76,14 @@ class StubGenerator:
                     "Path at which to write the generated JSON file. Defaults to CWD."
                 ),
             )
+            parser.add_argument(
+                "--gzip",
+                help=(
+                    "Compress the generated JSON file with gzip. Also enabled when --out-path ends with '.gz'."
+                ),
+                default=False,
+                action="store_true",
+            )
             parser.add_argument(
                 "--mapping-path",
                 default=None,
@@ -102,16 +113,105 @@ class StubGenerator:
                 default=False,
                 action="store_true",
             )
+            parser.add_argument(
+                "--scoped-pylint",
+                help=(
+                    "Run only the azure-pylint-guidelines-checker checkers, on the files of importable packages. "
+                    "pylint uses the number of processes given by --jobs."
+                ),
+                default=False,
+                action="store_true",
+            )
+            parser.add_argument(
+                "--jobs",
+                type=int,
+                default=1,
+                help=(
+                    "Number of worker processes used to inspect modules. Defaults to 1 (serial)."
+                ),
+            )
+            parser.add_argument(
+                "--isolate-imports",
+                help=(
+                    "Import and inspect modules in worker processes even with --jobs 1, so the package "
+                    "is never imported into this process. A module that fails to import is retried "
+                    "after installing the package's extras, without re-inspecting the others."
+                ),
+                default=False,
+                action="store_true",
+            )
+            parser.add_argument(
+                "--cache-dir",
+                default=None,
+                help=(
+                    "Directory in which to cache per-file parse results and pylint diagnostics across runs. "
+                    "Unchanged files are not re-parsed, and a package whose files are all unchanged is not re-linted."
+                ),
+            )
+            parser.add_argument(
+                "--manifest-path",
+                default=None,
+                help=(
+                    "Path at which to write a manifest of per-module source hashes, exported names and diagnostics. "
+                    "Combined with --previous-path, an existing manifest is read first to regenerate incrementally. "
+                    "Modules are inspected serially; --jobs and --isolate-imports are ignored."
+                ),
+            )
+            parser.add_argument(
+                "--previous-path",
+                default=None,
+                help=(
+                    "Path to a previously generated JSON token file. Only modules whose sources changed since the "
+                    "manifest given by --manifest-path was written are re-inspected."
+                ),
+            )
+            parser.add_argument(
+                "--venv-dir",
+                default=None,
+                help=(
+                    "Directory in which to create and reuse virtual environments keyed by the package's "
+                    "dependencies. When a matching environment exists, only the package itself is installed. "
+                    "pylint runs on the environment's interpreter."
+                ),
+            )
+            parser.add_argument(
+                "--profile",
+                help=(
+                    "Write a JSON report of the wall time, CPU time and peak memory growth of each phase, the time "
+                    "spent on each module and the slowest classes next to the token file."
+                ),
+                default=False,
+                action="store_true",
+            )
+            parser.add_argument(
+                "--profile-pstats",
+                help=("Also run cProfile and write its stats next to the token file. Implies --profile."),
+                default=False,
+                action="store_true",
+            )
             self._args = parser.parse_args()
 
         pkg_path = self._parse_arg("pkg_path")
         temp_path = self._parse_arg("temp_path") or tempfile.gettempdir()
         out_path = self._parse_arg("out_path")
         mapping_path = self._parse_arg("mapping_path")
+        compress = self._parse_arg("gzip")
         verbose = self._parse_arg("verbose")
         filter_namespace = self._parse_arg("filter_namespace")
         source_url = self._parse_arg("source_url")
         skip_pylint = self._parse_arg("skip_pylint")
+        scoped_pylint = self._parse_arg("scoped_pylint")
+        jobs = self._parse_arg("jobs") or 1
+        isolate_imports = self._parse_arg("isolate_imports")
+        cache_dir = self._parse_arg("cache_dir")
+        manifest_path = self._parse_arg("manifest_path")
+        previous_path = self._parse_arg("previous_path")
+        venv_dir = self._parse_arg("venv_dir")
+        profile = self._parse_arg("profile")
+        profile_pstats = self._parse_arg("profile_pstats")
+        # Only passed by batch runs (see apistub._batch).
+        keep_caches = self._parse_arg("keep_caches")
+        worker_pool = self._parse_arg("worker_pool")
 
         if not os.path.exists(pkg_path):
             logging.error("Package path [{}] is invalid".format(pkg_path))
@@ -127,19 +227,66 @@ class StubGenerator:
         self.out_path = out_path
         self.source_url = source_url
         self.mapping_path = mapping_path
+        self.gzip = bool(compress)
         self.filter_namespace = filter_namespace or ""
+        self.jobs = max(int(jobs), 1)
+        self.isolate_imports = bool(isolate_imports)
+        # Set once install_extra_dependencies has run, so a failed import is not retried twice.
+        self.extras_installed = False
         self.namespace = ""
+        self.cache_dir = cache_dir
+        self.skip_pylint = bool(skip_pylint)
+        self.scoped_pylint = bool(scoped_pylint)
+        self.manifest_path = manifest_path
+        self.previous_path = previous_path
+        self.venv_dir = venv_dir
+        self.keep_caches = bool(keep_caches)
+        self.worker_pool = worker_pool
+        # Interpreter used to install the package and its extras; a cached virtualenv's when --venv-dir is set.
+        self.python = sys.executable
+        if previous_path and not manifest_path:
+            logging.warning("--previous-path requires --manifest-path. Regenerating all modules.")
+        if manifest_path and (self.jobs > 1 or self.isolate_imports):
+            logging.warning("--manifest-path inspects modules serially. Ignoring --jobs and --isolate-imports.")
         if verbose:
             logging.getLogger().setLevel(logging.DEBUG)
+        set_file_cache(FileCache(cache_dir) if cache_dir else None)
+        self.profiler = RunProfiler(pstats=bool(profile_pstats)) if profile or profile_pstats else None
+        set_profiler(self.profiler)
+        if self.profiler:
+            self.profiler.start()
 
         # Extract package to temp directory if it is wheel or sdist
         if self.pkg_path.endswith((".whl", ".zip", ".tar.gz")):
-            self.wheel_path = self._extract_wheel()
+            with profile_phase("extract"):
+                self.wheel_path = self._extract_wheel()
         else:
             self.wheel_path = None
 
+        # With --venv-dir, the package is installed into a cached virtualenv and pylint runs on
+        # its interpreter, so that both see the environment's dependencies.
+        self.venv = self._get_virtualenv()
+
+        # pylint runs in the background while the package is installed and inspected;
+        # its results are collected the first time diagnostics are needed. A new virtualenv
+        # has no dependencies yet, so pylint starts once they are installed.
+        self._pylint_deferred = False
         if not skip_pylint:
-            PylintParser.parse(self.wheel_path or self.pkg_path)
+            if self.venv and not self.venv.ready:
+                self._pylint_deferred = True
+            else:
+                self._start_pylint()
+
+    def _start_pylint(self):
+        from .nodes import PylintParser
+
+        with profile_phase("pylint-start"):
+            PylintParser.start(
+                self.wheel_path or self.pkg_path,
+                scoped=self.scoped_pylint,
+                jobs=self.jobs,
+                python=self.venv.python if self.venv else None,
+            )
 
     def _parse_arg(self, name):
         value = self._kwargs.get(name, None)
@@ -151,6 +298,11 @@ class StubGenerator:
         return value
 
     def install_extra_dependencies(self):
+        self.extras_installed = True
+        with self.venv.lock() if self.venv else nullcontext():
+            self._install_extras()
+
+    def _install_extras(self):
         for extra in self.extras_require:
             if ":" in extra:
                 logging.info(f"Skipping conditional extra dependency: {extra}")
@@ -159,7 +311,7 @@ class StubGenerator:
             try:
                 check_call(
                     [
-                        sys.executable,
+                        self.python,
                         "-m",
                         "pip",
                         "install",
@@ -198,10 +350,18 @@ class StubGenerator:
         return pkg_root_path, pkg_name, version
 
     def generate_tokens(self):
-        # TODO: We should install to a virtualenv
         logging.debug("Installing package from {}".format(self.pkg_path))
-        self._install_package()
-        pkg_root_path, pkg_name, version = self._get_pkg_metadata()
+        with profile_phase("install"):
+            self._install_package()
+        try:
+            return self._generate_package_tokens()
+        finally:
+            if self.venv:
+                self.venv.deactivate()
+
+    def _generate_package_tokens(self):
+        with profile_phase("metadata"):
+            pkg_root_path, pkg_name, version = self._get_pkg_metadata()
         logging.info(
             "package name: {0}, version:{1}".format(
                 pkg_name, version
@@ -221,14 +381,19 @@ class StubGenerator:
                 pkg_root_path, pkg_name, version, source_url=self.source_url
             )
         except ImportError as import_exc:
+            if self.extras_installed:
+                # Worker processes already retried the modules that failed to import.
+                raise
             logging.info(f"{import_exc}\nInstalling extra dependencies.")
-            self.install_extra_dependencies()
+            with profile_phase("install-extras"):
+                self.install_extra_dependencies()
             # Retry generating tokens
             apiview = self._generate_tokens(
                 pkg_root_path, pkg_name, version, source_url=self.source_url
             )
 
-        self.check_unique_line_ids(apiview)
+        with profile_phase("check-line-ids"):
+            self.check_unique_line_ids(apiview)
 
         if apiview.diagnostics:
             logging.info(
@@ -263,12 +428,66 @@ class StubGenerator:
         if duplicate_ids:
             raise ValueError(f"Duplicate LineIds found: {duplicate_ids}")
 
+    def get_out_file_path(self, apiview):
+        """Path of the token file for *apiview*: out_path itself if it names a JSON file, otherwise
+        '<package-name>_python.json' inside out_path. '.gz' is appended when gzip is set."""
+        out_file_path = self.out_path
+        # Generate JSON file name if outpath doesn't have json file name
+        if not out_file_path.endswith((".json", ".json.gz")):
+            out_file_path = os.path.join(
+                self.out_path,
+                "{0}_python.json{1}".format(apiview.package_name, ".gz" if self.gzip else ""),
+            )
+        if self.gzip and not out_file_path.endswith(".gz"):
+            out_file_path += ".gz"
+        return out_file_path
+
     def serialize(self, apiview, encoder=APIViewEncoder):
         # Serialize tokens into JSON
         logging.debug("Serializing tokens into json")
-        json_apiview = encoder().encode(apiview)
+        with profile_phase("serialize"):
+            json_apiview = encoder().encode(apiview)
         return json_apiview
 
+    def write(self, apiview, out_file_path, encoder=APIViewEncoder):
+        """Write the JSON token file, gzip-compressed if out_file_path ends with ".gz".
+
+        Produces the same JSON as serialize(), but encodes one top-level review line
+        (typically a whole module) at a time, so the document is never held in
+        memory as a single string. This only bounds the encoding: the ReviewLines
+        of every module are built before writing starts and stay in memory until
+        the ApiView is released, so peak memory still grows with the package.
+
+        With --profile, the profile report is written next to the token file afterwards.
+        """
+        logging.debug("Writing tokens to {}".format(out_file_path))
+        with profile_phase("write"):
+            self._write_tokens(apiview, out_file_path, encoder)
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler.save(out_file_path)
+
+    def _write_tokens(self, apiview, out_file_path, encoder):
+        json_encoder = encoder()
+        opener = gzip.open if out_file_path.endswith(".gz") else open
+        with opener(out_file_path, "wt", encoding="utf-8") as json_file:
+            json_file.write("{")
+            for i, (key, value) in enumerate(apiview.items()):
+                if i:
+                    json_file.write(", ")
+                json_file.write(json_encoder.encode(key))
+                json_file.write(": ")
+                if key != "ReviewLines":
+                    json_file.write(json_encoder.encode(value))
+                    continue
+                json_file.write("[")
+                for j, line in enumerate(value):
+                    if j:
+                        json_file.write(", ")
+                    json_file.write(json_encoder.encode(line))
+                json_file.write("]")
+            json_file.write("}")
+
     def _find_modules(self, pkg_root_path):
         """Find modules within the package to import and parse
         :param str: pkg_root_path
@@ -335,11 +554,14 @@ class StubGenerator:
         from apistub.nodes import PylintParser
         from apistub.nodes._class_node import clear_caches
         from apistub.nodes._function_node import clear_func_caches
+        from apistub.nodes._base_node import clear_qualified_name_cache
 
         # Reset per-file source and astroid caches so multiple packages processed
         # in the same Python process (e.g. the test suite) start with a clean slate.
-        clear_caches()
+        # Batch runs keep the entries of files that are unchanged on disk.
+        clear_caches(keep_unchanged=self.keep_caches)
         clear_func_caches()
+        clear_qualified_name_cache(keep_entries=self.keep_caches)
 
         self.module_dict = {}
         mapping = MetadataMap(pkg_root_path, mapping_path=self.mapping_path)
@@ -355,34 +577,205 @@ class StubGenerator:
         )
         apiview.generate_tokens()
 
-        # load all modules and parse them recursively
-        for m in modules:
-            if not m.startswith(self.namespace):
-                logging.debug(
-                    "Skipping module {0}. Module should start with {1}".format(
-                        m, self.namespace
-                    )
+        for m in [x for x in modules if not x.startswith(self.namespace)]:
+            logging.debug(
+                "Skipping module {0}. Module should start with {1}".format(
+                    m, self.namespace
                 )
-                continue
+            )
+        modules = [m for m in modules if m.startswith(self.namespace)]
+
+        # Importing azure packages while pylint has the namespace __init__ files
+        # overwritten would resolve them against the wrong package layout.
+        if PylintParser.has_pending_namespace_changes():
+            PylintParser.wait()
+
+        if self.manifest_path:
+            return self._generate_tokens_incremental(modules, apiview, mapping, pkg_root_path)
 
+        if modules and (self.isolate_imports or (self.jobs > 1 and len(modules) > 1)):
+            return self._generate_tokens_parallel(modules, apiview, mapping)
+
+        # load all modules and parse them recursively
+        for m in modules:
             logging.debug("Importing module {}".format(m))
-            module_obj = importlib.import_module(m)
-            self.module_dict[m] = ModuleNode(
-                m, module_obj, self.namespace, apiview=apiview
-            )
+            with self._module_step(m, "import"):
+                module_obj = importlib.import_module(m)
+            with self._module_step(m, "inspect"):
+                self.module_dict[m] = ModuleNode(
+                    m, module_obj, self.namespace, apiview=apiview
+                )
 
         ## Generate any global diagnostics
-        global_errors = PylintParser.get_items("GLOBAL")
-        for g in global_errors or []:
-            g.generate_tokens(apiview, "GLOBAL")
+        with profile_phase("diagnostics"):
+            global_errors = PylintParser.get_items("GLOBAL")
+            for g in global_errors or []:
+                g.generate_tokens(apiview, "GLOBAL")
 
         # Generate tokens
         modules = self.module_dict.keys()
         for m in modules:
-            self.module_dict[m].generate_diagnostics()
+            with self._module_step(m, "diagnostics"):
+                self.module_dict[m].generate_diagnostics()
             # Generate and add token to APIView
             logging.debug("Generating tokens for module {}".format(m))
-            self.module_dict[m].generate_tokens(apiview.review_lines)
+            with self._module_step(m, "tokens"):
+                self.module_dict[m].generate_tokens(apiview.review_lines)
+        self._log_cache_stats()
+        return apiview
+
+    def _module_step(self, module_name, step):
+        """Time *step* of *module_name* with --profile."""
+        if self.profiler:
+            return self.profiler.module_step(module_name, step)
+        return nullcontext()
+
+    def _generate_tokens_incremental(self, modules, apiview, mapping, pkg_root_path):
+        """Generate tokens while recording a manifest, re-inspecting only changed modules.
+
+        Without a usable previous token file and manifest, every module is rebuilt and
+        the manifest is recorded from scratch. Modules are always inspected serially in
+        this mode, and module_dict only holds the modules that were rebuilt.
+        """
+        from apistub._incremental import IncrementalBuild, ModuleManifest, seed_index
+        from apistub._node_index import RecordingNodeIndex
+        from apistub.nodes._module_node import ModuleNode
+        from apistub.nodes import PylintParser
+
+        context = ModuleManifest.build_context(
+            namespace=self.namespace,
+            mapping=mapping,
+            pylint_signature=(
+                None if self.skip_pylint else PylintParser.signature(scoped=self.scoped_pylint)
+            ),
+        )
+        incremental = None
+        if self.previous_path:
+            incremental = IncrementalBuild.load(
+                self.previous_path,
+                ModuleManifest.load(self.manifest_path),
+                context,
+                pkg_root_path,
+            )
+        manifest = ModuleManifest(context)
+        apiview.node_index = RecordingNodeIndex()
+        exports = {}
+
+        def load_module(m):
+            logging.debug("Importing module {}".format(m))
+            with self._module_step(m, "import"):
+                module_obj = importlib.import_module(m)
+            indexed = set(apiview.node_index.index)
+            with self._module_step(m, "inspect"):
+                self.module_dict[m] = ModuleNode(
+                    m, module_obj, self.namespace, apiview=apiview
+                )
+            exports[m] = {
+                name: node.namespace_id
+                for name, node in apiview.node_index.index.items()
+                if name not in indexed
+            }
+
+        rebuild = incremental.changed_modules(modules) if incremental else modules
+        for m in rebuild:
+            load_module(m)
+        if incremental:
+            # Unchanged modules that link to a name whose ID changed (or disappeared)
+            # must be regenerated too.
+            node_ids = {}
+            for m in modules:
+                node_ids.update(exports[m] if m in exports else incremental.exports(m))
+            unchanged = [m for m in modules if m not in exports]
+            for m in incremental.relinked_modules(unchanged, node_ids):
+                load_module(m)
+            for m in modules:
+                if m not in exports:
+                    seed_index(apiview.node_index, incremental.exports(m))
+        self.rebuilt_modules = [m for m in modules if m in self.module_dict]
+        logging.info(
+            "Regenerating {0} of {1} modules".format(len(self.rebuilt_modules), len(modules))
+        )
+
+        ## Generate any global diagnostics
+        with profile_phase("diagnostics"):
+            global_errors = PylintParser.get_items("GLOBAL")
+            for g in global_errors or []:
+                g.generate_tokens(apiview, "GLOBAL")
+
+        for m in modules:
+            if m not in self.module_dict:
+                with profile_phase("splice"):
+                    incremental.splice(m, apiview, manifest)
+                continue
+            module_node = self.module_dict[m]
+            # Record the module's own diagnostics, including those an earlier module already
+            # emitted, so they are not lost when the earlier module is rebuilt without them.
+            apiview.diagnostic_log = []
+            apiview.node_index.lookups = {}
+            with self._module_step(m, "diagnostics"):
+                module_node.generate_diagnostics()
+            logging.debug("Generating tokens for module {}".format(m))
+            with self._module_step(m, "tokens"):
+                module_node.generate_tokens(apiview.review_lines)
+            manifest.record_module(
+                module_node,
+                pkg_root_path=pkg_root_path,
+                exports=exports[m],
+                lookups=apiview.node_index.lookups,
+                diagnostics=apiview.diagnostic_log,
+            )
+            apiview.diagnostic_log = None
+        manifest.save(self.manifest_path)
+        self._log_cache_stats()
+        return apiview
+
+    def _log_cache_stats(self):
+        from apistub.nodes._base_node import qualified_name_cache_stats
+
+        file_cache = get_file_cache()
+        if file_cache:
+            logging.info(
+                "File cache {0}: {1} hits, {2} misses".format(
+                    file_cache.root, file_cache.hits, file_cache.misses
+                )
+            )
+        # With --jobs, names are resolved in the workers and only the parent's lookups are counted.
+        logging.info(
+            "Qualified name cache: {hits} hits, {misses} misses, {evictions} evictions, {size} entries".format(
+                **qualified_name_cache_stats()
+            )
+        )
+
+    def _generate_tokens_parallel(self, modules, apiview, mapping):
+        """Inspect modules in worker processes and merge their review lines into apiview.
+
+        ModuleNodes only exist in the workers, so module_dict stays empty in this mode.
+        """
+        from apistub._parallel import inspect_modules
+        from apistub.nodes import PylintParser
+
+        logging.debug(
+            "Inspecting {0} modules with {1} worker processes".format(
+                len(modules), self.jobs
+            )
+        )
+        # Global diagnostics are emitted first, as in the serial path.
+        with profile_phase("diagnostics"):
+            global_errors = PylintParser.get_items("GLOBAL")
+            for g in global_errors or []:
+                g.generate_tokens(apiview, "GLOBAL")
+        # Modules are imported, inspected and tokenized in the workers, so they are timed
+        # together as one phase and not per module or class.
+        with profile_phase("inspect-parallel"):
+            inspect_modules(
+                modules,
+                apiview,
+                jobs=self.jobs,
+                metadata_map=mapping,
+                pool=self.worker_pool,
+                install_extras=self.install_extra_dependencies,
+            )
+        self._log_cache_stats()
         return apiview
 
     def _extract_wheel(self):
@@ -455,14 +848,49 @@ class StubGenerator:
 
         return pkg_name
 
+    def _get_virtualenv(self):
+        """Return the cached virtualenv for the package's dependency set, or None to install into the
+        current interpreter."""
+        if not self.venv_dir:
+            return None
+        requirements = read_requirements(self.pkg_path, self.wheel_path)
+        if requirements is None:
+            logging.warning(
+                "Unable to determine the dependencies of {}. Installing into the current interpreter.".format(
+                    self.pkg_path
+                )
+            )
+            return None
+        return VirtualEnvCache(self.venv_dir).get(requirements)
+
     def _install_package(self):
+        env = self.venv
+        # Concurrent runs with the same dependency set share the environment; only one at a time
+        # may create it or install into it.
+        with env.lock() if env else nullcontext():
+            self._install_package_locked(env)
+        if env:
+            env.activate()
+        if self._pylint_deferred:
+            self._pylint_deferred = False
+            self._start_pylint()
+
+    def _install_package_locked(self, env):
+        if env and not env.ready:
+            env.create()
+        self.python = env.python if env else sys.executable
+        extra_args = []
+        if env and env.ready:
+            # The dependencies were installed by an earlier run; skip the resolver.
+            print("apistubgen: reusing virtual environment {0}".format(env.path))
+            extra_args = ["--no-deps", "--force-reinstall"]
         # Use "-v" so pip streams its full progress - "Collecting" / "Downloading",
         # the resolver's "looking at multiple versions of <pkg> ..." backtracking
         # notices, and the "This is taking longer than usual" warning - straight to
         # the console. That makes a slow dependency resolve easy to diagnose in CI
         # logs. stderr is captured so we can still raise a friendly error on a Python
         # version mismatch; stdout is inherited so the verbose log appears live.
-        commands = [sys.executable, "-m", "pip", "install", self.pkg_path, "-v"]
+        commands = [self.python, "-m", "pip", "install", self.pkg_path, "-v"] + extra_args
         print("apistubgen: installing package: {0}".format(" ".join(commands)))
         start = time.monotonic()
         try:
@@ -505,3 +933,6 @@ class StubGenerator:
                     f"Please install at least Python {required} to generate an APIView for this package."
                 )
             raise CalledProcessError(result.returncode, commands, stderr=stderr)
+
+        if env and not env.ready:
+            env.mark_ready()
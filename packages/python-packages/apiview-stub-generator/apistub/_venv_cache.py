@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import ast
+import importlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import site
+import sys
+import sysconfig
+import venv
+from contextlib import contextmanager
+from typing import List, Optional
+
+from pkginfo import get_metadata
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    import tomli as tomllib
+
+from apistub._file_cache import FileCache
+
+# Extras are installed on demand by StubGenerator.install_extra_dependencies, so
+# requirements that only apply to an extra do not select the environment.
+_EXTRA_MARKER = re.compile(r"\bextra\s*==")
+
+
+def _normalize_requirement(requirement: str) -> str:
+    return re.sub(r"\s+", "", requirement).lower()
+
+
+def _pyproject_requirements(source_dir: str) -> Optional[List[str]]:
+    pyproject_path = os.path.join(source_dir, "pyproject.toml")
+    if not os.path.exists(pyproject_path):
+        return None
+    try:
+        with open(pyproject_path, "rb") as f:
+            project = tomllib.load(f).get("project", {})
+    except (OSError, ValueError):
+        return None
+    if "dependencies" not in project:
+        return None
+    return list(project["dependencies"])
+
+
+def _setup_py_requirements(source_dir: str) -> Optional[List[str]]:
+    setup_py_path = os.path.join(source_dir, "setup.py")
+    if not os.path.exists(setup_py_path):
+        return None
+    try:
+        with open(setup_py_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            for keyword in node.keywords:
+                if keyword.arg == "install_requires":
+                    try:
+                        return list(ast.literal_eval(keyword.value))
+                    except ValueError:
+                        # Computed requirement lists cannot be read without running setup.py.
+                        return None
+    return None
+
+
+def read_requirements(pkg_path: str, source_dir: Optional[str] = None) -> Optional[List[str]]:
+    """Return the package's Requires-Dist entries, or None if they cannot be determined.
+
+    :param str pkg_path: The package source root, WHL, ZIP or TAR file.
+    :param str source_dir: The directory an sdist was extracted to, if any.
+    """
+    if pkg_path.endswith(".whl"):
+        return list(get_metadata(pkg_path).requires_dist or [])
+    source_dir = source_dir or pkg_path
+    requirements = _pyproject_requirements(source_dir)
+    if requirements is None:
+        requirements = _setup_py_requirements(source_dir)
+    if requirements is None and pkg_path.endswith((".zip", ".tar.gz")):
+        # Older sdists may not list Requires-Dist in PKG-INFO; treat that as unknown.
+        requirements = list(get_metadata(pkg_path).requires_dist or []) or None
+    return requirements
+
+
+class CachedVirtualEnv:
+    """A virtual environment in a VirtualEnvCache.
+
+    :param str path: Directory of the environment.
+    :param list[str] requirements: The normalized dependency set the environment was created for.
+    """
+
+    MARKER_FILE = "apistub-venv.json"
+    # Makes the running interpreter's packages (pylint and its checkers) importable from the
+    # environment's interpreter, after the environment's own site-packages.
+    PARENT_PATH_FILE = "apistub-parent.pth"
+
+    def __init__(self, path: str, requirements: List[str]):
+        self.path = path
+        self.requirements = requirements
+        # sys.path entries added by activate(), removed again by deactivate()
+        self._added_paths: List[str] = []
+        if os.name == "nt":
+            self.python = os.path.join(path, "Scripts", "python.exe")
+        else:
+            self.python = os.path.join(path, "bin", "python")
+
+    @property
+    def ready(self) -> bool:
+        """Whether the dependencies were installed into the environment by an earlier run."""
+        return os.path.exists(os.path.join(self.path, self.MARKER_FILE)) and os.path.exists(self.python)
+
+    @property
+    def site_packages(self) -> str:
+        paths = {"base": self.path, "platbase": self.path}
+        if "venv" in sysconfig.get_scheme_names():
+            return sysconfig.get_path("purelib", "venv", vars=paths)
+        return sysconfig.get_path("purelib", vars=paths)
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive, cross-process lock on the environment while creating or installing into it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "a+b") as lock_file:
+            if os.name == "nt":
+                import msvcrt
+
+                lock_file.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK gives up after about 10 seconds; keep waiting for the other run.
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            else:
+                import fcntl
+
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if os.name == "nt":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def create(self) -> None:
+        """Create an empty environment, replacing a partially created one. Call while holding lock()."""
+        logging.info("Creating virtual environment {}".format(self.path))
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        # The package is imported into the running interpreter, so the environment layers on top of
+        # its site-packages rather than replacing them.
+        venv.EnvBuilder(system_site_packages=True, with_pip=True, clear=True).create(self.path)
+        parent_paths = [p for p in sys.path if os.path.basename(p) in ("site-packages", "dist-packages")]
+        with open(os.path.join(self.site_packages, self.PARENT_PATH_FILE), "w", encoding="utf-8") as f:
+            f.write("".join(p + "\n" for p in parent_paths))
+
+    def mark_ready(self) -> None:
+        with open(os.path.join(self.path, self.MARKER_FILE), "w", encoding="utf-8") as f:
+            json.dump({"Requirements": self.requirements}, f, indent=1)
+
+    def activate(self) -> None:
+        """Put the environment's site-packages ahead of the interpreter's on sys.path."""
+        before = list(sys.path)
+        # addsitedir also processes the .pth files written by editable installs.
+        site.addsitedir(self.site_packages)
+        self._added_paths = [p for p in sys.path if p not in before]
+        sys.path[:] = self._added_paths + before
+        importlib.invalidate_caches()
+
+    def deactivate(self) -> None:
+        """Remove the entries activate() added to sys.path."""
+        added = set(self._added_paths)
+        sys.path[:] = [p for p in sys.path if p not in added]
+        self._added_paths = []
+        importlib.invalidate_caches()
+
+
+class VirtualEnvCache:
+    """Virtual environments reused across runs, keyed by a package's dependency set.
+
+    Environments live under ``<venv_dir>/<digest>``, where the digest covers the Python
+    version, the platform and the sorted, normalized Requires-Dist entries. Packages of
+    the same service family usually share their dependencies, so after the first run only
+    the target package itself needs to be installed.
+
+    :param str venv_dir: Directory in which to create the environments.
+    """
+
+    def __init__(self, venv_dir: str):
+        self.venv_dir = venv_dir
+
+    @staticmethod
+    def normalize(requirements: List[str]) -> List[str]:
+        return sorted({_normalize_requirement(r) for r in requirements if not _EXTRA_MARKER.search(r)})
+
+    @staticmethod
+    def dependency_key(requirements: List[str]) -> str:
+        content = json.dumps(
+            {
+                "Python": "{0}-{1}".format(sys.implementation.name, platform.python_version()),
+                "Platform": sysconfig.get_platform(),
+                "Requirements": VirtualEnvCache.normalize(requirements),
+            },
+            sort_keys=True,
+        )
+        return FileCache.hash_content(content)[:16]
+
+    def get(self, requirements: List[str]) -> CachedVirtualEnv:
+        key = self.dependency_key(requirements)
+        return CachedVirtualEnv(os.path.join(self.venv_dir, key), self.normalize(requirements))
@@ -1,10 +1,12 @@
 import astroid
-import inspect
+from collections import OrderedDict
 from inspect import Parameter
 import re
 import types as _builtin_types
+from typing import Dict
 
 from ._pylint_parser import PylintParser
+from ._symbol_table import is_handwritten
 
 keyword_regex = re.compile(r"<(class|enum) '([\w.]+)'>")
 forward_ref_regex = re.compile(r"ForwardRef\('([\w.]+)'\)")
@@ -124,6 +126,13 @@ class NodeEntityBase:
                 c.generate_tokens(apiview)
             apiview.end_group()
 
+    def pylint_lookup_key(self):
+        """Key used by PylintParser.get_items to narrow the errors passed to is_pylint_error_owner.
+
+        :return: ("owner", owner) or ("name", last component of the error obj), or None to check every error
+        """
+        return ("owner", str(self.obj))
+
     def is_pylint_error_owner(self, err) -> bool:
         """Check if this node is the owner of a pylint error and that the error object is the same as the node.
 
@@ -145,14 +154,69 @@ class NodeEntityBase:
         :return: True if the object is handwritten, False if generated.
         :rtype: bool
         """
-        try:
-            # Unwrap the object so the function src is used, not the decorator src
-            source_file = inspect.getfile(inspect.unwrap(self.obj))
-            return source_file.endswith("_patch.py")
-        except (TypeError, OSError):
-            # inspect.getfile() can raise TypeError for built-in objects
-            # or OSError if the source file cannot be found
-            return False
+        return is_handwritten(self.obj)
+
+class _QualifiedNameCache:
+    """Bounded LRU memoization of get_qualified_name.
+
+    Generated clients repeat the same few hundred annotations tens of thousands of times.
+    Entries are keyed on the annotation's identity (strings on their value) plus the
+    namespace. Equality is deliberately not used: typing objects can compare equal while
+    rendering differently, e.g. Union[int, str] == Union[str, int]. Each entry holds a
+    reference to its object, so an identity key cannot be reused by another object.
+    astroid nodes are unique per annotation and are never cached.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, obj, namespace: str) -> str:
+        if isinstance(obj, astroid.nodes.NodeNG):
+            return _get_qualified_name(obj, namespace)
+        key = (obj if isinstance(obj, str) else id(obj), namespace)
+        entry = self._entries.get(key)
+        if entry is not None and (entry[0] is obj or isinstance(obj, str)):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = _get_qualified_name(obj, namespace)
+        self._entries[key] = (obj, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self, *, keep_entries: bool = False) -> None:
+        if not keep_entries:
+            self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+QUALIFIED_NAME_CACHE_SIZE = 4096
+_QUALIFIED_NAME_CACHE = _QualifiedNameCache(QUALIFIED_NAME_CACHE_SIZE)
+
+
+def clear_qualified_name_cache(*, keep_entries: bool = False) -> None:
+    """Reset the get_qualified_name cache and its statistics.
+
+    Called from StubGenerator._generate_tokens() at the start of each run. Batch runs
+    keep the entries, which stay valid because they are keyed on object identity.
+    """
+    _QUALIFIED_NAME_CACHE.clear(keep_entries=keep_entries)
+
+
+def qualified_name_cache_stats() -> Dict[str, int]:
+    return _QUALIFIED_NAME_CACHE.stats()
+
 
 def get_qualified_name(obj, namespace: str) -> str:
     """Generate and return fully qualified name of object with module name for internal types.
@@ -160,6 +224,10 @@ def get_qualified_name(obj, namespace: str) -> str:
     :param: obj
         Parameter object of type class, function or enum
     """
+    return _QUALIFIED_NAME_CACHE.get(obj, namespace)
+
+
+def _get_qualified_name(obj, namespace: str) -> str:
     module_name = getattr(obj, "__module__", "")
 
     if module_name.startswith("astroid"):
@@ -4,6 +4,7 @@ import inspect
 import logging
 import operator
 import sys
+import time
 from enum import Enum
 from typing import Dict, List, Optional, Tuple
 
@@ -12,100 +13,55 @@ from ._function_node import FunctionNode
 from ._enum_node import EnumNode
 from ._key_node import KeyNode
 from ._property_node import PropertyNode
-from ._docstring_parser import DocstringParser
+from ._docstring_parser import docstring_tags, parse_docstring
 from ._variable_node import VariableNode
+from ._symbol_table import _SYMBOL_TABLES, ClassSymbol, SymbolTable, clear_symbol_tables, get_symbol_table
 from .._generated.treestyle.parser.models import ReviewLines
 from .._parsing_helpers import parse_overloads, add_overload_nodes
+from .._profile import get_profiler, peak_rss_bytes
 
 # ---------------------------------------------------------------------------
-# Per-file class source index and astroid node cache.
+# Class source lookups and astroid node cache.
 #
 # inspect.getsource(cls) for a *class* does a full O(N_lines) linear scan of
 # the source file on every call (CPython inspect.findsource).  For packages
 # like azure-synapse-artifacts that put 900+ model classes in a single 3.6 MB
-# file this balloons to 45+ minutes.  The helpers below replace that with:
+# file this balloons to 45+ minutes.  The helpers below replace that with
+# lookups in the per-file symbol table (see _symbol_table.py), which reads and
+# ast.parses each file ONCE:
 #
-#   _build_file_index  – reads + ast.parses a file ONCE, indexes all ClassDef
-#                        nodes by qualified name and line range.
 #   _get_class_source  – O(1) line-slice lookup after the first call per file.
 #   _get_class_astroid_node – caches astroid.parse() result by (file, qualname)
 #                             so the two independent calls in _parse_decorators
 #                             and _parse_functions share one parse result, and
 #                             MRO ancestors shared across many classes are only
 #                             parsed once.
-#   clear_caches       – resets all dicts; called at the start of each
+#   clear_caches       – resets all caches; called at the start of each
 #                        StubGenerator._generate_tokens() run so the test suite
-#                        and multi-package runs stay correct.
+#                        and multi-package runs stay correct.  Batch runs keep
+#                        the entries of files that did not change on disk.
 # ---------------------------------------------------------------------------
 
-# file_path -> {qualname: extracted_source_text}  (precomputed in _build_file_index)
-_FILE_CLASS_SOURCE: Dict[str, Dict[str, str]] = {}
-# file_path -> {qualname: (start_1based, end_1based)}  (1-based inclusive line range)
-_FILE_CLASS_LINES: Dict[str, Dict[str, Tuple[int, int]]] = {}
 # (file_path, qualname) -> Optional[astroid.ClassDef]
 _CLASS_ASTROID_CACHE: Dict[Tuple[Optional[str], Optional[str]], Optional[object]] = {}
 
 
-def _collect_class_defs(node, parent_qualname: str = ""):
-    """Recursively yield (qualname, start_0based, end_exclusive) for every
-    ClassDef in an ast tree, including nested classes."""
-    for child in ast.iter_child_nodes(node):
-        if isinstance(child, ast.ClassDef):
-            qualname = f"{parent_qualname}.{child.name}" if parent_qualname else child.name
-            # Include any decorators that precede the 'class' keyword.
-            start_1based = (
-                child.decorator_list[0].lineno
-                if child.decorator_list
-                else child.lineno
-            )
-            # end_lineno is 1-based inclusive; convert to 0-based exclusive.
-            yield qualname, start_1based - 1, child.end_lineno
-            yield from _collect_class_defs(child, qualname)
-
-
-def _build_file_index(file_path: str) -> None:
-    """Read *file_path* once, build a {qualname: source_text} map for all
-    ClassDef nodes, and store the result in _FILE_CLASS_SOURCE."""
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as fh:
-            source = fh.read()
-    except OSError:
-        _FILE_CLASS_SOURCE[file_path] = {}
-        _FILE_CLASS_LINES[file_path] = {}
-        return
-    # Split lines ONCE so we can slice cheaply for each class.
-    lines = source.splitlines(keepends=True)
-    src_index: Dict[str, str] = {}
-    line_index: Dict[str, Tuple[int, int]] = {}
-    try:
-        tree = ast.parse(source)
-        for qualname, start, end in _collect_class_defs(tree):
-            # Precompute and store the source slice — O(1) lookup later.
-            src_index[qualname] = "".join(lines[start:end])
-            # Store 1-based inclusive line range for pylint error matching.
-            line_index[qualname] = (start + 1, end)
-    except SyntaxError:
-        pass
-    _FILE_CLASS_SOURCE[file_path] = src_index
-    _FILE_CLASS_LINES[file_path] = line_index
+def _get_class_symbol(cls) -> Tuple[Optional[SymbolTable], Optional[ClassSymbol]]:
+    """Return the symbol table of the file defining *cls* and the class's entry in it."""
+    file_path = inspect.getsourcefile(cls)
+    if not file_path:
+        return None, None
+    table = get_symbol_table(file_path)
+    qualname = getattr(cls, "__qualname__", None) or getattr(cls, "__name__", None)
+    return table, table.classes.get(qualname) if qualname else None
 
 
 def _get_class_source(cls) -> Optional[str]:
     """Return the source text for *cls* without inspect.getsource's O(N_lines)
     scan.  Falls back to inspect.getsource for dynamic / C-extension classes."""
-    file_path = inspect.getsourcefile(cls)
-    if not file_path:
-        try:
-            return inspect.getsource(cls)
-        except Exception:
-            return None
-    if file_path not in _FILE_CLASS_SOURCE:
-        _build_file_index(file_path)
-    qualname = getattr(cls, "__qualname__", None) or getattr(cls, "__name__", None)
-    if qualname:
-        result = _FILE_CLASS_SOURCE[file_path].get(qualname)
-        if result is not None:
-            return result
+    table, symbol = _get_class_symbol(cls)
+    if symbol is not None:
+        return table.source(symbol.start, symbol.end)
     # Not found in index (dynamic class, or qualname mismatch) – slow fallback.
     try:
         return inspect.getsource(cls)
@@ -114,22 +70,15 @@ def _get_class_source(cls) -> Optional[str]:
 
 
 def _get_class_line_range(cls) -> Tuple[Optional[int], Optional[int]]:
-    """Return (start_1based, end_1based) for *cls* using the pre-built file index.
+    """Return (start_1based, end_1based) for *cls* using the symbol table.
 
     Used by PylintParser.match_items to avoid the O(N_lines) inspect.getsourcelines
     scan for class objects.  Returns (None, None) when the class cannot be located.
     """
-    file_path = inspect.getsourcefile(cls)
-    if not file_path:
+    _, symbol = _get_class_symbol(cls)
+    if symbol is None:
         return None, None
-    if file_path not in _FILE_CLASS_LINES:
-        _build_file_index(file_path)
-    qualname = getattr(cls, "__qualname__", None) or getattr(cls, "__name__", None)
-    if qualname:
-        result = _FILE_CLASS_LINES[file_path].get(qualname)
-        if result is not None:
-            return result
-    return None, None
+    return symbol.start, symbol.end
 
 
 def _get_class_astroid_node(cls) -> Optional["astroid.ClassDef"]:
@@ -155,15 +104,23 @@ def _get_class_astroid_node(cls) -> Optional["astroid.ClassDef"]:
     return result
 
 
-def clear_caches() -> None:
+def clear_caches(*, keep_unchanged: bool = False) -> None:
     """Reset all module-level source and AST caches.
 
     Called at the start of each StubGenerator._generate_tokens() run so that
     back-to-back runs (e.g. in the test suite) do not share stale entries.
+
+    :param bool keep_unchanged: Keep the entries of files whose modification time
+     and size are the same as when they were indexed. Used by batch runs so that
+     dependencies shared by several packages are parsed once.
     """
-    _FILE_CLASS_SOURCE.clear()
-    _FILE_CLASS_LINES.clear()
-    _CLASS_ASTROID_CACHE.clear()
+    if not keep_unchanged:
+        clear_symbol_tables()
+        _CLASS_ASTROID_CACHE.clear()
+        return
+    stale = clear_symbol_tables(keep_unchanged=True)
+    for key in [k for k in _CLASS_ASTROID_CACHE if k[0] in stale or k[0] not in _SYMBOL_TABLES]:
+        del _CLASS_ASTROID_CACHE[key]
 
 
 find_keys = lambda x: isinstance(x, KeyNode)
@@ -218,6 +175,9 @@ class ClassNode(NodeEntityBase):
         apiview,
         allow_list=None,
     ):
+        profiler = get_profiler()
+        start = time.perf_counter() if profiler else None
+        start_rss = peak_rss_bytes() if profiler else None
         super().__init__(namespace, parent_node, obj)
         self.base_class_names = []
         self.class_keywords = []  # Store keyword arguments like metaclass=, total=
@@ -234,6 +194,9 @@ class ClassNode(NodeEntityBase):
         self._inspect()
         self._set_abc_implements()
         self._sort_elements()
+        if profiler:
+            growth = None if start_rss is None else peak_rss_bytes() - start_rss
+            profiler.record_class(self.full_name, time.perf_counter() - start, growth)
 
     def _set_abc_implements(self):
         # Check if class adher to any abstract class implementation.
@@ -465,8 +428,9 @@ class ClassNode(NodeEntityBase):
         if not hasattr(self.obj, "__doc__"):
             return
         docstring = getattr(self.obj, "__doc__")
-        if docstring:
-            docstring_parser = DocstringParser(docstring, apiview=self.apiview)
+        # Only :ivar tags add variables, so other docstrings are not parsed.
+        if docstring and any(tag[0] == "ivar" and len(tag) in (2, 3) for tag in docstring_tags(docstring)):
+            docstring_parser = parse_docstring(docstring)
             for key, var in docstring_parser.ivars.items():
                 ivar_node = VariableNode(
                     namespace=self.namespace,
@@ -536,7 +500,7 @@ class ClassNode(NodeEntityBase):
         except Exception as e:
             logging.debug(f"Direct AST parsing failed for {self.name}: {e}")
 
-        # Attempt 2: look up the class in the already-built file index without re-reading the
+        # Attempt 2: look up the class in the module's symbol table without re-reading the
         # module. This covers enum classes where inspect.getsource may resolve to the instance.
         try:
             module_name = self.obj.__module__
@@ -544,12 +508,11 @@ class ClassNode(NodeEntityBase):
                 module = sys.modules[module_name]
                 file_path = inspect.getsourcefile(module)
                 if file_path:
-                    if file_path not in _FILE_CLASS_SOURCE:
-                        _build_file_index(file_path)
-                    file_index = _FILE_CLASS_SOURCE.get(file_path, {})
+                    table = get_symbol_table(file_path)
                     qualname = getattr(self.obj, "__qualname__", None) or self.name
-                    source = file_index.get(qualname) or file_index.get(self.name)
-                    if source:
+                    symbol = table.classes.get(qualname) or table.classes.get(self.name)
+                    if symbol:
+                        source = table.source(symbol.start, symbol.end)
                         class_node = ast.parse(source).body[0]
                         if isinstance(class_node, ast.ClassDef):
                             base_classes, self.class_keywords = self._extract_bases_and_keywords_from_ast(class_node)
@@ -2,6 +2,7 @@ from collections import OrderedDict
 import inspect
 import logging
 import re
+from typing import Dict, List, Tuple
 from ._argtype import ArgType
 
 
@@ -20,6 +21,42 @@ docstring_param_keywords = ["param", "ivar", "keyword"]
 
 docstring_return_keywords = ["rtype"]
 
+# Parsed docstrings keyed by docstring text.  Inherited methods share their
+# function object, and so their docstring, across all subclasses, so each is
+# parsed once.  Cleared by clear_docstring_cache() between runs.
+_DOCSTRING_CACHE: Dict[str, "DocstringParser"] = {}
+
+
+def docstring_tags(docstring) -> List[Tuple[str, ...]]:
+    """Return the split tags of the lines that DocstringParser would process, e.g.
+    ("param", "str", "name") for ":param str name: The name.", without parsing the
+    descriptions, types or defaults."""
+    tags = []
+    for line in docstring.splitlines():
+        line = line.strip()
+        # Mirrors line_tag_regex, which needs a non-empty tag between two colons.
+        if line.startswith(":"):
+            tag, sep, _ = line[1:].partition(":")
+            if sep and tag:
+                tags.append(tuple(tag.split()))
+    return tags
+
+
+def parse_docstring(docstring) -> "DocstringParser":
+    """Return the DocstringParser for *docstring*, parsing it only the first time.
+
+    The parser is shared, so its arguments are created without an apiview and must be
+    copied before they are added to a node.
+    """
+    parsed = _DOCSTRING_CACHE.get(docstring)
+    if parsed is None:
+        parsed = _DOCSTRING_CACHE[docstring] = DocstringParser(docstring, apiview=None)
+    return parsed
+
+
+def clear_docstring_cache() -> None:
+    _DOCSTRING_CACHE.clear()
+
 
 class DocstringParser:
     """This represents a parsed doc string which contain positional, instance, and keyword arguments
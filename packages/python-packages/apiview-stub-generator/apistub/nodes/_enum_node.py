@@ -17,6 +17,10 @@ class EnumNode(NodeEntityBase):
         self.namespace_id = self.generate_id()
         self.apiview = parent_node.apiview
 
+    def pylint_lookup_key(self):
+        # Matched by suffix of the parent enum's name, which the name index cannot narrow.
+        return None
+
     def is_pylint_error_owner(self, err):
         """Check if a pylint error belongs to this enum value.
 
@@ -1,3 +1,4 @@
+import copy
 import logging
 import inspect
 from collections import OrderedDict
@@ -7,9 +8,10 @@ from typing import Dict, Optional
 
 from ._annotation_parser import FunctionAnnotationParser
 from ._astroid_parser import AstroidFunctionParser
-from ._docstring_parser import DocstringParser
+from ._docstring_parser import clear_docstring_cache, docstring_tags, parse_docstring
 from ._base_node import NodeEntityBase, get_qualified_name
 from ._argtype import ArgType
+from ._symbol_table import get_function_source
 from .._generated.treestyle.parser.models import ReviewLines
 
 
@@ -26,12 +28,13 @@ _FUNC_ASTROID_CACHE: Dict[int, Optional[object]] = {}
 
 
 def clear_func_caches() -> None:
-    """Reset the FunctionNode astroid parse cache.
+    """Reset the FunctionNode astroid parse and parsed docstring caches.
 
     Called from StubGenerator._generate_tokens() at the start of each run
     so that back-to-back package runs stay correct.
     """
     _FUNC_ASTROID_CACHE.clear()
+    clear_docstring_cache()
 
 
 class FunctionNode(NodeEntityBase):
@@ -89,10 +92,10 @@ class FunctionNode(NodeEntityBase):
                 self.node = _FUNC_ASTROID_CACHE[obj_id]
             else:
                 try:
-                    candidate = astroid.extract_node(inspect.getsource(obj))
+                    candidate = astroid.extract_node(get_function_source(obj))
                     # astroid.extract_node() finds the first top-level AST node in the source
                     # without `# @` markers, so it can return non-FunctionDef nodes (e.g. a
-                    # ClassDef) when getsource() returns the enclosing class. Fall back to
+                    # ClassDef) when the source found is the enclosing class. Fall back to
                     # reflection-based parsing in that case.
                     if not isinstance(candidate, (astroid.FunctionDef, astroid.AsyncFunctionDef)):
                         logging.debug(
@@ -174,9 +177,9 @@ class FunctionNode(NodeEntityBase):
         ):
             docstring = getattr(self.parent_node.obj, "__doc__")
 
-        if docstring:
+        if docstring and self._docstring_can_fill(docstring_tags(docstring), docstring):
             #  Parse doc string to find missing types, kwargs and return type
-            parsed_docstring = DocstringParser(docstring, apiview=self.apiview)
+            parsed_docstring = parse_docstring(docstring)
 
             # Set return type if not already set
             if not self.return_type and parsed_docstring.ret_type:
@@ -223,7 +226,10 @@ class FunctionNode(NodeEntityBase):
             for argname in remaining_docstring_kwargs:
                 # if kwargs are explicitly set in docstring, ignore since they should be in param args
                 if argname not in ["\\**kwargs", "**kwargs", "kwargs"]:
-                    self.kwargs[argname] = parsed_docstring.kwargs[argname]
+                    # The parsed docstring is shared with other functions; add a copy.
+                    kwarg = copy.copy(parsed_docstring.kwargs[argname])
+                    kwarg.apiview = self.apiview
+                    self.kwargs[argname] = kwarg
 
             # retrieve the special **kwargs type from docstrings
             if self.special_kwarg and not self.special_kwarg.argtype:
@@ -237,6 +243,35 @@ class FunctionNode(NodeEntityBase):
                 if match:
                     self.special_vararg.argtype = match.argtype
 
+    def _docstring_can_fill(self, tags, docstring) -> bool:
+        """Whether the docstring describes anything that the signature is missing.
+
+        The docstring only supplies the return type, argument types and defaults that
+        the annotations lack, and keyword arguments. Otherwise, parsing it is skipped.
+        """
+        if not tags:
+            return False
+        if not self.return_type and ("rtype",) in tags:
+            return True
+        labels = {tag[-1] for tag in tags if len(tag) > 1}
+        for tag in tags:
+            if tag[0] != "keyword" or len(tag) not in (2, 3):
+                continue
+            kw_arg = self.kwargs.get(tag[-1])
+            # Keyword arguments described only in the docstring are added to the signature.
+            if kw_arg is None or (not kw_arg.is_required and (kw_arg.argtype is None or kw_arg.default is None)):
+                return True
+        # A default is only found in the docstring if it has one of the default_patterns,
+        # or if its type is bool, since a missing default is then cast to False.
+        may_have_default = "efault" in docstring or "bool" in docstring
+        for argname, arg in {**self.args, **self.posargs}.items():
+            if argname in labels and (arg.argtype is None or (arg.default is None and may_have_default)):
+                return True
+        for special in (self.special_kwarg, self.special_vararg):
+            if special and not special.argtype and special.argname in labels:
+                return True
+        return False
+
     def _reviewline_if_needed(
         self,
         review_lines,
@@ -426,6 +461,9 @@ class FunctionNode(NodeEntityBase):
         def_line.add_line_marker(self.namespace_id)
         review_lines.append(def_line)
 
+    def pylint_lookup_key(self):
+        return ("name", self.name)
+
     def is_pylint_error_owner(self, err) -> bool:
         """Check if this function node is the owner of a pylint error.
 
@@ -5,8 +5,9 @@ from typing import TYPE_CHECKING, List
 
 from ._base_node import NodeEntityBase
 from ._data_class_node import DataClassNode
-from ._class_node import ClassNode, _get_class_astroid_node
+from ._class_node import ClassNode, _get_class_astroid_node, _get_class_symbol
 from ._function_node import FunctionNode
+from ._symbol_table import get_symbol_table
 from apistub._generated.treestyle.parser.models import ReviewLines
 from .._parsing_helpers import parse_overloads, add_overload_nodes
 
@@ -36,6 +37,11 @@ class ModuleNode(NodeEntityBase):
 
     def _parse_functions_from_module(self, module_obj) -> List[astroid.FunctionDef]:
         try:
+            # The functions are only needed for their overloads. Skip parsing the whole
+            # module with astroid when its symbol table shows there are none.
+            file_path = inspect.getsourcefile(module_obj)
+            if file_path and not get_symbol_table(file_path).has_module_level_overloads():
+                return []
             module_node = astroid.parse(inspect.getsource(module_obj))
             return [x for x in module_node.body if isinstance(x, astroid.FunctionDef)]
         except:
@@ -48,20 +54,24 @@ class ModuleNode(NodeEntityBase):
         if hasattr(self.obj, "__all__"):
             public_entities = getattr(self.obj, "__all__")
         module_overloads = {}
-        # find class and function nodes in module
-        for name, member_obj in inspect.getmembers(self.obj):
-            if self._should_skip_parsing(name, member_obj, public_entities):
+        # find class and function nodes in module. Names are screened before the member is
+        # looked up, so private and unlisted members are never loaded (same order as
+        # inspect.getmembers, which sorts by name like dir does).
+        for name in dir(self.obj):
+            if self._should_skip_name(name, public_entities):
+                continue
+            try:
+                member_obj = getattr(self.obj, name)
+            except AttributeError:
+                continue
+            if self._should_skip_member(member_obj):
                 continue
             if inspect.isclass(member_obj):
                 class_type = ClassNode
                 try:
                     # see if a class is annotated as a dataclass
-                    node = _get_class_astroid_node(member_obj)
-                    if node and node.decorators:
-                        for item in node.decorators.nodes:
-                            if getattr(item, "name", None) == "dataclass":
-                                class_type = DataClassNode
-                                break
+                    if self._is_dataclass(member_obj):
+                        class_type = DataClassNode
                 except:
                     pass
                 class_node = class_type(
@@ -101,7 +111,20 @@ class ModuleNode(NodeEntityBase):
             else:
                 logging.debug("Skipping unknown type member in module: {}".format(name))
 
-    def _should_skip_parsing(self, name, member_obj, public_entities):
+    @staticmethod
+    def _is_dataclass(class_obj) -> bool:
+        _, symbol = _get_class_symbol(class_obj)
+        if symbol is not None:
+            return "dataclass" in symbol.decorators
+        # Not in the symbol table (e.g. dynamically created); parse whatever inspect finds.
+        node = _get_class_astroid_node(class_obj)
+        if node and node.decorators:
+            for item in node.decorators.nodes:
+                if getattr(item, "name", None) == "dataclass":
+                    return True
+        return False
+
+    def _should_skip_name(self, name, public_entities):
         # If module has list of published entities ( __all__) then include only those members
         if public_entities and name not in public_entities:
             logging.debug(
@@ -113,7 +136,9 @@ class ModuleNode(NodeEntityBase):
         if name.startswith("_"):
             logging.debug("Skipping object {}".format(name))
             return True
+        return False
 
+    def _should_skip_member(self, member_obj):
         # Skip any member in module level that is defined in external or built in package
         if hasattr(member_obj, "__module__"):
             return not getattr(member_obj, "__module__").startswith(
@@ -1,9 +1,9 @@
 import astroid
-import inspect
 
 from ._base_node import NodeEntityBase, get_qualified_name
 from ._docstring_parser import DocstringParser
 from ._astroid_parser import AstroidFunctionParser
+from ._symbol_table import get_function_source, is_handwritten
 
 
 class PropertyNode(NodeEntityBase):
@@ -20,6 +20,10 @@ class PropertyNode(NodeEntityBase):
         # Generate ID using name found by inspect
         self.namespace_id = self.generate_id()
 
+    def pylint_lookup_key(self):
+        fget = getattr(self.obj, "fget", None)
+        return ("name", fget.__name__) if fget else None
+
     def is_pylint_error_owner(self, err) -> bool:
         """Check if this property node is the owner of a pylint error.
 
@@ -36,7 +40,7 @@ class PropertyNode(NodeEntityBase):
 
         if hasattr(self.obj, "fget"):
             # Get property type if type hint
-            node = astroid.extract_node(inspect.getsource(self.obj.fget))
+            node = astroid.extract_node(get_function_source(self.obj.fget))
             parser = AstroidFunctionParser(
                 node, self.namespace, apiview=self.apiview, func_node=None
             )
@@ -68,16 +72,10 @@ class PropertyNode(NodeEntityBase):
         :return: True if the object is handwritten, False if generated.
         :rtype: bool
         """
-        try:
-            # Handle property objects by checking their getter function
-            if self.obj.fget:
-                source_file = inspect.getfile(self.obj.fget)
-                return source_file.endswith("_patch.py")
-            return False
-        except (TypeError, OSError):
-            # inspect.getfile() can raise TypeError for built-in objects
-            # or OSError if the source file cannot be found
-            return False
+        # Handle property objects by checking their getter function
+        if self.obj.fget:
+            return is_handwritten(self.obj.fget)
+        return False
 
     def generate_tokens(self, review_lines):
         """Generates token for the node and it's children recursively and add it to apiview
@@ -1,3 +1,4 @@
+import bisect
 import inspect
 import json
 import logging
@@ -5,8 +6,14 @@ import os
 import re
 import subprocess
 import sys
+import tempfile
+import time
 from types import SimpleNamespace
-from typing import Dict, List, Union, TYPE_CHECKING
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from .._file_cache import FileCache, get_file_cache
+from .._profile import get_profiler, profile_phase
+from ._symbol_table import get_function_line_range
 
 if TYPE_CHECKING:
     from ._base_node import NodeEntityBase
@@ -57,7 +64,16 @@ class PylintParser:
     AZURE_CHECKER_CODE = "47"
 
     items: List[PylintError] = []
-    _path_to_items: Dict[str, List[PylintError]] = {}
+    # PylintError.path -> (sorted lines, item indexes in the same order), for range lookups by match_items.
+    _path_to_items: Dict[str, Tuple[List[int], List[int]]] = {}
+    # Last component of PylintError.obj -> item indexes, for nodes that own errors by name.
+    _name_to_items: Dict[str, List[int]] = {}
+    # PylintError.owner -> item indexes. Rebuilt on demand after ownership changes.
+    _owner_to_items: Optional[Dict[str, List[int]]] = None
+    # State of a pylint subprocess launched by start() that has not been collected yet.
+    _pending: Optional[SimpleNamespace] = None
+    # Objects passed to match_items while pylint was still running.
+    _deferred_matches: List[object] = []
 
     @classmethod
     def _normalize_namespace_inits(cls, path):
@@ -130,41 +146,320 @@ class PylintParser:
         return overwritten
 
     @classmethod
-    def parse(cls, path):
+    def parse(cls, path, **kwargs):
+        cls.start(path, **kwargs)
+        cls.wait()
+
+    @classmethod
+    def start(cls, path, *, scoped=False, jobs=1, python=None):
+        """Launch pylint on *path* in the background.
+
+        The results are collected by wait(), which get_items and get_unclaimed
+        call on demand, so pylint can run while the package is installed and
+        imported. Calls to match_items made in the meantime are replayed in
+        order once the results are available.
+
+        :param bool scoped: Lint only the files of importable packages with only the
+         azure-pylint-guidelines-checker checkers enabled, using *jobs* pylint processes.
+        :param int jobs: Number of pylint processes used when *scoped* is set.
+        :param str python: Interpreter that runs pylint, e.g. a cached virtualenv's, so that
+         imports resolve against its packages. Defaults to the running interpreter.
+        """
         from apistub import ApiView
 
+        cls.wait()
+        cls.load_items([])
+        cls._deferred_matches = []
+
+        rcfile_path = os.path.join(ApiView.get_root_path(), ".pylintrc")
+        logging.debug(f"APIView root path: {ApiView.get_root_path()}")
+
+        # With --cache-dir, the results of a package whose files are all unchanged are reused.
+        # pylint infers across files (base classes, models, decorators), so a change to any
+        # file can change the messages of the others: results are reused for the whole
+        # package or not at all.
+        file_cache = get_file_cache()
+        cache_kind = None
+        package_digest = None
+        targets = [path]
+        lint_files = None
+        scoped_options = cls._scoped_options(rcfile_path, jobs) if scoped else None
+        if scoped_options is not None:
+            lint_files = cls._package_files(cls._python_files(path, rcfile_path))
+            targets = lint_files
+        if file_cache:
+            cache_kind = cls._cache_kind(rcfile_path, scoped=scoped_options is not None)
+            package_digest = cls._package_digest(path, cls._python_files(path, rcfile_path), file_cache)
+            cached = file_cache.get(cache_kind, package_digest)
+            logging.debug("pylint cache: {0}".format("hit" if cached is not None else "miss"))
+            if cached is not None:
+                root = cls._lint_root(path)
+                cls._load_messages(
+                    os.path.split(path)[-1],
+                    [dict(m, path=os.path.join(root, m["path"])) if m.get("path") else m for m in cached],
+                )
+                return
+        if not targets:
+            cls._load_messages(os.path.split(path)[-1], [])
+            return
+
         # Replace namespace azure/__init__.py files so pylint resolves
         # decorators correctly regardless of distribution format (src/sdist/whl).
         # The originals are restored after pylint finishes (even on failure) to
         # avoid permanently mutating source checkouts.
         overwritten = cls._normalize_namespace_inits(path)
 
-        pkg_name = os.path.split(path)[-1]
-        rcfile_path = os.path.join(ApiView.get_root_path(), ".pylintrc")
-        logging.debug(f"APIView root path: {ApiView.get_root_path()}")
-
         # Run pylint in a subprocess so that each analysis starts with a clean
         # Python/astroid state and is not affected by packages already imported
         # in the current process (e.g. during a full test-suite run).
-        cmd = [sys.executable, "-m", "pylint", path, "-f", "json", "--recursive=y", "--rcfile", rcfile_path]
+        # Output goes to temp files rather than pipes so a large JSON report
+        # cannot block the subprocess while nobody is reading it.
+        cmd = [python or sys.executable, "-m", "pylint", *targets, "-f", "json", "--recursive=y", "--rcfile", rcfile_path]
+        if scoped_options is not None:
+            cmd.extend(scoped_options)
+        stdout = tempfile.TemporaryFile(mode="w+")
+        stderr = tempfile.TemporaryFile(mode="w+")
+        try:
+            process = subprocess.Popen(cmd, stdout=stdout, stderr=stderr, text=True)
+        except Exception:
+            stdout.close()
+            stderr.close()
+            cls._restore_namespace_inits(overwritten)
+            raise
+        cls._pending = SimpleNamespace(
+            path=path,
+            process=process,
+            stdout=stdout,
+            stderr=stderr,
+            overwritten=overwritten,
+            file_cache=file_cache,
+            cache_kind=cache_kind,
+            package_digest=package_digest,
+            lint_files=lint_files,
+            jobs=jobs if scoped_options is not None else 1,
+            started=time.monotonic(),
+        )
+
+    @classmethod
+    def has_pending_namespace_changes(cls) -> bool:
+        """True while a running pylint subprocess has namespace __init__ files overwritten."""
+        return bool(cls._pending and cls._pending.overwritten)
+
+    @classmethod
+    def wait(cls):
+        """Block until a pylint run started by start() finishes and load its results."""
+        pending = cls._pending
+        if not pending:
+            return
+        cls._pending = None
+        valid_output = False
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with profile_phase("pylint-wait"):
+                returncode = pending.process.wait()
+            profiler = get_profiler()
+            if profiler:
+                # pylint runs in a subprocess; record how long it ran in the background.
+                profiler.record("pylint", time.monotonic() - pending.started)
+            pending.stdout.seek(0)
+            pending.stderr.seek(0)
+            output = pending.stdout.read()
+            errors = pending.stderr.read()
             try:
-                raw_messages = json.loads(result.stdout or "[]")
+                raw_messages = json.loads(output or "[]")
+                valid_output = True
             except json.JSONDecodeError:
                 logging.warning(
                     "pylint produced non-JSON output for %s (exit code %s). stderr: %r stdout: %r",
-                    path, result.returncode, result.stderr[:500], result.stdout[:200],
+                    pending.path, returncode, errors[:500], output[:200],
                 )
                 raw_messages = []
         finally:
-            for init_path, content in overwritten.items():
-                try:
-                    with open(init_path, "w") as f:
-                        f.write(content)
-                except Exception:
-                    logging.warning("Failed to restore %s after pylint run", init_path)
+            pending.stdout.close()
+            pending.stderr.close()
+            cls._restore_namespace_inits(pending.overwritten)
+
+        if pending.jobs > 1:
+            raw_messages = cls._dedupe_messages(raw_messages)
+        if pending.lint_files is not None:
+            # Parallel pylint reports files in completion order.
+            raw_messages = cls._order_by_file(pending.lint_files, raw_messages)
+        if pending.file_cache and valid_output:
+            root = cls._lint_root(pending.path)
+            pending.file_cache.set(
+                pending.cache_kind,
+                pending.package_digest,
+                [
+                    dict(m, path=os.path.relpath(os.path.abspath(m["path"]), root)) if m.get("path") else m
+                    for m in raw_messages
+                ],
+            )
+
+        cls._load_messages(os.path.split(pending.path)[-1], raw_messages)
+
+        deferred, cls._deferred_matches = cls._deferred_matches, []
+        for obj in deferred:
+            cls.match_items(obj)
+
+    @classmethod
+    def _cache_kind(cls, rcfile_path, *, scoped=False) -> str:
+        """Cache namespace for pylint results; changes whenever the rules, checkers or interpreter do."""
+        import importlib.metadata
+
+        parts = [sys.version]
+        for dist in ("pylint", "astroid", "azure-pylint-guidelines-checker"):
+            try:
+                parts.append(f"{dist}=={importlib.metadata.version(dist)}")
+            except importlib.metadata.PackageNotFoundError:
+                parts.append(f"{dist}==?")
+        try:
+            with open(rcfile_path, "rb") as f:
+                parts.append(FileCache.hash_content(f.read()))
+        except OSError:
+            pass
+        if scoped:
+            parts.append("scoped")
+        return "pylint-" + FileCache.hash_content("\n".join(parts))[:16]
+
+    @classmethod
+    def signature(cls, *, scoped=False) -> str:
+        """Identifies the pylint version, checkers and rules that produce diagnostics."""
+        from apistub import ApiView
+
+        return cls._cache_kind(os.path.join(ApiView.get_root_path(), ".pylintrc"), scoped=scoped)
+
+    @classmethod
+    def _scoped_options(cls, rcfile_path, jobs) -> Optional[List[str]]:
+        """pylint options that enable only the Azure guidelines checkers.
+
+        The rcfile's disable list is applied again after the checkers are enabled so
+        Azure rules it turns off stay off. Returns None if the plugin cannot be loaded.
+        """
+        import configparser
+
+        try:
+            import pylint_guidelines_checker
+            from pylint.checkers import BaseChecker
+        except ImportError as err:
+            logging.warning(f"Unable to load pylint_guidelines_checker, linting without scope: {err}")
+            return None
+        checkers = sorted(
+            {
+                obj.name
+                for obj in vars(pylint_guidelines_checker).values()
+                if inspect.isclass(obj)
+                and issubclass(obj, BaseChecker)
+                and obj.__module__ == pylint_guidelines_checker.__name__
+            }
+        )
+        config = configparser.ConfigParser(interpolation=None)
+        try:
+            config.read(rcfile_path)
+            disabled = config.get("MESSAGES CONTROL", "disable", fallback="")
+        except configparser.Error as err:
+            logging.debug(f"Unable to read pylint disable list from {rcfile_path}: {err}")
+            disabled = ""
+        options = ["--disable=all", "--enable={}".format(",".join(checkers))]
+        if disabled.strip():
+            options.append("--disable={}".format(",".join(x.strip() for x in disabled.split(",") if x.strip())))
+        if jobs > 1:
+            options.append("--jobs={}".format(jobs))
+        return options
+
+    @classmethod
+    def _package_files(cls, files: List[str]) -> List[str]:
+        """Keep files that belong to an importable package, which are the only ones apistub can render.
+
+        Drops setup scripts, samples, docs and other loose scripts.
+        """
+        return [f for f in files if os.path.isfile(os.path.join(os.path.dirname(f), "__init__.py"))]
+
+    @classmethod
+    def _dedupe_messages(cls, raw_messages) -> list:
+        """Drop repeated messages; pylint reports each message once per loaded plugin instance with --jobs."""
+        seen = set()
+        unique = []
+        for m in raw_messages:
+            key = json.dumps(m, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                unique.append(m)
+        return unique
+
+    @classmethod
+    def _python_files(cls, path, rcfile_path) -> List[str]:
+        """List the Python files under *path* that a recursive pylint run would lint.
+
+        pylint applies its ignore rules during directory discovery but not to files
+        passed explicitly, so the same rules are applied here before files are linted
+        individually.
+        """
+        import configparser
+
+        ignore, ignore_patterns = set(), [re.compile(r"^\.#")]
+        config = configparser.ConfigParser(interpolation=None)
+        try:
+            config.read(rcfile_path)
+            ignore.update(x.strip() for x in config.get("MASTER", "ignore", fallback="").split(",") if x.strip())
+            ignore_patterns.extend(
+                re.compile(x.strip())
+                for x in config.get("MASTER", "ignore-patterns", fallback="").split(",")
+                if x.strip()
+            )
+        except (configparser.Error, re.error) as err:
+            logging.debug(f"Unable to read pylint ignore rules from {rcfile_path}: {err}")
+
+        def is_ignored(name):
+            return name in ignore or any(p.match(name) for p in ignore_patterns)
+
+        if os.path.isfile(path):
+            return [os.path.abspath(path)] if path.endswith(".py") else []
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not is_ignored(d))
+            files.extend(
+                os.path.abspath(os.path.join(root, n))
+                for n in sorted(names)
+                if n.endswith(".py") and not is_ignored(n)
+            )
+        return files
+
+    @classmethod
+    def _lint_root(cls, path) -> str:
+        return os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path))
+
+    @classmethod
+    def _package_digest(cls, path, files: List[str], file_cache: FileCache) -> Optional[str]:
+        """Digest of every file a recursive pylint run over *path* sees: their paths and contents."""
+        root = cls._lint_root(path)
+        entries = []
+        for file_path in sorted(files):
+            digest = file_cache.hash_file(file_path)
+            if digest is None:
+                return None
+            entries.append(f"{os.path.relpath(file_path, root)}:{digest}")
+        return FileCache.hash_content("\n".join(entries))
+
+    @classmethod
+    def _order_by_file(cls, files: List[str], raw_messages) -> list:
+        """Order messages by *files*, keeping pylint's order within a file."""
+        by_file: Dict[str, list] = {f: [] for f in files}
+        unmapped = []
+        for m in raw_messages:
+            file_path = os.path.abspath(m["path"]) if m.get("path") else None
+            by_file.get(file_path, unmapped).append(m)
+        return [m for messages in by_file.values() for m in messages] + unmapped
 
+    @classmethod
+    def _restore_namespace_inits(cls, overwritten):
+        for init_path, content in overwritten.items():
+            try:
+                with open(init_path, "w") as f:
+                    f.write(content)
+            except Exception:
+                logging.warning("Failed to restore %s after pylint run", init_path)
+
+    @classmethod
+    def _load_messages(cls, pkg_name, raw_messages):
         # Wrap each JSON dict in a SimpleNamespace so PylintError can consume it
         # using the same attribute interface as a pylint Message object.
         messages = [
@@ -190,20 +485,57 @@ class PylintParser:
             logging.error(
                 f"Unable to load pylint_guidelines_checker. Check that it is installed."
             )
-        cls.items = [
-            PylintError(pkg_name, x)
-            for x in messages
-            if x.msg_id[1:3] == PylintParser.AZURE_CHECKER_CODE
-        ]
-        # Build a path-keyed index so match_items can skip items in other files
-        # without iterating over the full list for every node.
+        cls.load_items(
+            [
+                PylintError(pkg_name, x)
+                for x in messages
+                if x.msg_id[1:3] == PylintParser.AZURE_CHECKER_CODE
+            ]
+        )
+
+    @classmethod
+    def load_items(cls, items: List[PylintError]) -> None:
+        """Replace the parsed pylint errors, e.g. with those handed to a worker process."""
+        cls.items = items
+        # Index the items once so that matching and looking up a node's errors cost
+        # O(log n) per node instead of a scan over every item.
+        by_path: Dict[str, List[Tuple[int, int]]] = {}
+        cls._name_to_items = {}
+        for index, item in enumerate(cls.items):
+            if item.path:
+                by_path.setdefault(item.path, []).append((item.line, index))
+            if item.obj and "." in item.obj:
+                cls._name_to_items.setdefault(item.obj.rsplit(".", 1)[1], []).append(index)
         cls._path_to_items = {}
+        for path, entries in by_path.items():
+            entries.sort()
+            cls._path_to_items[path] = ([line for line, _ in entries], [index for _, index in entries])
+        cls._owner_to_items = None
+
+    @classmethod
+    def reset_owners(cls) -> None:
         for item in cls.items:
-            if item.path:
-                cls._path_to_items.setdefault(item.path, []).append(item)
+            item.owner = None
+        cls._owner_to_items = None
+
+    @classmethod
+    def assign_owners(cls, owners: Dict[int, str]) -> None:
+        """Set the owners of items by index, e.g. as assigned in a worker process."""
+        for index, owner in owners.items():
+            cls.items[index].owner = owner
+        cls._owner_to_items = None
+
+    @classmethod
+    def _path_entry(cls, source_file: str) -> Optional[Tuple[List[int], List[int]]]:
+        # PylintError.path holds the last two components of the linted file's path.
+        parts = source_file.split(os.path.sep)
+        return cls._path_to_items.get(os.path.join(*parts[-2:])) or cls._path_to_items.get(parts[-1])
 
     @classmethod
     def match_items(cls, obj) -> None:
+        if cls._pending:
+            cls._deferred_matches.append(obj)
+            return
         if not cls.items:
             return
         try:
@@ -214,21 +546,15 @@ class PylintParser:
             return
 
         # Find the subset of pylint errors that belong to this source file.
-        # Iterating over unique path keys (typically O(tens)) is much cheaper
-        # than scanning all items for every node.
-        candidates = None
-        for path_key, path_items in cls._path_to_items.items():
-            if source_file.endswith(path_key):
-                candidates = path_items
-                break
-        if not candidates:
+        entry = cls._path_entry(source_file)
+        if not entry:
             return
 
         try:
             if inspect.isclass(obj):
                 # Avoid inspect.getsourcelines for classes — it triggers an
                 # O(N_lines) ast.parse + AST walk (Python's _ClassFinder).
-                # Use our pre-built file index instead.  The lazy import is
+                # Use the file's symbol table instead.  The lazy import is
                 # safe: _class_node is always fully loaded before any node
                 # __init__ runs, so there is no circular-import issue at
                 # runtime even though the static import chain would be circular.
@@ -237,24 +563,53 @@ class PylintParser:
                 if start_line is None:
                     return
             else:
-                (source_lines, start_line) = inspect.getsourcelines(obj)
-                end_line = start_line + len(source_lines) - 1
+                # Functions are looked up in the same symbol table by their first line.
+                start_line, end_line = get_function_line_range(obj)
+                if start_line is None:
+                    (source_lines, start_line) = inspect.getsourcelines(obj)
+                    end_line = start_line + len(source_lines) - 1
         except Exception:
             return
 
-        for item in candidates:
+        lines, indexes = entry
+        first = bisect.bisect_left(lines, start_line)
+        last = bisect.bisect_right(lines, end_line)
+        if first == last:
+            return
+        owner = str(obj)
+        for index in indexes[first:last]:
             # nested items will overwrite ownership of their containing parent.
-            if item.line >= start_line and item.line <= end_line:
-                item.owner = str(obj)
+            cls.items[index].owner = owner
+        cls._owner_to_items = None
+
+    @classmethod
+    def _items_owned_by(cls, owner: str) -> List[int]:
+        if cls._owner_to_items is None:
+            cls._owner_to_items = {}
+            for index, item in enumerate(cls.items):
+                if item.owner:
+                    cls._owner_to_items.setdefault(item.owner, []).append(index)
+        return cls._owner_to_items.get(owner, [])
 
     @classmethod
     def get_items(cls, node: Union["NodeEntityBase", str]) -> List[PylintError]:
+        cls.wait()
         if isinstance(node, str): # "GLOBAL"
-            items = [x for x in cls.items if x.owner == str(node)]
+            return [cls.items[i] for i in cls._items_owned_by(node)]
+        # Narrow the items to those the node could own; the node makes the final call.
+        key = node.pylint_lookup_key()
+        if key is None:
+            candidates = cls.items
         else:
-            items = [x for x in cls.items if node.is_pylint_error_owner(x)]
-        return items
+            kind, value = key
+            if kind == "owner":
+                indexes = cls._items_owned_by(value)
+            else:
+                indexes = cls._name_to_items.get(value, [])
+            candidates = [cls.items[i] for i in indexes]
+        return [x for x in candidates if node.is_pylint_error_owner(x)]
 
     @classmethod
     def get_unclaimed(cls) -> List[PylintError]:
+        cls.wait()
         return [x for x in cls.items if not x.owner]
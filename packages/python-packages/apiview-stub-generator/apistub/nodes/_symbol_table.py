@@ -0,0 +1,321 @@
+import ast
+import inspect
+import io
+import os
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .._file_cache import get_file_cache
+
+# ---------------------------------------------------------------------------
+# Per-file symbol table.
+#
+# inspect re-reads and re-tokenizes the source file for every object it is asked
+# about: getsource(cls) walks the whole file's AST, getsource(func) tokenizes the
+# function's block, and getsource(module) hands back the whole file so that it can
+# be parsed again.  build_symbol_table reads and ast.parses each file ONCE and
+# records every class and function definition in it:
+#
+#   classes   – qualname -> line range and decorator names.  Only classes nested
+#               directly in the module or in other classes are recorded, which
+#               are the ones whose __qualname__ matches the recorded qualname.
+#   functions – first line -> name, line range and decorator names.  The first
+#               line is that of the first decorator, i.e. the function's
+#               co_firstlineno, so a function object is found without a search.
+#
+# ClassNode, FunctionNode, PropertyNode, ModuleNode and PylintParser consult the
+# table instead of inspect, and every node asks is_handwritten whether it comes
+# from a _patch.py file; objects it cannot place (C extensions, lambdas,
+# dynamically created classes) fall back to inspect.
+#
+# With --cache-dir, the table is persisted in the FileCache keyed by content
+# hash, so re-runs skip the parse for unchanged files.
+# ---------------------------------------------------------------------------
+
+# FileCache kind under which build_symbol_table persists its results.
+_SYMBOL_TABLE_CACHE_KIND = "symbol-table"
+
+
+class ClassSymbol(NamedTuple):
+    start: int
+    end: int
+    decorators: Tuple[str, ...]
+
+
+class FunctionSymbol(NamedTuple):
+    name: str
+    start: int
+    end: int
+    decorators: Tuple[str, ...]
+    is_module_level: bool
+
+
+class SymbolTable:
+    """Classes and functions defined in one source file.
+
+    Line numbers are 1-based and ranges are inclusive. Class ranges include the class
+    decorators and end at the last line of the class body. Function ranges match
+    inspect.getsourcelines: they start at the first decorator and also cover trailing
+    comments indented at least as deep as the function body.
+
+    :param str file_path: Path of the source file.
+    :param list[str] lines: Lines of the source file, with line endings.
+    :param dict classes: Qualified name to ClassSymbol.
+    :param dict functions: First line to FunctionSymbol.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        lines: List[str],
+        classes: Dict[str, ClassSymbol],
+        functions: Dict[int, FunctionSymbol],
+    ):
+        self.file_path = file_path
+        self.lines = lines
+        self.classes = classes
+        self.functions = functions
+        self.is_handwritten = file_path.endswith("_patch.py")
+
+    def source(self, start: int, end: int) -> str:
+        return "".join(self.lines[start - 1 : end])
+
+    def find_function(self, first_line: int, name: str) -> Optional[FunctionSymbol]:
+        symbol = self.functions.get(first_line)
+        if symbol and symbol.name == name:
+            return symbol
+        return None
+
+    def has_module_level_overloads(self) -> bool:
+        """Whether a function in the module body is decorated with @overload."""
+        return any(f.is_module_level and "overload" in f.decorators for f in self.functions.values())
+
+    def to_json(self) -> dict:
+        return {
+            "classes": {k: [v.start, v.end, list(v.decorators)] for k, v in self.classes.items()},
+            "functions": [[f.name, f.start, f.end, list(f.decorators), f.is_module_level] for f in self.functions.values()],
+        }
+
+    @classmethod
+    def from_json(cls, file_path: str, lines: List[str], value: dict) -> "SymbolTable":
+        classes = {k: ClassSymbol(start, end, tuple(decs)) for k, (start, end, decs) in value["classes"].items()}
+        functions = {
+            start: FunctionSymbol(name, start, end, tuple(decs), is_module_level)
+            for name, start, end, decs, is_module_level in value["functions"]
+        }
+        return cls(file_path, lines, classes, functions)
+
+
+# file_path -> SymbolTable  (built by build_symbol_table)
+_SYMBOL_TABLES: Dict[str, SymbolTable] = {}
+# file_path -> (st_mtime_ns, st_size) of the file when it was scanned
+_FILE_SIGNATURES: Dict[str, Optional[Tuple[int, int]]] = {}
+
+# Nodes that can contain class or function definitions.
+_BLOCK_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+
+def _file_signature(file_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _decorator_names(node) -> Tuple[str, ...]:
+    # Only bare names, e.g. @dataclass or @overload. These are the decorators that
+    # the astroid-based checks this table replaces recognize.
+    return tuple(d.id for d in node.decorator_list if isinstance(d, ast.Name))
+
+
+def _first_line(node) -> int:
+    return node.decorator_list[0].lineno if node.decorator_list else node.lineno
+
+
+def _function_end(node, lines: List[str]) -> int:
+    """Return the last line that inspect.getsourcelines reports for a function.
+
+    inspect's BlockFinder keeps comments that follow the body if they are indented at
+    least as deep as the body's first line. A body on the same line as the def has no
+    indented block and gets no trailing comments.
+    """
+    end = node.end_lineno
+    body = node.body[0]
+    indent = lines[body.lineno - 1][: body.col_offset] if body.lineno <= len(lines) else ""
+    if indent.strip():
+        return end
+    body_col = len(indent)
+    for index in range(end, len(lines)):
+        text = lines[index].lstrip()
+        if not text:
+            continue
+        if not text.startswith("#"):
+            break
+        if len(lines[index]) - len(text) >= body_col:
+            end = index + 1
+    return end
+
+
+def _scan(
+    node,
+    lines: List[str],
+    classes: Dict[str, ClassSymbol],
+    functions: Dict[int, FunctionSymbol],
+    prefix: str = "",
+    in_class_scope: bool = True,
+) -> None:
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.ClassDef):
+            qualname = prefix + child.name
+            if in_class_scope:
+                classes[qualname] = ClassSymbol(_first_line(child), child.end_lineno, _decorator_names(child))
+            _scan(child, lines, classes, functions, qualname + ".", in_class_scope)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            start = _first_line(child)
+            functions[start] = FunctionSymbol(
+                child.name,
+                start,
+                _function_end(child, lines),
+                _decorator_names(child),
+                isinstance(node, ast.Module),
+            )
+            _scan(child, lines, classes, functions, prefix + child.name + ".<locals>.", False)
+        elif isinstance(child, _BLOCK_NODES):
+            # if/try/with blocks: definitions inside keep the enclosing qualname, but
+            # their classes are not recorded, as before the table existed.
+            _scan(child, lines, classes, functions, prefix, False)
+
+
+def build_symbol_table(file_path: str) -> SymbolTable:
+    """Read *file_path* once, scan it for class and function definitions, and store
+    the result for get_symbol_table."""
+    _FILE_SIGNATURES[file_path] = _file_signature(file_path)
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as fh:
+            source = fh.read()
+    except OSError:
+        table = _SYMBOL_TABLES[file_path] = SymbolTable(file_path, [], {}, {})
+        return table
+    # Split lines ONCE so we can slice cheaply for each definition. Split on "\n" only and
+    # terminate the last line, as linecache does, so that slices match inspect.getsource.
+    lines = io.StringIO(source).readlines()
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    # With --cache-dir, an unchanged file skips the ast.parse entirely.
+    file_cache = get_file_cache()
+    digest = file_cache.hash_content(source) if file_cache else None
+    if file_cache:
+        cached = file_cache.get(_SYMBOL_TABLE_CACHE_KIND, digest)
+        if cached is not None:
+            table = _SYMBOL_TABLES[file_path] = SymbolTable.from_json(file_path, lines, cached)
+            return table
+    classes: Dict[str, ClassSymbol] = {}
+    functions: Dict[int, FunctionSymbol] = {}
+    try:
+        _scan(ast.parse(source), lines, classes, functions)
+    except SyntaxError:
+        classes, functions = {}, {}
+    table = _SYMBOL_TABLES[file_path] = SymbolTable(file_path, lines, classes, functions)
+    if file_cache:
+        file_cache.set(_SYMBOL_TABLE_CACHE_KIND, digest, table.to_json())
+    return table
+
+
+def get_symbol_table(file_path: str) -> SymbolTable:
+    table = _SYMBOL_TABLES.get(file_path)
+    if table is None:
+        table = build_symbol_table(file_path)
+    return table
+
+
+def _find_function(func) -> Tuple[Optional[SymbolTable], Optional[FunctionSymbol]]:
+    try:
+        # Unwrap the object so the function src is used, not the decorator src
+        func = inspect.unwrap(func)
+    except ValueError:
+        return None, None
+    if inspect.ismethod(func):
+        func = func.__func__
+    if not inspect.isfunction(func):
+        return None, None
+    code = func.__code__
+    table = _SYMBOL_TABLES.get(code.co_filename)
+    if table is None:
+        try:
+            file_path = inspect.getsourcefile(func)
+        except TypeError:
+            return None, None
+        if not file_path:
+            return None, None
+        table = get_symbol_table(file_path)
+    return table, table.find_function(code.co_firstlineno, code.co_name)
+
+
+def get_function_source(func) -> str:
+    """Return the source text of *func*, as inspect.getsource would.
+
+    :raises OSError: If the source code cannot be retrieved.
+    :raises TypeError: If *func* is a built-in object.
+    """
+    table, symbol = _find_function(func)
+    if symbol is None:
+        # Lambdas, C extensions and objects that are not functions.
+        return inspect.getsource(func)
+    return table.source(symbol.start, symbol.end)
+
+
+def get_function_line_range(func) -> Tuple[Optional[int], Optional[int]]:
+    """Return (start_1based, end_1based) for *func*, or (None, None) when the
+    function cannot be located in the symbol table."""
+    _, symbol = _find_function(func)
+    if symbol is None:
+        return None, None
+    return symbol.start, symbol.end
+
+
+def is_handwritten(obj) -> bool:
+    """Whether *obj* is defined in a "_patch.py" file.
+
+    A function's file is read from its code object instead of inspect.getfile, and
+    the answer comes from the file's symbol table when one is loaded.
+    """
+    try:
+        # Unwrap the object so the function src is used, not the decorator src
+        obj = inspect.unwrap(obj)
+        if inspect.ismethod(obj):
+            obj = obj.__func__
+        if inspect.isfunction(obj):
+            file_path = obj.__code__.co_filename
+        else:
+            file_path = inspect.getfile(obj)
+    except (TypeError, OSError, ValueError):
+        # inspect.getfile() can raise TypeError for built-in objects
+        # or OSError if the source file cannot be found
+        return False
+    table = _SYMBOL_TABLES.get(file_path)
+    if table is not None:
+        return table.is_handwritten
+    return file_path.endswith("_patch.py")
+
+
+def clear_symbol_tables(*, keep_unchanged: bool = False) -> Set[str]:
+    """Drop stored symbol tables.
+
+    :param bool keep_unchanged: Keep the tables of files whose modification time and
+     size are the same as when they were scanned.
+    :return: The paths whose tables were dropped.
+    """
+    if not keep_unchanged:
+        dropped = set(_SYMBOL_TABLES)
+        _SYMBOL_TABLES.clear()
+        _FILE_SIGNATURES.clear()
+        return dropped
+    stale = {
+        path
+        for path in _SYMBOL_TABLES
+        if _FILE_SIGNATURES.get(path) is None or _FILE_SIGNATURES[path] != _file_signature(path)
+    }
+    for path in stale:
+        _SYMBOL_TABLES.pop(path, None)
+        _FILE_SIGNATURES.pop(path, None)
+    return stale
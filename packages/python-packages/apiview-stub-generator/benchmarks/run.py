@@ -0,0 +1,297 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Time StubGenerator._generate_tokens on a synthetic package and compare against a baseline.
+
+Usage:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.25
+
+Each scenario (with and without pylint) is timed --repeat times and the median is
+reported. Peak memory is measured by a separate tracemalloc run, because tracing
+allocations slows the run down too much to time it at the same time. pylint itself
+runs in a subprocess, so its memory is not included.
+
+The "pylint-index" scenario does not generate tokens. It times how 10k pylint
+messages on a synthetic module are matched to the module's nodes and looked up for
+each node.
+
+With --baseline, the command exits with 1 if a scenario's time or peak memory is
+more than --tolerance (a fraction) above the baseline's.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, NamedTuple, Optional
+
+from apistub import ApiView, StubGenerator
+from apistub._batch import unload_namespace
+from apistub.nodes import PylintParser
+from apistub.nodes._base_node import NodeEntityBase
+from apistub.nodes._class_node import clear_caches
+
+from .synthetic import SyntheticPackageConfig, diagnostics, generate_package, pylint_messages, write_pylint_module
+
+PACKAGE_NAME = "apistub_benchmark"
+
+SCENARIOS = {
+    "no-pylint": {"skip_pylint": True},
+    "pylint": {"skip_pylint": False},
+}
+
+
+class ScenarioResult(NamedTuple):
+    seconds: float
+    runs: List[float]
+    peak_memory_bytes: int
+    review_lines: int
+    diagnostics: int
+
+
+def _count_lines(review_lines) -> int:
+    return sum(1 + _count_lines(line.children or []) for line in review_lines)
+
+
+def _generate(pkg_root: str, temp_path: str, skip_pylint: bool):
+    """Run the generator's token pass once, from a clean import state."""
+    unload_namespace(PACKAGE_NAME)
+    # Drop the results of a previous pylint run; skip_pylint does not reset them.
+    PylintParser.load_items([])
+    stub_generator = StubGenerator(pkg_path=pkg_root, temp_path=temp_path, skip_pylint=skip_pylint)
+    stub_generator.namespace = PACKAGE_NAME
+    return stub_generator._generate_tokens(pkg_root, PACKAGE_NAME, "1.0.0", source_url=None)
+
+
+def _measure(func: Callable, repeat: int):
+    """Time *func* *repeat* times, then run it once more under tracemalloc.
+
+    :return: The median time, the time of each run, the peak memory and the result of the last timed run.
+    """
+    runs = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(runs), runs, peak, result
+
+
+def run_scenario(pkg_root: str, temp_path: str, *, skip_pylint: bool, repeat: int = 3) -> ScenarioResult:
+    """Time the generator on the package at *pkg_root*, then measure its peak memory."""
+    seconds, runs, peak, apiview = _measure(lambda: _generate(pkg_root, temp_path, skip_pylint), repeat)
+    return ScenarioResult(seconds, runs, peak, _count_lines(apiview.review_lines), len(apiview.diagnostics))
+
+
+def run_pylint_index(
+    temp_path: str, *, repeat: int = 3, classes: int = 250, methods: int = 8, messages: int = 10000
+) -> ScenarioResult:
+    """Time matching *messages* pylint messages to the nodes of a synthetic module and looking up each node's.
+
+    Each run loads the messages, creates a node for every class and method, which
+    assigns the messages their owners, and gets the messages of every node. The
+    diagnostics count of the result is the number of messages the nodes got.
+    """
+    module_name = "{}_pylint_index".format(PACKAGE_NAME)
+    path = os.path.join(temp_path, module_name, "_pylint_index.py")
+    ranges = write_pylint_module(path, classes, methods)
+    raw_messages = pylint_messages(path, ranges, messages, methods)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    # inspect finds the source file of a class through sys.modules.
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    objects = []
+    for c in range(classes):
+        cls = getattr(module, "Class{}".format(c))
+        objects.append(cls)
+        objects.extend(getattr(cls, "method_{}".format(m)) for m in range(methods))
+
+    def match_and_look_up():
+        # Parse the module's symbol table again, as a run over a new package would.
+        clear_caches()
+        PylintParser._load_messages(module_name, raw_messages)
+        nodes = [NodeEntityBase(module_name, None, obj) for obj in objects]
+        return sum(len(PylintParser.get_items(node)) for node in nodes)
+
+    # Collect a pylint run left pending by an earlier scenario so it cannot replace the messages.
+    PylintParser.wait()
+    try:
+        seconds, runs, peak, found = _measure(match_and_look_up, repeat)
+    finally:
+        PylintParser.load_items([])
+        clear_caches()
+        del sys.modules[module_name]
+    return ScenarioResult(seconds, runs, peak, 0, found)
+
+
+def run_diagnostics(temp_path: str, *, repeat: int = 3, count: int = 50000, unique: int = 40000) -> ScenarioResult:
+    """Time emitting *count* diagnostics into an ApiView, all but *unique* of them duplicates.
+
+    The diagnostics count of the result is the number the ApiView kept.
+    """
+    emitted = diagnostics(count, unique)
+
+    def emit():
+        apiview = ApiView()
+        for diagnostic in emitted:
+            apiview.add_code_diagnostic(diagnostic)
+        return len(apiview.diagnostics)
+
+    seconds, runs, peak, kept = _measure(emit, repeat)
+    return ScenarioResult(seconds, runs, peak, 0, kept)
+
+
+# Scenarios that time one step on synthetic input instead of generating the package's tokens.
+MICRO_SCENARIOS = {
+    "pylint-index": run_pylint_index,
+    "diagnostics": run_diagnostics,
+}
+
+
+def run(config: SyntheticPackageConfig, *, scenarios: List[str], repeat: int = 3) -> dict:
+    """Generate the synthetic package and run each of *scenarios* on it."""
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_path:
+        pkg_root = generate_package(temp_path, PACKAGE_NAME, config)
+        sys.path.insert(0, pkg_root)
+        try:
+            for name in scenarios:
+                print("benchmark: running {}".format(name))
+                if name in MICRO_SCENARIOS:
+                    result = MICRO_SCENARIOS[name](temp_path, repeat=repeat)
+                else:
+                    result = run_scenario(pkg_root, temp_path, repeat=repeat, **SCENARIOS[name])
+                results[name] = result._asdict()
+        finally:
+            sys.path.remove(pkg_root)
+            unload_namespace(PACKAGE_NAME)
+    return {
+        "config": config._asdict(),
+        "python": platform.python_version(),
+        "scenarios": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Return a description of each measurement in *results* that regressed from *baseline*."""
+    regressions = []
+    if results["config"] != baseline["config"]:
+        print("benchmark: the baseline was recorded with a different package configuration")
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+        for key in ("seconds", "peak_memory_bytes"):
+            if previous[key] and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(
+                    "{0} {1}: {2:.4g} is {3:.0%} above the baseline's {4:.4g}".format(
+                        name, key, current[key], current[key] / previous[key] - 1, previous[key]
+                    )
+                )
+    return regressions
+
+
+def _print_results(results: dict, baseline: Optional[dict]) -> None:
+    for name, current in results["scenarios"].items():
+        line = "{0:<12} {1:8.2f}s  {2:8.1f} MiB  {3} review lines, {4} diagnostics".format(
+            name,
+            current["seconds"],
+            current["peak_memory_bytes"] / (1024 * 1024),
+            current["review_lines"],
+            current["diagnostics"],
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            line += "  (baseline {0:.2f}s, {1:.1f} MiB)".format(
+                previous["seconds"], previous["peak_memory_bytes"] / (1024 * 1024)
+            )
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = SyntheticPackageConfig()
+    parser = argparse.ArgumentParser(
+        description="Benchmarks apistub on a synthetic package and optionally compares the results against a baseline."
+    )
+    parser.add_argument("--modules", type=int, default=defaults.modules, help="Number of modules in the package.")
+    parser.add_argument(
+        "--classes-per-module",
+        dest="classes_per_module",
+        type=int,
+        default=defaults.classes_per_module,
+        help="Number of model classes in each module.",
+    )
+    parser.add_argument(
+        "--overloads", type=int, default=defaults.overloads, help="Number of overloaded client methods in each module."
+    )
+    parser.add_argument("--enums", type=int, default=defaults.enums, help="Number of enums in each module.")
+    parser.add_argument(
+        "--pylint-hits",
+        dest="pylint_hits",
+        type=int,
+        default=defaults.pylint_hits,
+        help="Number of client methods in each module that pylint reports.",
+    )
+    parser.add_argument(
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        choices=sorted(SCENARIOS) + sorted(MICRO_SCENARIOS),
+        help="Scenario to run. Can be repeated. Runs all scenarios by default.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs of each scenario.")
+    parser.add_argument("--output", help="Path of a JSON file to write the results to.")
+    parser.add_argument("--baseline", help="Path of a JSON results file to compare against.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed increase over the baseline, as a fraction. Defaults to 0.25.",
+    )
+    args = parser.parse_args(argv)
+
+    config = SyntheticPackageConfig(
+        modules=args.modules,
+        classes_per_module=args.classes_per_module,
+        overloads=args.overloads,
+        enums=args.enums,
+        pylint_hits=args.pylint_hits,
+    )
+    results = run(config, scenarios=args.scenarios or list(SCENARIOS) + list(MICRO_SCENARIOS), repeat=args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print_results(results, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("benchmark: regression: {}".format(regression))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
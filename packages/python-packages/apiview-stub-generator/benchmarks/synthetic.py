@@ -0,0 +1,246 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Generate synthetic packages shaped like generated Azure SDK clients.
+
+Each module is a subpackage holding a _models.py file of model classes (with
+docstring ivars, typed keyword-only constructors and properties), an _enums.py file
+of enums and a _client.py file with a client class whose methods have @overload
+variants. Client methods without type annotations trigger pylint diagnostics.
+
+write_pylint_module and pylint_messages build a module of plain classes and a set
+of pylint messages spread over it, for timing how pylint diagnostics are matched
+to nodes without running pylint. diagnostics builds diagnostics to emit into an
+ApiView, some of which repeat earlier ones.
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Tuple
+
+from apistub import Diagnostic, DiagnosticLevel
+
+
+class SyntheticPackageConfig(NamedTuple):
+    modules: int = 4
+    classes_per_module: int = 100
+    overloads: int = 3
+    enums: int = 10
+    pylint_hits: int = 5
+
+
+_SETUP_PY = """from setuptools import setup, find_packages
+
+setup(name="{dist_name}", version="1.0.0", packages=find_packages())
+"""
+
+_MODEL = '''
+
+class {name}({base}):
+    """Model number {index} of {module}.
+
+    :ivar name: The name of the resource.
+    :vartype name: str
+    :ivar tags: Resource tags.
+    :vartype tags: dict[str, str]
+    :ivar kind: The kind of the resource.
+    :vartype kind: str or ~{package}.{module}.{enum}
+    """
+
+    def __init__(self, *, name: str, tags: Optional[Dict[str, str]] = None, kind: Optional[str] = None, **kwargs: Any) -> None:
+        """
+        :keyword name: The name of the resource. Required.
+        :paramtype name: str
+        :keyword tags: Resource tags.
+        :paramtype tags: dict[str, str]
+        :keyword kind: The kind of the resource.
+        :paramtype kind: str or ~{package}.{module}.{enum}
+        """
+        super().__init__(**kwargs)
+        self.name = name
+        self.tags = tags
+        self.kind = kind
+
+    @property
+    def display_name(self) -> str:
+        """The display name of the resource."""
+        return self.name
+
+    def as_dict(self, *, keep_readonly: bool = True) -> Dict[str, Any]:
+        return {{"name": self.name, "tags": self.tags, "kind": self.kind}}
+'''
+
+_ENUM = '''
+
+class {name}(str, Enum):
+    """Enum number {index}."""
+
+    FIRST = "first"
+    SECOND = "second"
+    THIRD = "third"
+'''
+
+_OVERLOAD = '''
+    @overload
+    def {name}(self, body: {model}, *, content_type: str = "application/json", **kwargs: Any) -> {model}:
+        """Send the operation.
+
+        :param body: The request body.
+        :type body: ~{package}.{module}.{model}
+        :keyword content_type: The content type.
+        :paramtype content_type: str
+        :return: {model}
+        :rtype: ~{package}.{module}.{model}
+        """
+
+    @overload
+    def {name}(self, body: IO[bytes], *, content_type: str = "application/json", **kwargs: Any) -> {model}:
+        """Send the operation.
+
+        :param body: The request body.
+        :type body: IO[bytes]
+        :keyword content_type: The content type.
+        :paramtype content_type: str
+        :return: {model}
+        :rtype: ~{package}.{module}.{model}
+        """
+
+    def {name}(self, body: Union[{model}, IO[bytes]], **kwargs: Any) -> {model}:
+        """Send the operation.
+
+        :param body: The request body. Is either a {model} type or a IO[bytes] type.
+        :type body: ~{package}.{module}.{model} or IO[bytes]
+        :return: {model}
+        :rtype: ~{package}.{module}.{model}
+        """
+        return body
+'''
+
+_PYLINT_HIT = '''
+    def {name}(self, value):
+        return value
+'''
+
+
+def _write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def generate_package(root: str, package: str, config: SyntheticPackageConfig) -> str:
+    """Write a synthetic package named *package* under the directory *root*.
+
+    :return: The package's source root, which is also the directory to put on sys.path.
+    """
+    pkg_root = os.path.join(root, package)
+    _write(os.path.join(pkg_root, "setup.py"), _SETUP_PY.format(dist_name=package.replace("_", "-")))
+    modules = ["module{}".format(m) for m in range(config.modules)]
+    _write(
+        os.path.join(pkg_root, package, "__init__.py"),
+        "".join("from . import {}\n".format(m) for m in modules) + "\n__all__ = {!r}\n".format(modules),
+    )
+    for module in modules:
+        enums = ["{}Kind{}".format(module.capitalize(), i) for i in range(max(config.enums, 1))]
+        models = ["{}Model{}".format(module.capitalize(), i) for i in range(max(config.classes_per_module, 1))]
+        module_dir = os.path.join(pkg_root, package, module)
+        _write(
+            os.path.join(module_dir, "_enums.py"),
+            "from enum import Enum\n" + "".join(_ENUM.format(name=n, index=i) for i, n in enumerate(enums)),
+        )
+        body = [
+            "from typing import Any, Dict, Optional\n\nfrom ._enums import {}\n\n\nclass Model:\n"
+            "    def __init__(self, **kwargs: Any) -> None:\n        self.additional_properties = kwargs\n".format(enums[0])
+        ]
+        for i, name in enumerate(models):
+            # Every fifth model derives from the previous one, so inherited members are inspected too.
+            base = models[i - 1] if i % 5 == 4 else "Model"
+            body.append(
+                _MODEL.format(
+                    name=name, base=base, index=i, module=module, package=package, enum=enums[i % len(enums)]
+                )
+            )
+        _write(os.path.join(module_dir, "_models.py"), "".join(body))
+        client = [
+            "from typing import IO, Any, Union, overload\n\nfrom ._models import {}\n\n\n"
+            "class {}Client:\n"
+            '    """Client for {}.\n\n    :param str endpoint: The service endpoint.\n    """\n\n'
+            "    def __init__(self, endpoint: str, **kwargs: Any) -> None:\n"
+            "        self._endpoint = endpoint\n".format(", ".join(models), module.capitalize(), module)
+        ]
+        for i in range(config.overloads):
+            client.append(
+                _OVERLOAD.format(
+                    name="operation{}".format(i), model=models[i % len(models)], module=module, package=package
+                )
+            )
+        for i in range(config.pylint_hits):
+            client.append(_PYLINT_HIT.format(name="untyped_operation{}".format(i)))
+        _write(os.path.join(module_dir, "_client.py"), "".join(client))
+        _write(
+            os.path.join(module_dir, "__init__.py"),
+            "from ._client import {0}Client\nfrom ._enums import {1}\nfrom ._models import {2}\n\n"
+            "__all__ = {3!r}\n".format(
+                module.capitalize(),
+                ", ".join(enums),
+                ", ".join(models),
+                ["{}Client".format(module.capitalize())] + enums + models,
+            ),
+        )
+    return pkg_root
+
+
+def write_pylint_module(path: str, classes: int = 250, methods: int = 8) -> Dict[str, Tuple[int, int]]:
+    """Write a module of *classes* classes with *methods* methods each to *path*.
+
+    :return: The first and last line of each class and method, keyed by qualified name.
+    """
+    lines = []
+    ranges = {}
+    for c in range(classes):
+        class_start = len(lines) + 1
+        lines.append("class Class{}:".format(c))
+        for m in range(methods):
+            method_start = len(lines) + 1
+            lines.append("    def method_{}(self, value):".format(m))
+            lines.append("        result = value + {}".format(m))
+            lines.append("        return result")
+            ranges["Class{}.method_{}".format(c, m)] = (method_start, len(lines))
+        ranges["Class{}".format(c)] = (class_start, len(lines))
+        lines.append("")
+    _write(path, "\n".join(lines) + "\n")
+    return ranges
+
+
+def pylint_messages(path: str, ranges: Dict[str, Tuple[int, int]], count: int, methods: int = 8) -> List[dict]:
+    """Return *count* pylint JSON messages spread over the lines of the module written by write_pylint_module."""
+    total_lines = max(end for _, end in ranges.values())
+    messages = []
+    for i in range(count):
+        messages.append(
+            {
+                "type": "convention",
+                "module": "synthetic",
+                "obj": "method_{}".format(i % methods),
+                "line": (i * 7919) % total_lines + 1,
+                "column": 4,
+                "path": path,
+                "symbol": "synthetic-check",
+                "message": "Synthetic diagnostic {}.".format(i),
+                "message-id": "C4799",
+            }
+        )
+    return messages
+
+
+def diagnostics(count: int, unique: int) -> List[Diagnostic]:
+    """Return *count* diagnostics. Those after the first *unique* repeat the target and text of earlier ones."""
+    return [
+        Diagnostic(
+            level=DiagnosticLevel.WARNING,
+            text="Missing parameter docstring [docstring-missing-param] {}".format(i % unique % 7),
+            target_id="azure.generated.models.Model{}.__init__".format(i % unique // 7),
+        )
+        for i in range(count)
+    ]
@@ -4,16 +4,24 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import gzip
+import importlib
+import json
 import os
 import sys
 import tempfile
 import shutil
 from subprocess import check_call, run, PIPE
+from types import SimpleNamespace
 import pytest
 from pytest import fail, mark
 
-from apistub import ApiView, TokenKind, StubGenerator, ReviewLines
-from apistub.nodes import PylintParser
+from apistub import ApiView, TokenKind, StubGenerator, ReviewLines, Diagnostic, DiagnosticLevel
+from apistub.nodes import ModuleNode, PylintParser
+from apistub.nodes._pylint_parser import PylintError
+from apistub._batch import unload_namespace
+from apistub._file_cache import get_file_cache, set_file_cache
+from benchmarks.synthetic import diagnostics as synthetic_diagnostics
 
 # Read in all init files from init_files folder and add the paths to INIT_PARAMS in the form of (file_name, file_path)
 INIT_FILES_PATH = os.path.join(os.path.dirname(__file__), "init_files")
@@ -103,6 +111,37 @@ OLD_MAPPING_FILE_NAME = "apiview_mapping_python.json"
 MAPPING_PATHS = [(PKG_PATH, MAPPING_FILE_NAME), (SETUP_PKG_PATH, OLD_MAPPING_FILE_NAME)]
 MAPPING_IDS = [mapping_file for _, mapping_file in MAPPING_PATHS]
 
+INCREMENTAL_NAMESPACE = "apistub_incremental_probe"
+INCREMENTAL_FILES = {
+    "__init__.py": "from .models import Model\nfrom .client import Client\n",
+    "_base.py": "class Base:\n    def ping(self) -> str:\n        return 'pong'\n",
+    "models.py": (
+        "from ._base import Base\n\n\n"
+        "class Model(Base):\n"
+        "    def __init__(self, name: str) -> None:\n        self.name = name\n"
+    ),
+    "client.py": (
+        "from . import models\n\n\n"
+        "class Client:\n"
+        "    def get(self, name: str) -> models.Model:\n        return models.Model(name)\n\n"
+        "    def other(self) -> 'apistub_incremental_probe.other.Other':\n        pass\n"
+    ),
+    "other.py": "class Other:\n    def run(self) -> None:\n        pass\n",
+}
+# edited file -> new content, modules the incremental run must rebuild
+INCREMENTAL_EDITS = {
+    "modified-module": (
+        {"other.py": INCREMENTAL_FILES["other.py"] + "\n    def stop(self) -> None:\n        pass\n"},
+        ["other"],
+    ),
+    "base-class-file": (
+        {"_base.py": INCREMENTAL_FILES["_base.py"] + "\n    def pong(self) -> str:\n        return 'ping'\n"},
+        ["", "models"],
+    ),
+    # client.py is unchanged, but its link to Other no longer resolves
+    "relinked-module": ({"other.py": "class Renamed:\n    pass\n"}, ["", "client", "other"]),
+}
+
 
 class TestApiView:
     def _count_newlines(self, apiview: ApiView):
@@ -294,6 +333,29 @@ class TestApiView:
         assert len(enum_value_diags) == 2, f"Should have 2 enum value diagnostics for PylintViolationEnum.password and PylintViolationEnum.CERTIFICATE, got {len(enum_value_diags)}"
         assert len(property_diags) == 1, f"Should have 1 property diagnostic, got {len(property_diags)}"
 
+    def test_add_code_diagnostic_drops_duplicates(self):
+        """Emit 50k diagnostics, a fifth of them duplicates."""
+        unique = 40000
+        diagnostics = synthetic_diagnostics(50000, unique)
+        apiview = ApiView()
+        for diagnostic in diagnostics:
+            apiview.add_code_diagnostic(diagnostic)
+
+        assert len(apiview.diagnostics) == unique
+        # The first occurrence of each (target, text) is kept, in emission order.
+        assert apiview.diagnostics == diagnostics[:unique]
+
+    def test_diagnostic_log_keeps_duplicates(self):
+        apiview = ApiView()
+        first = Diagnostic(level=DiagnosticLevel.WARNING, text="Sample diagnostic.", target_id="pkg.Model")
+        apiview.add_code_diagnostic(first)
+        apiview.diagnostic_log = []
+        duplicate = Diagnostic(level=DiagnosticLevel.WARNING, text="Sample diagnostic.", target_id="pkg.Model")
+        apiview.add_code_diagnostic(duplicate)
+        # the duplicate is only emitted once, but still recorded for the module that emitted it
+        assert apiview.diagnostics == [first]
+        assert apiview.diagnostic_log == [duplicate]
+
     def test_add_type(self):
         apiview = ApiView()
         review_line = apiview.review_lines.create_review_line()
@@ -318,6 +380,159 @@ class TestApiView:
         except ValueError:
             pass
 
+    def test_pylint_runs_in_background(self):
+        temp_path = tempfile.gettempdir()
+        stub_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path)
+        # pylint is only collected once diagnostics are needed
+        assert PylintParser._pending is not None
+        apiview = stub_gen.generate_tokens()
+        assert PylintParser._pending is None
+        assert not PylintParser._deferred_matches
+        assert apiview.diagnostics
+
+    def test_parallel_jobs_match_serial(self):
+        temp_path = tempfile.gettempdir()
+        serial_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path)
+        serial = serial_gen.serialize(serial_gen.generate_tokens())
+
+        parallel_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path, jobs=2)
+        apiview = parallel_gen.generate_tokens()
+        self._validate_line_ids(apiview)
+        # Worker results must merge into exactly the serial token file, including diagnostics.
+        assert parallel_gen.serialize(apiview) == serial
+
+    def test_write_matches_serialize(self):
+        apiview = ApiView(pkg_name="apiview-stub-generator-test", namespace="apiview_stub_generator_test")
+        apiview.generate_tokens()
+        for name in ["apiview_stub_generator_test", "apiview_stub_generator_test.models"]:
+            module_node = ModuleNode(name, importlib.import_module(name), apiview.namespace, apiview=apiview)
+            module_node.generate_tokens(apiview.review_lines)
+        apiview.add_code_diagnostic(
+            Diagnostic(level=DiagnosticLevel.WARNING, text="Sample diagnostic.", target_id="apiview_stub_generator_test")
+        )
+        stub_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=tempfile.gettempdir(), skip_pylint=True)
+        expected = stub_gen.serialize(apiview)
+        with tempfile.TemporaryDirectory() as out_dir:
+            json_path = os.path.join(out_dir, "tokens.json")
+            stub_gen.write(apiview, json_path)
+            with open(json_path, "r") as f:
+                assert f.read() == expected
+            gzip_path = os.path.join(out_dir, "tokens.json.gz")
+            stub_gen.write(apiview, gzip_path)
+            with gzip.open(gzip_path, "rt") as f:
+                assert f.read() == expected
+
+    def test_cache_dir_reuses_results(self):
+        temp_path = tempfile.gettempdir()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path, cache_dir=cache_dir)
+            cold = cold_gen.serialize(cold_gen.generate_tokens())
+
+            warm_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path, cache_dir=cache_dir)
+            # every file is unchanged, so pylint is not launched at all
+            assert PylintParser._pending is None
+            warm = warm_gen.serialize(warm_gen.generate_tokens())
+            file_cache = get_file_cache()
+            assert file_cache.hits > 0
+            assert file_cache.misses == 0
+            set_file_cache(None)
+        assert warm == cold
+
+    def test_scoped_pylint_matches_full_run(self):
+        temp_path = tempfile.gettempdir()
+        full_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path)
+        full = full_gen.serialize(full_gen.generate_tokens())
+
+        scoped_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path, scoped_pylint=True, jobs=2)
+        lint_files = PylintParser._pending.lint_files
+        # loose scripts such as the sphinx conf.py are not part of an importable package
+        assert lint_files
+        assert not any(os.path.basename(f) == "conf.py" for f in lint_files)
+        scoped = scoped_gen.serialize(scoped_gen.generate_tokens())
+        assert scoped == full
+
+    def test_incremental_splices_unchanged_modules(self):
+        temp_path = tempfile.gettempdir()
+        with tempfile.TemporaryDirectory() as out_dir:
+            manifest_path = os.path.join(out_dir, "manifest.json")
+            previous_path = os.path.join(out_dir, "previous.json")
+            full_gen = StubGenerator(pkg_path=PKG_PATH, temp_path=temp_path, manifest_path=manifest_path)
+            full = full_gen.serialize(full_gen.generate_tokens())
+            assert full_gen.rebuilt_modules == list(full_gen.module_dict)
+            with open(previous_path, "w") as f:
+                f.write(full)
+
+            incremental_gen = StubGenerator(
+                pkg_path=PKG_PATH, temp_path=temp_path, manifest_path=manifest_path, previous_path=previous_path
+            )
+            incremental = incremental_gen.serialize(incremental_gen.generate_tokens())
+            # nothing changed, so every module is spliced from the previous token file
+            assert incremental_gen.rebuilt_modules == []
+        assert incremental == full
+
+    @mark.parametrize("edit, rebuilt", INCREMENTAL_EDITS.values(), ids=INCREMENTAL_EDITS.keys())
+    def test_incremental_matches_full_build_after_edit(self, tmp_path, edit, rebuilt):
+        pkg_root = str(tmp_path / "pkg")
+        manifest_path = str(tmp_path / "manifest.json")
+        previous_path = str(tmp_path / "previous.json")
+
+        def write_files(files):
+            pkg_dir = os.path.join(pkg_root, INCREMENTAL_NAMESPACE)
+            os.makedirs(pkg_dir, exist_ok=True)
+            for name, content in files.items():
+                with open(os.path.join(pkg_dir, name), "w") as f:
+                    f.write(content)
+            shutil.rmtree(os.path.join(pkg_dir, "__pycache__"), ignore_errors=True)
+
+        def pylint_item(file_name, line, obj):
+            msg = SimpleNamespace(
+                C="C",
+                category="convention",
+                module=INCREMENTAL_NAMESPACE,
+                obj=obj,
+                line=line,
+                column=0,
+                end_line=line,
+                end_column=1,
+                path=os.path.join(pkg_root, INCREMENTAL_NAMESPACE, file_name),
+                symbol="missing-class-docstring",
+                msg="Missing class docstring",
+                msg_id="C0115",
+            )
+            return PylintError("apistub-incremental-probe", msg)
+
+        def build(**kwargs):
+            unload_namespace(INCREMENTAL_NAMESPACE)
+            importlib.invalidate_caches()
+            stub_gen = StubGenerator(pkg_path=pkg_root, temp_path=str(tmp_path), skip_pylint=True, **kwargs)
+            # diagnostics from both a spliced and a rebuilt module
+            PylintParser.load_items([pylint_item("models.py", 4, "Model"), pylint_item("other.py", 1, "Other")])
+            # generate from the sources in place, so each build imports the edited files
+            apiview = stub_gen._generate_tokens(pkg_root, "apistub-incremental-probe", "1.0.0", source_url=None)
+            return stub_gen, stub_gen.serialize(apiview)
+
+        write_files(INCREMENTAL_FILES)
+        sys.path.insert(0, pkg_root)
+        try:
+            _, previous = build(manifest_path=manifest_path)
+            with open(previous_path, "w") as f:
+                f.write(previous)
+            write_files(edit)
+            incremental_gen, incremental = build(manifest_path=manifest_path, previous_path=previous_path)
+            _, full = build()
+        finally:
+            sys.path.remove(pkg_root)
+            unload_namespace(INCREMENTAL_NAMESPACE)
+            PylintParser.load_items([])
+
+        assert incremental_gen.rebuilt_modules == [
+            ".".join(filter(None, [INCREMENTAL_NAMESPACE, m])) for m in rebuilt
+        ]
+        assert incremental != previous
+        assert json.loads(full)["Diagnostics"]
+        # review lines and diagnostics alike
+        assert incremental == full
+
     @mark.parametrize("pkg_path, mapping_file", MAPPING_PATHS, ids=MAPPING_IDS)
     def test_mapping_file(self, pkg_path, mapping_file):
         # Check that mapping file exists
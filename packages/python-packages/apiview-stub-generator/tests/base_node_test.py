@@ -18,6 +18,7 @@ import typing
 import pytest
 
 from apistub.nodes import get_qualified_name
+from apistub.nodes._base_node import _QualifiedNameCache, clear_qualified_name_cache, qualified_name_cache_stats
 
 
 class TestGetQualifiedNameOptionalUnion:
@@ -74,3 +75,38 @@ class TestGetQualifiedNameOptionalUnion:
         assert result == "Optional[Union[int, str]]", (
             f"Expected 'Optional[Union[int, str]]' for 'int | str | None' but got {result!r}."
         )
+
+
+class TestQualifiedNameCache:
+    """get_qualified_name is memoized on the annotation's identity and the namespace."""
+
+    def test_repeated_annotation_is_a_hit(self):
+        clear_qualified_name_cache()
+        annotation = typing.Dict[str, typing.List[int]]
+        first = get_qualified_name(annotation, "test")
+        misses = qualified_name_cache_stats()["misses"]
+        assert get_qualified_name(annotation, "test") == first
+        stats = qualified_name_cache_stats()
+        assert stats["misses"] == misses
+        assert stats["hits"] >= 1
+
+    def test_equal_unions_keep_their_order(self):
+        clear_qualified_name_cache()
+        assert typing.Union[int, str] == typing.Union[str, int]
+        assert get_qualified_name(typing.Union[int, str], "test") == "Union[int, str]"
+        assert get_qualified_name(typing.Union[str, int], "test") == "Union[str, int]"
+
+    def test_namespace_is_part_of_the_key(self):
+        clear_qualified_name_cache()
+        cls = type("Model", (), {"__module__": "azure.example.models"})
+        assert get_qualified_name(cls, "azure.example") == "azure.example.models.Model"
+        assert get_qualified_name(cls, "azure.other") == "Model"
+
+    def test_cache_is_bounded(self):
+        cache = _QualifiedNameCache(2)
+        annotations = [typing.List[int], typing.List[str], typing.List[bytes]]
+        for annotation in annotations:
+            cache.get(annotation, "test")
+        assert cache.stats() == {"size": 2, "hits": 0, "misses": 3, "evictions": 1}
+        assert cache.get(typing.List[bytes], "test") == "List[bytes]"
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,78 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import sys
+import tempfile
+
+from apistub._batch import find_packages, generate_batch, unload_namespace
+from apistub.nodes._class_node import _get_class_source, clear_caches
+from apistub.nodes._symbol_table import _SYMBOL_TABLES, build_symbol_table
+
+PKG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "apiview-stub-generator-test"))
+
+
+class _Probe:
+    pass
+
+
+class TestBatch:
+    def test_find_packages_expands_wheel_directories(self, tmp_path):
+        for name in ("b-1.0-py3-none-any.whl", "a-1.0.tar.gz", "notes.txt"):
+            open(os.path.join(str(tmp_path), name), "w").close()
+        assert find_packages([str(tmp_path), PKG_PATH]) == [
+            os.path.join(str(tmp_path), "a-1.0.tar.gz"),
+            os.path.join(str(tmp_path), "b-1.0-py3-none-any.whl"),
+            PKG_PATH,
+        ]
+
+    def test_unload_namespace(self):
+        sys.modules["apistub_batch_probe"] = sys
+        sys.modules["apistub_batch_probe.child"] = sys
+        sys.modules["apistub_batch_probe_other"] = sys
+        try:
+            unload_namespace("apistub_batch_probe")
+            assert "apistub_batch_probe" not in sys.modules
+            assert "apistub_batch_probe.child" not in sys.modules
+            assert "apistub_batch_probe_other" in sys.modules
+        finally:
+            sys.modules.pop("apistub_batch_probe_other", None)
+
+    def test_clear_caches_keeps_unchanged_files(self, tmp_path):
+        changed = os.path.join(str(tmp_path), "changed.py")
+        with open(changed, "w") as f:
+            f.write("class Changed:\n    pass\n")
+        clear_caches()
+        try:
+            assert _get_class_source(_Probe)
+            build_symbol_table(changed)
+            with open(changed, "w") as f:
+                f.write("class Changed:\n    value = 1234\n")
+            clear_caches(keep_unchanged=True)
+            assert __file__ in _SYMBOL_TABLES
+            assert changed not in _SYMBOL_TABLES
+            clear_caches()
+            assert not _SYMBOL_TABLES
+        finally:
+            clear_caches()
+
+    def test_generate_batch_continues_after_failure(self, tmp_path):
+        out_path = str(tmp_path)
+        missing = os.path.join(out_path, "missing-package")
+        # generate_batch unloads the package's modules; keep the ones other tests imported.
+        loaded = {k: v for k, v in sys.modules.items() if k.split(".")[0] == "apiview_stub_generator_test"}
+        try:
+            results = generate_batch(
+                [missing, PKG_PATH], out_path=out_path, temp_path=tempfile.gettempdir(), skip_pylint=True
+            )
+        finally:
+            sys.modules.update(loaded)
+        assert [r.pkg_path for r in results] == [missing, PKG_PATH]
+        assert results[0].error and not results[0].out_file_path
+        assert results[1].error is None
+        with open(results[1].out_file_path, "r") as f:
+            assert json.load(f)["PackageName"] == "apiview-stub-generator-test"
@@ -0,0 +1,62 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import os
+import sys
+
+from apistub.nodes import PylintParser
+from benchmarks.run import PACKAGE_NAME, compare, run, run_diagnostics, run_pylint_index
+from benchmarks.synthetic import SyntheticPackageConfig, generate_package
+
+
+class TestBenchmark:
+    def test_generate_package(self, tmp_path):
+        config = SyntheticPackageConfig(modules=2, classes_per_module=6, overloads=2, enums=2, pylint_hits=1)
+        pkg_root = generate_package(str(tmp_path), "synthetic_probe", config)
+        assert os.path.exists(os.path.join(pkg_root, "setup.py"))
+        sys.path.insert(0, pkg_root)
+        try:
+            from synthetic_probe import module1
+
+            assert module1.Module1Model4.__bases__ == (module1.Module1Model3,)
+            assert len(module1.__all__) == 1 + 2 + 6
+        finally:
+            sys.path.remove(pkg_root)
+            for name in [m for m in sys.modules if m.startswith("synthetic_probe")]:
+                del sys.modules[name]
+
+    def test_run_without_pylint(self):
+        config = SyntheticPackageConfig(modules=1, classes_per_module=3, overloads=1, enums=1, pylint_hits=0)
+        results = run(config, scenarios=["no-pylint"], repeat=1)
+        scenario = results["scenarios"]["no-pylint"]
+        assert scenario["seconds"] > 0
+        assert scenario["peak_memory_bytes"] > 0
+        assert scenario["review_lines"] > 0
+        assert not [m for m in sys.modules if m.startswith(PACKAGE_NAME)]
+
+    def test_pylint_index(self, tmp_path):
+        result = run_pylint_index(str(tmp_path), repeat=1, classes=10, methods=2, messages=200)
+        assert result.seconds > 0
+        assert result.peak_memory_bytes > 0
+        # every message falls inside a method named by its obj, or on a blank line between classes
+        assert 0 < result.diagnostics <= 200
+        assert PylintParser.items == []
+        assert not [m for m in sys.modules if m.startswith(PACKAGE_NAME)]
+
+    def test_diagnostics(self, tmp_path):
+        result = run_diagnostics(str(tmp_path), repeat=1, count=500, unique=400)
+        assert result.seconds > 0
+        assert result.diagnostics == 400
+
+    def test_compare(self):
+        config = {"modules": 1}
+        baseline = {"config": config, "scenarios": {"pylint": {"seconds": 10.0, "peak_memory_bytes": 100}}}
+        within_tolerance = {"config": config, "scenarios": {"pylint": {"seconds": 12.0, "peak_memory_bytes": 90}}}
+        slower = {"config": config, "scenarios": {"pylint": {"seconds": 13.0, "peak_memory_bytes": 90}}}
+        assert compare(within_tolerance, baseline, 0.25) == []
+        regressions = compare(slower, baseline, 0.25)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("pylint seconds")
@@ -5,7 +5,9 @@
 # --------------------------------------------------------------------------
 
 from pydoc import Doc
-from apistub.nodes import DocstringParser
+from apistub.nodes import DocstringParser, FunctionNode
+from apistub.nodes._docstring_parser import _DOCSTRING_CACHE, docstring_tags, parse_docstring
+from apistub.nodes._function_node import clear_func_caches
 from ._test_util import MockApiView
 
 
@@ -221,3 +223,57 @@ class TestDocstringParser:
         assert parser.default_for("value") == "cat"
         assert parser.default_for("another") == "dog"
         assert parser.default_for("some_class") == ":py:class:`apistubgen.test.models.FakeObject`"
+
+
+class _LazyClient:
+    def annotated(self, name: str) -> str:
+        """Annotated method.
+
+        :param name: The name.
+        :type name: str
+        :return: The name.
+        :rtype: str
+        """
+
+    def with_docstring_kwargs(self, **kwargs) -> str:
+        """Method whose keyword arguments are only documented.
+
+        :keyword int retries: The number of retries.
+        """
+
+
+class _LazySubclient(_LazyClient):
+    pass
+
+
+class TestLazyDocstringParsing:
+    def test_docstring_tags(self):
+        assert docstring_tags(docstring_default_legacy) == [
+            ("param", "value"),
+            ("type", "value"),
+            ("param", "another"),
+            ("type", "value"),
+            ("param", "some_class"),
+            ("type", "some_class"),
+        ]
+        assert docstring_tags(":not a tag\n  :rtype: str") == [("rtype",)]
+
+    def test_complete_annotations_skip_parsing(self):
+        clear_func_caches()
+        FunctionNode("test", None, apiview=MockApiView, obj=_LazyClient.annotated)
+        assert not _DOCSTRING_CACHE
+
+    def test_inherited_docstring_is_parsed_once(self):
+        clear_func_caches()
+        nodes = [
+            FunctionNode("test", None, apiview=MockApiView, obj=client.with_docstring_kwargs)
+            for client in (_LazyClient, _LazySubclient)
+        ]
+        docstring = _LazyClient.with_docstring_kwargs.__doc__
+        assert list(_DOCSTRING_CACHE) == [docstring]
+        assert parse_docstring(docstring) is _DOCSTRING_CACHE[docstring]
+        # Each node gets its own copy of the keyword argument found in the shared docstring.
+        first, second = (node.kwargs["retries"] for node in nodes)
+        assert first is not second
+        assert first.argtype == second.argtype == "Optional[int]"
+        assert first.apiview is MockApiView
@@ -0,0 +1,143 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from apistub._batch import unload_namespace
+from apistub._generated.treestyle.parser.models import ApiView, ReviewLines
+from apistub._parallel import ModuleResult, WorkerPool, _merge_node_ids, _shards, inspect_modules
+from apistub.nodes import PylintParser
+from apistub.nodes._pylint_parser import PylintError
+
+NAMESPACE = "apistub_parallel_probe"
+
+GOOD_MODULE = '''
+class Client:
+    def send(self, value: int) -> int:
+        return value
+'''
+
+NEEDS_EXTRA_MODULE = '''
+from apistub_parallel_probe_extra import Extra
+
+
+class ExtraClient(Extra):
+    pass
+'''
+
+EXITS_ONCE_MODULE = '''
+import os
+
+_MARKER = os.path.join(os.path.dirname(__file__), "exited")
+if not os.path.exists(_MARKER):
+    open(_MARKER, "w").close()
+    os._exit(1)
+
+
+class Survivor:
+    pass
+'''
+
+
+@pytest.fixture
+def probe_package(tmp_path):
+    pkg_dir = os.path.join(str(tmp_path), NAMESPACE)
+    os.makedirs(pkg_dir)
+    files = {
+        "__init__.py": "",
+        "good.py": GOOD_MODULE,
+        "needs_extra.py": NEEDS_EXTRA_MODULE,
+        "exits_once.py": EXITS_ONCE_MODULE,
+    }
+    for name, content in files.items():
+        with open(os.path.join(pkg_dir, name), "w") as f:
+            f.write(content)
+    sys.path.insert(0, str(tmp_path))
+    PylintParser.load_items([])
+    try:
+        yield str(tmp_path)
+    finally:
+        sys.path.remove(str(tmp_path))
+        unload_namespace(NAMESPACE)
+
+
+def _inspect(modules, **kwargs):
+    apiview = ApiView(pkg_name="apistub-parallel-probe", namespace=NAMESPACE)
+    results = inspect_modules(modules, apiview, jobs=2, **kwargs)
+    return apiview, results
+
+
+class TestParallel:
+    def test_shards_keep_module_order(self):
+        modules = ["m{}".format(i) for i in range(10)]
+        shards = _shards(modules, 2)
+        assert [m for shard in shards for m in shard] == modules
+        assert len(shards) == 5
+        assert _shards(modules[:1], 4) == [["m0"]]
+
+    def test_merge_rejects_name_indexed_by_two_modules(self):
+        def result(module_name, node_ids):
+            return ModuleResult(module_name, ReviewLines(), [], node_ids, {})
+
+        merged = _merge_node_ids([result("a", {"pkg.A": "pkg.A"}), result("b", {"pkg.B": "pkg.B"})])
+        assert merged == {"pkg.A": "pkg.A", "pkg.B": "pkg.B"}
+        with pytest.raises(ValueError, match="Index already has pkg.A node"):
+            _merge_node_ids([result("a", {"pkg.A": "pkg.A"}), result("b", {"pkg.A": "pkg.b.A"})])
+
+    def test_import_failure_retries_only_failed_module(self, probe_package):
+        calls = []
+
+        def install_extras():
+            calls.append(True)
+            with open(os.path.join(probe_package, "apistub_parallel_probe_extra.py"), "w") as f:
+                f.write("class Extra:\n    pass\n")
+
+        modules = [NAMESPACE + ".good", NAMESPACE + ".needs_extra"]
+        apiview, results = _inspect(modules, install_extras=install_extras)
+        assert calls == [True]
+        assert [r.module_name for r in results] == modules
+        assert not any(r.import_error for r in results)
+        assert len(apiview.review_lines) > 0
+
+    def test_import_failure_without_extras_raises(self, probe_package):
+        with pytest.raises(ImportError, match="needs_extra"):
+            _inspect([NAMESPACE + ".good", NAMESPACE + ".needs_extra"])
+
+    def test_crashed_worker_shard_is_rerun(self, probe_package):
+        modules = [NAMESPACE + ".good", NAMESPACE + ".exits_once"]
+        _, results = _inspect(modules)
+        assert [r.module_name for r in results] == modules
+        assert os.path.exists(os.path.join(probe_package, NAMESPACE, "exited"))
+
+    def test_shared_pool_workers_load_pylint_items_from_the_run_payload(self, probe_package):
+        msg = SimpleNamespace(
+            C="C",
+            category="convention",
+            module=NAMESPACE + ".good",
+            obj="Client",
+            line=2,
+            column=0,
+            end_line=2,
+            end_column=12,
+            path=os.path.join(probe_package, NAMESPACE, "good.py"),
+            symbol="missing-class-docstring",
+            msg="Missing class docstring",
+            msg_id="C0115",
+        )
+        PylintParser.load_items([PylintError("apistub-parallel-probe", msg)])
+        pool = WorkerPool(2)
+        try:
+            for _ in range(2):
+                _, results = _inspect([NAMESPACE + ".good"], pool=pool)
+                assert results[0].pylint_owners == {0: "<class '{}.good.Client'>".format(NAMESPACE)}
+                # the run's payload file is removed once its modules are inspected
+                assert os.listdir(pool._payload_dir) == []
+        finally:
+            pool.shutdown()
@@ -0,0 +1,89 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import json
+import os
+import pstats
+
+import pytest
+
+from apistub._profile import RunProfiler, resource, get_profiler, profile_paths, profile_phase, set_profiler
+
+
+@pytest.fixture(autouse=True)
+def no_profiler():
+    # StubGenerator sets the process-wide profiler, so earlier tests may have left one behind.
+    previous = get_profiler()
+    set_profiler(None)
+    try:
+        yield
+    finally:
+        set_profiler(previous)
+
+
+class TestRunProfiler:
+    def test_profile_paths(self):
+        assert profile_paths("out/pkg_python.json") == ("out/pkg_python.profile.json", "out/pkg_python.pstats")
+        assert profile_paths("out/pkg_python.json.gz") == ("out/pkg_python.profile.json", "out/pkg_python.pstats")
+
+    def test_phases_accumulate_and_nest(self):
+        profiler = RunProfiler()
+        set_profiler(profiler)
+        try:
+            for _ in range(2):
+                with profile_phase("outer"):
+                    with profiler.module_step("pkg.module", "inspect"):
+                        sum(range(10000))
+        finally:
+            set_profiler(None)
+        report = profiler.report()
+        assert report["phases"]["outer"]["calls"] == 2
+        assert report["phases"]["inspect"]["calls"] == 2
+        assert report["phases"]["outer"]["wall_seconds"] >= report["phases"]["inspect"]["wall_seconds"]
+        assert [m["name"] for m in report["modules"]] == ["pkg.module"]
+        assert report["modules"][0]["inspect"] == report["modules"][0]["total_seconds"]
+
+    def test_phases_report_their_own_peak_growth(self):
+        profiler = RunProfiler()
+        with profiler.phase("allocate"):
+            block = bytearray(64 * 1024 * 1024)
+            block[:: 4096] = b"x" * len(block[:: 4096])
+        del block
+        with profiler.phase("idle"):
+            sum(range(10000))
+        phases = profiler.report()["phases"]
+        if resource is None:
+            assert phases["allocate"]["peak_rss_growth_bytes"] is None
+            return
+        # the idle phase stays below the peak reached by the allocating phase, so it adds nothing
+        assert phases["allocate"]["peak_rss_growth_bytes"] >= 32 * 1024 * 1024
+        assert phases["idle"]["peak_rss_growth_bytes"] == 0
+
+    def test_profile_phase_without_profiler(self):
+        assert get_profiler() is None
+        with profile_phase("ignored"):
+            pass
+
+    def test_slowest_classes_are_kept(self):
+        profiler = RunProfiler(top_classes=3)
+        for i in range(10):
+            profiler.record_class("Class{}".format(i), float(i), i * 1024)
+        profiler.record_class("Class9", 9.0)
+        slowest = profiler.report()["slowest_classes"]
+        assert [c["name"] for c in slowest] == ["Class9", "Class9", "Class8"]
+        assert [c["peak_rss_growth_bytes"] for c in slowest] == [None, 9 * 1024, 8 * 1024]
+
+    def test_save_writes_report_and_stats(self, tmp_path):
+        profiler = RunProfiler(pstats=True)
+        profiler.start()
+        with profiler.phase("write"):
+            sorted(range(1000), reverse=True)
+        profiler.stop()
+        out_file_path = os.path.join(str(tmp_path), "pkg_python.json")
+        report_path, pstats_path = profiler.save(out_file_path)
+        with open(report_path, "r") as f:
+            assert "write" in json.load(f)["phases"]
+        assert pstats.Stats(pstats_path).total_calls > 0
@@ -0,0 +1,158 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Tests for the pylint item indexes behind PylintParser.match_items and get_items.
+
+The ownership test builds a synthetic package with 10k diagnostics and checks that
+the indexes match a brute-force assignment.
+"""
+
+import importlib.util
+import os
+import sys
+
+from apistub import ApiView
+from apistub._file_cache import FileCache, get_file_cache, set_file_cache
+from apistub.nodes import PylintParser
+from apistub.nodes._base_node import NodeEntityBase
+from apistub.nodes._class_node import clear_caches
+from benchmarks.synthetic import pylint_messages, write_pylint_module
+
+CLASS_COUNT = 250
+METHOD_COUNT = 8
+DIAGNOSTIC_COUNT = 10000
+
+
+def _load_messages(messages):
+    # Collect any pylint run left pending by an earlier test so it cannot replace the synthetic items.
+    PylintParser.wait()
+    PylintParser._load_messages("synthetic", messages)
+
+
+def _import(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _write_synthetic_module(path):
+    return write_pylint_module(path, CLASS_COUNT, METHOD_COUNT)
+
+
+def _raw_messages(path, ranges):
+    return pylint_messages(path, ranges, DIAGNOSTIC_COUNT, METHOD_COUNT)
+
+
+class TestPylintParserIndex:
+    def test_ownership_matches_brute_force(self, tmp_path):
+        module_name = "apistub_synthetic_pylint_pkg"
+        path = os.path.join(str(tmp_path), "synthetic_pkg", "_synthetic.py")
+        os.makedirs(os.path.dirname(path))
+        ranges = _write_synthetic_module(path)
+        module = _import(path, module_name)
+        clear_caches()
+        try:
+            _load_messages(_raw_messages(path, ranges))
+            assert len(PylintParser.items) == DIAGNOSTIC_COUNT
+
+            objects = []
+            for c in range(CLASS_COUNT):
+                cls = getattr(module, f"Class{c}")
+                objects.append((f"Class{c}", cls))
+                objects.extend((f"Class{c}.method_{m}", getattr(cls, f"method_{m}")) for m in range(METHOD_COUNT))
+
+            nodes = [NodeEntityBase(module_name, None, obj) for _, obj in objects]
+            found = {id(node): PylintParser.get_items(node) for node in nodes}
+
+            # Brute force: later (inner) matches overwrite earlier ones, as in match_items.
+            expected_owner = [None] * DIAGNOSTIC_COUNT
+            for qualname, obj in objects:
+                first, last = ranges[qualname]
+                for i, item in enumerate(PylintParser.items):
+                    if first <= item.line <= last:
+                        expected_owner[i] = str(obj)
+            assert [item.owner for item in PylintParser.items] == expected_owner
+            for node in nodes:
+                expected = [x for x in PylintParser.items if node.is_pylint_error_owner(x)]
+                assert found[id(node)] == expected
+            assert sum(len(items) for items in found.values()) > 0
+        finally:
+            PylintParser.load_items([])
+            clear_caches()
+            del sys.modules[module_name]
+
+    def test_assign_owners_refreshes_lookup(self, tmp_path):
+        module_name = "apistub_synthetic_pylint_owners"
+        path = os.path.join(str(tmp_path), "synthetic_pkg", "_owners.py")
+        os.makedirs(os.path.dirname(path))
+        ranges = _write_synthetic_module(path)
+        module = _import(path, module_name)
+        try:
+            messages = _raw_messages(path, ranges)[:50]
+            for message in messages[:5]:
+                message["line"], message["obj"] = ranges["Class0.method_1"][0], "method_1"
+            _load_messages(messages)
+            method = module.Class0.method_1
+            node = NodeEntityBase(module_name, None, method)
+            owned = PylintParser.get_items(node)
+            assert len(owned) == 5
+            PylintParser.reset_owners()
+            assert PylintParser.get_items(node) == []
+            PylintParser.assign_owners({PylintParser.items.index(x): str(method) for x in owned})
+            assert PylintParser.get_items(node) == owned
+        finally:
+            PylintParser.load_items([])
+            clear_caches()
+            del sys.modules[module_name]
+
+
+class TestPylintParserCache:
+    def _write_package(self, root, files):
+        for name, content in files.items():
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def test_package_digest_changes_with_any_file(self, tmp_path):
+        root = str(tmp_path)
+        self._write_package(root, {"pkg/__init__.py": "", "pkg/base.py": "class Base: ...\n", "pkg/model.py": ""})
+        file_cache = FileCache(os.path.join(root, "cache"))
+        files = PylintParser._python_files(os.path.join(root, "pkg"), "")
+        digest = PylintParser._package_digest(os.path.join(root, "pkg"), files, file_cache)
+        assert PylintParser._package_digest(os.path.join(root, "pkg"), list(reversed(files)), file_cache) == digest
+
+        # model.py is unchanged, but what pylint infers about it depends on base.py
+        self._write_package(root, {"pkg/base.py": "class Base:\n    x = 1\n"})
+        assert PylintParser._package_digest(os.path.join(root, "pkg"), files, file_cache) != digest
+
+    def test_unchanged_package_reuses_all_messages(self, tmp_path):
+        root = str(tmp_path)
+        pkg = os.path.join(root, "pkg")
+        self._write_package(root, {"pkg/__init__.py": "", "pkg/model.py": "class Model: ...\n"})
+        file_cache = FileCache(os.path.join(root, "cache"))
+        rcfile_path = os.path.join(ApiView.get_root_path(), ".pylintrc")
+        digest = PylintParser._package_digest(pkg, PylintParser._python_files(pkg, rcfile_path), file_cache)
+        message = {"message-id": "C4717", "symbol": "synthetic-check", "path": "model.py", "line": 1, "obj": "Model"}
+        file_cache.set(PylintParser._cache_kind(rcfile_path), digest, [message])
+
+        previous = get_file_cache()
+        set_file_cache(file_cache)
+        try:
+            PylintParser.start(pkg)
+            assert PylintParser._pending is None
+            assert [(x.path, x.obj) for x in PylintParser.items] == [(os.path.join("pkg", "model.py"), "Model")]
+        finally:
+            set_file_cache(previous)
+            PylintParser.load_items([])
+
+    def test_messages_are_ordered_by_file(self):
+        messages = [{"path": "/b.py", "line": 1}, {"path": "/a.py", "line": 2}, {"path": "/a.py", "line": 1}, {}]
+        ordered = PylintParser._order_by_file(["/a.py", "/b.py"], messages)
+        assert ordered == [messages[1], messages[2], messages[0], messages[3]]
@@ -0,0 +1,106 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Tests for the slotted ReviewLine and ReviewToken used while generating tokens.
+
+The memory test builds the same review lines with the generated dict-backed models and
+with the slotted ones, and checks that the slotted ones encode identically in less memory.
+"""
+
+import json
+import pickle
+import tracemalloc
+
+from apistub import ReviewLines, TokenKind
+from apistub._generated.treestyle.parser._model_base import SdkJSONEncoder
+from apistub._generated.treestyle.parser.models import ReviewLine, ReviewToken
+from apistub._generated.treestyle.parser.models import _models
+
+LINE_COUNT = 2000
+TOKENS_PER_LINE = 10
+
+
+def _build(line_cls, token_cls):
+    lines = []
+    for i in range(LINE_COUNT):
+        tokens = [
+            token_cls(
+                kind=TokenKind.TEXT,
+                value=f"value_{i}_{t}",
+                has_prefix_space=False,
+                has_suffix_space=True,
+            )
+            for t in range(TOKENS_PER_LINE)
+        ]
+        line = line_cls(tokens=tokens, is_context_end_line=False)
+        line.line_id = f"line_{i}"
+        lines.append(line)
+    return lines
+
+
+def _measure(line_cls, token_cls):
+    tracemalloc.start()
+    try:
+        lines = _build(line_cls, token_cls)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return lines, size
+
+
+def _encode(value):
+    return json.dumps(value, cls=SdkJSONEncoder)
+
+
+class TestReviewLine:
+    def test_serializes_like_generated_model(self):
+        def make_token(token_cls):
+            token = token_cls(kind=TokenKind.TYPE_NAME, value="Foo", has_prefix_space=False, skip_diff=True)
+            token.navigate_to_id = "pkg.Foo"
+            token.render_classes = ["handwritten"]
+            token.skip_diff = None
+            token.has_prefix_space = True
+            return token
+
+        compact, generated = make_token(ReviewToken), make_token(_models.ReviewToken)
+        assert _encode(compact) == _encode(generated)
+        assert list(compact.keys()) == list(generated.keys())
+        assert "SkipDiff" not in compact
+        assert compact["Value"] == "Foo"
+
+        line = ReviewLine(tokens=[compact], is_context_end_line=False)
+        line.line_id = "pkg.Foo"
+        line.add_children([ReviewLine(tokens=[])])
+        expected = _models.ReviewLine(tokens=[generated], is_context_end_line=False)
+        expected.line_id = "pkg.Foo"
+        expected.children = [_models.ReviewLine(tokens=[], is_context_end_line=False)]
+        assert _encode(line) == _encode(expected)
+
+    def test_lists_are_copied(self):
+        tokens = []
+        line = ReviewLines().create_review_line()
+        other = ReviewLines().create_review_line()
+        line.add_text("a")
+        assert len(other.tokens) == 0
+        line = ReviewLine(tokens=tokens)
+        line.add_text("b")
+        assert tokens == []
+
+    def test_pickle_round_trip(self):
+        line = ReviewLines().create_review_line(is_handwritten=True)
+        line.add_line_marker("pkg.Foo")
+        line.add_text("Foo", render_classes=["class"])
+        copy = pickle.loads(pickle.dumps(line))
+        assert copy.is_handwritten
+        assert _encode(copy) == _encode(line)
+        assert copy.tokens[0].render_classes == ["class", "handwritten"]
+
+    def test_slotted_lines_use_less_memory(self):
+        generated_lines, generated = _measure(_models.ReviewLine, _models.ReviewToken)
+        compact_lines, compact = _measure(ReviewLine, ReviewToken)
+        assert _encode(compact_lines) == _encode(generated_lines)
+        assert compact < generated
@@ -0,0 +1,130 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import functools
+import inspect
+import os
+
+from apistub._file_cache import FileCache, set_file_cache
+from apistub.nodes._symbol_table import (
+    build_symbol_table,
+    clear_symbol_tables,
+    get_function_line_range,
+    get_function_source,
+    is_handwritten,
+)
+
+SOURCE = '''from dataclasses import dataclass
+from typing import overload
+
+
+@dataclass
+class Outer:
+    class Inner:
+        def method(self):
+            pass
+
+
+if True:
+    class Conditional:
+        pass
+
+
+@overload
+def convert(value: int) -> int: ...
+def convert(value):
+    return value
+'''
+
+
+def _decorator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@_decorator
+def _decorated(value):
+    return value
+    # trailing comment indented like the body
+
+
+class _Sample:
+    @classmethod
+    def create(cls):
+        def nested():
+            pass
+
+        return nested
+
+    def one_liner(self): return 1
+
+
+class TestSymbolTable:
+    def test_function_source_matches_inspect(self):
+        clear_symbol_tables()
+        functions = [_decorated, _Sample.create, _Sample().one_liner, _Sample.create(), _decorator]
+        for func in functions:
+            lines, start = inspect.getsourcelines(func)
+            assert get_function_source(func) == inspect.getsource(func)
+            assert get_function_line_range(func) == (start, start + len(lines) - 1)
+
+    def test_lambda_falls_back_to_inspect(self):
+        func = lambda value: value
+        assert get_function_line_range(func) == (None, None)
+        assert get_function_source(func) == inspect.getsource(func)
+
+    def test_classes_and_decorators(self, tmp_path):
+        path = os.path.join(str(tmp_path), "module.py")
+        with open(path, "w") as f:
+            f.write(SOURCE)
+        table = build_symbol_table(path)
+        assert sorted(table.classes) == ["Outer", "Outer.Inner"]
+        assert table.classes["Outer"].decorators == ("dataclass",)
+        assert table.source(*table.classes["Outer"][:2]).startswith("@dataclass\nclass Outer:")
+        assert table.find_function(17, "convert").decorators == ("overload",)
+        assert table.find_function(19, "convert").decorators == ()
+        assert table.find_function(8, "method").is_module_level is False
+        assert table.find_function(8, "other") is None
+        assert table.has_module_level_overloads()
+        assert not table.is_handwritten
+
+    def test_file_cache_round_trip(self, tmp_path):
+        path = os.path.join(str(tmp_path), "_patch.py")
+        with open(path, "w") as f:
+            f.write(SOURCE)
+        cache = FileCache(str(tmp_path))
+        set_file_cache(cache)
+        try:
+            built = build_symbol_table(path)
+            cached = build_symbol_table(path)
+        finally:
+            set_file_cache(None)
+            clear_symbol_tables()
+        assert cache.hits == 1
+        assert cached.classes == built.classes
+        assert cached.functions == built.functions
+        assert cached.is_handwritten
+
+    def test_is_handwritten(self, tmp_path):
+        path = os.path.join(str(tmp_path), "_patch.py")
+        with open(path, "w") as f:
+            f.write(SOURCE)
+        namespace = {}
+        exec(compile(SOURCE, path, "exec"), namespace)
+        clear_symbol_tables()
+        try:
+            assert is_handwritten(namespace["convert"])
+            build_symbol_table(path).is_handwritten = False
+            # the loaded table answers for the file
+            assert not is_handwritten(namespace["convert"])
+        finally:
+            clear_symbol_tables()
+        assert not is_handwritten(_decorated)
+        assert not is_handwritten(_Sample().one_liner)
+        assert not is_handwritten(len)
@@ -0,0 +1,82 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import os
+import subprocess
+import sys
+import threading
+
+from apistub._venv_cache import CachedVirtualEnv, VirtualEnvCache, read_requirements
+
+PKG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "apiview-stub-generator-test"))
+
+
+class TestVirtualEnvCache:
+    def test_dependency_key_ignores_order_spacing_and_extras(self):
+        key = VirtualEnvCache.dependency_key(["azure-core>=1.30.0", "isodate>=0.6.1"])
+        assert key == VirtualEnvCache.dependency_key(
+            ["isodate >= 0.6.1", "Azure-Core>=1.30.0", 'aiohttp>=3.0; extra == "aio"']
+        )
+        assert key != VirtualEnvCache.dependency_key(["azure-core>=1.31.0", "isodate>=0.6.1"])
+
+    def test_get_returns_environment_per_dependency_set(self, tmp_path):
+        cache = VirtualEnvCache(str(tmp_path))
+        env = cache.get(["azure-core"])
+        assert not env.ready
+        assert env.path == cache.get(["azure-core"]).path
+        assert env.path != cache.get(["azure-core", "isodate"]).path
+
+    def test_read_requirements_from_pyproject(self):
+        assert read_requirements(PKG_PATH) == ["aiohttp", "azure-core", "sphinx", "sphinx_rtd_theme", "recommonmark"]
+
+    def test_read_requirements_from_setup_py(self, tmp_path):
+        with open(os.path.join(str(tmp_path), "setup.py"), "w") as f:
+            f.write('from setuptools import setup\nsetup(name="pkg", install_requires=["azure-core<2.0.0,>=1.30.0"])\n')
+        assert read_requirements(str(tmp_path)) == ["azure-core<2.0.0,>=1.30.0"]
+
+        with open(os.path.join(str(tmp_path), "setup.py"), "w") as f:
+            f.write('from setuptools import setup\nsetup(name="pkg", install_requires=REQUIREMENTS)\n')
+        assert read_requirements(str(tmp_path)) is None
+
+    def test_activate_puts_site_packages_first(self, tmp_path):
+        env = CachedVirtualEnv(str(tmp_path), [])
+        os.makedirs(env.site_packages)
+        with open(os.path.join(env.site_packages, "apistub_venv_probe.py"), "w") as f:
+            f.write("VALUE = 1\n")
+        saved = list(sys.path)
+        try:
+            env.activate()
+            assert sys.path[0] == env.site_packages
+            import apistub_venv_probe
+
+            assert apistub_venv_probe.VALUE == 1
+            env.deactivate()
+            assert sys.path == saved
+        finally:
+            sys.path[:] = saved
+            sys.modules.pop("apistub_venv_probe", None)
+
+    def test_lock_excludes_other_holders(self, tmp_path):
+        env = CachedVirtualEnv(os.path.join(str(tmp_path), "env"), [])
+        acquired = threading.Event()
+
+        def hold():
+            with env.lock():
+                acquired.set()
+
+        with env.lock():
+            thread = threading.Thread(target=hold)
+            thread.start()
+            assert not acquired.wait(0.2)
+        assert acquired.wait(5)
+        thread.join()
+
+    def test_created_environment_runs_pylint(self, tmp_path):
+        env = CachedVirtualEnv(os.path.join(str(tmp_path), "env"), [])
+        with env.lock():
+            env.create()
+        # pylint is installed in the running interpreter, not in the new environment
+        subprocess.check_call([env.python, "-c", "import pylint, pylint_guidelines_checker"])